@@ -0,0 +1,339 @@
+"""
+Benchmarks the model, storage and CLI hot paths on synthetic boards.
+
+Every benchmark runs WARMUP untimed times, then REPEATS timed times, on
+boards of every requested size, reporting operations per second, the
+fastest run, latency percentiles and peak memory.
+In process benchmarks report the peak memory traced by tracemalloc on
+an extra run, CLI ones the peak resident size of the command process.
+Results are saved as json, and compared against a baseline with
+
+    python scripts/benchmark.py --tasks 1000 10000 100000 --output base.json
+    python scripts/benchmark.py --tasks 1000 10000 100000 --compare base.json
+
+which lists every benchmark slower or using more memory than the
+baseline by more than THRESHOLD, exiting with 1 when any does. Latency
+must also exceed the spread of both runs, so noise alone isn't flagged.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from whattodo import binary_storage
+from whattodo.api.board import Board
+from whattodo.api.task import Task
+from whattodo.file_storage import CACHE_FILE
+from whattodo.file_storage import iter_tasks_from_json
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import store_to_json
+from whattodo.parallel import read_board_in_parallel
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs whattodo like python -m does, then reports its own peak resident
+# size, which unlike the one of getrusage doesn't count the memory this
+# process had when forking it.
+LAUNCHER = """
+import runpy
+import sys
+try:
+    runpy.run_module("whattodo", run_name="__main__", alter_sys=True)
+finally:
+    with open("/proc/self/status", encoding="utf-8") as status:
+        print([line for line in status if line.startswith("VmHWM")][0], file=sys.stderr)
+"""
+
+# Tasks per page of the paging benchmarks.
+PAGE_SIZE = 50
+
+# Epoch microseconds of 2026-01-01, the first synthetic creation date.
+FIRST_CREATED_AT = 1767225600000000
+
+
+def synthetic_board(tasks):
+    """
+    Builds the dict of a board with TASKS tasks created a minute
+    apart, every third one done.
+    """
+    return {
+        "version": 3,
+        "name": "benchmark",
+        "next_id": tasks + 1,
+        "tasks": [
+            {
+                "id": number,
+                "description": f"benchmark task number {number}",
+                "status": number % 3 == 0,
+                "created_at": FIRST_CREATED_AT + number * 60_000_000,
+                "utc_offset": 0,
+            }
+            for number in range(1, tasks + 1)
+        ],
+    }
+
+
+def board_from_dict(data, columnar=False):
+    return None, lambda: Board.from_dict(data, columnar=columnar)
+
+
+def board_to_dict(data):
+    board = Board.from_dict(data)
+    return None, board.to_dict
+
+
+def task_from_dict(data):
+    def run():
+        for dict_task in data["tasks"]:
+            Task.from_dict(dict_task)
+
+    return None, run
+
+
+def board_list_tasks(data):
+    board = Board.from_dict(data)
+    return None, lambda: board.list_tasks
+
+
+def json_store(data):
+    return None, lambda: store_to_json(data)
+
+
+def json_read(data, cached=True):
+    store_to_json(data)
+    read_from_json()
+
+    def clear_cache():
+        os.remove(CACHE_FILE)
+
+    return (None if cached else clear_cache), read_from_json
+
+
+def parallel_read(data):
+    store_to_json(data)
+    return None, read_board_in_parallel
+
+
+def json_page(data):
+    store_to_json(data)
+    middle = len(data["tasks"]) // 2
+    return None, lambda: list(iter_tasks_from_json(middle, middle + PAGE_SIZE))
+
+
+def binary_store(data):
+    return None, lambda: binary_storage.store_to_binary(data)
+
+
+def binary_read(data):
+    binary_storage.store_to_binary(data)
+    return None, binary_storage.read_from_binary
+
+
+def binary_count(data):
+    binary_storage.store_to_binary(data)
+    return None, lambda: binary_storage.count_tasks("done")
+
+
+def binary_page(data, status=None):
+    binary_storage.store_to_binary(data)
+    middle = len(data["tasks"]) // 2
+    return None, lambda: list(
+        binary_storage.iter_tasks(middle, middle + PAGE_SIZE, status)
+    )
+
+
+def cli(*arguments):
+    def setup(data):
+        store_to_json(data)
+        read_from_json()
+        return None, lambda: run_command(*arguments)
+
+    return setup
+
+
+def run_command(*arguments):
+    """
+    Runs a whattodo command in a fresh interpreter, returning its
+    peak resident size in bytes.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", LAUNCHER, *arguments],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+        text=True,
+        env=dict(os.environ, PYTHONPATH=PROJECT_ROOT),
+    )
+    # The status file reports the peak resident size in kilobytes.
+    return int(result.stderr.split()[-2]) * 1024
+
+
+# Benchmarks are set up on a board dict, returning a callable to run
+# untimed before every repeat, or None, and the callable to time.
+BENCHMARKS = {
+    "Board.from_dict": board_from_dict,
+    "Board.from_dict columnar": lambda data: board_from_dict(data, columnar=True),
+    "Board.to_dict": board_to_dict,
+    "Task.from_dict": task_from_dict,
+    "Board.list_tasks": board_list_tasks,
+    "store_to_json": json_store,
+    "read_from_json": json_read,
+    "read_from_json uncached": lambda data: json_read(data, cached=False),
+    "read_board_in_parallel": parallel_read,
+    "iter_tasks_from_json page": json_page,
+    "store_to_binary": binary_store,
+    "read_from_binary": binary_read,
+    "binary count_tasks done": binary_count,
+    "binary iter_tasks page": binary_page,
+    "binary iter_tasks page done": lambda data: binary_page(data, status="done"),
+    "cli board:count": cli("board:count"),
+    "cli board:list": cli("board:list"),
+    "cli board:list ndjson": cli("board:list", "--format", "ndjson"),
+    "cli task:add": cli("task:add", "benchmark task"),
+    "cli export": cli("export", os.devnull),
+}
+
+
+def percentile(timings, fraction):
+    """
+    Retrieves the nearest rank percentile of the timings.
+    """
+    ordered = sorted(timings)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def measure(name, tasks, repeats, warmup=0):
+    data = synthetic_board(tasks)
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        before, run = BENCHMARKS[name](data)
+        for _ in range(warmup):
+            if before is not None:
+                before()
+            run()
+        timings = []
+        peak_memory = 0
+        for _ in range(repeats):
+            if before is not None:
+                before()
+            started = time.perf_counter()
+            result = run()
+            timings.append(time.perf_counter() - started)
+            if name.startswith("cli "):
+                peak_memory = max(peak_memory, result)
+        if not name.startswith("cli "):
+            if before is not None:
+                before()
+            tracemalloc.start()
+            run()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        os.chdir(working_directory)
+    return {
+        "benchmark": name,
+        "tasks": tasks,
+        "repeats": repeats,
+        "ops_per_second": len(timings) / sum(timings),
+        "min_ms": min(timings) * 1000,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def report(result):
+    print(
+        f"{result['benchmark']:<26} {result['tasks']:>8} tasks: "
+        f"{result['ops_per_second']:>9.2f} ops/s, "
+        f"min {result['min_ms']:>9.2f} ms, p50 {result['p50_ms']:>9.2f} ms, p95 {result['p95_ms']:>9.2f} ms, "
+        f"p99 {result['p99_ms']:>9.2f} ms, "
+        f"peak {result['peak_memory_bytes'] / 1024 / 1024:>8.1f} MiB"
+    )
+
+
+def spread(result):
+    """
+    Retrieves how far apart the fastest and the p95 runs of a result
+    are, in milliseconds, as a measure of its noise.
+    """
+    return result["p95_ms"] - result.get("min_ms", result["p50_ms"])
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns the descriptions of the results using more memory than
+    their baseline by more than THRESHOLD, or slower at the median by
+    more than THRESHOLD plus the larger spread of the two runs.
+    """
+    baseline_results = {
+        (result["benchmark"], result["tasks"]): result for result in baseline["results"]
+    }
+    regressions = []
+    for result in results:
+        base = baseline_results.get((result["benchmark"], result["tasks"]))
+        if base is None:
+            continue
+        margins = {
+            "p50_ms": base["p50_ms"] * threshold + max(spread(base), spread(result)),
+            "peak_memory_bytes": base["peak_memory_bytes"] * threshold,
+        }
+        for field, unit in (("p50_ms", "latency"), ("peak_memory_bytes", "memory")):
+            if base[field] and result[field] > base[field] + margins[field]:
+                regressions.append(
+                    f"{result['benchmark']} at {result['tasks']} tasks: {unit} "
+                    f"{result[field] / base[field] - 1:+.0%} over the baseline"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeats", type=int, default=11)
+    parser.add_argument(
+        "--benchmarks", choices=list(BENCHMARKS), nargs="+", default=list(BENCHMARKS)
+    )
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", metavar="BASELINE")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    arguments = parser.parse_args()
+    # The baseline is read first, as the output may overwrite it.
+    baseline = None
+    if arguments.compare:
+        with open(arguments.compare, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    results = []
+    for tasks in arguments.tasks:
+        for name in arguments.benchmarks:
+            results.append(
+                measure(name, tasks, arguments.repeats, warmup=arguments.warmup)
+            )
+            report(results[-1])
+    with open(arguments.output, "w", encoding="utf-8") as output_file:
+        json.dump(
+            {"python": platform.python_version(), "results": results},
+            output_file,
+            indent=4,
+        )
+    if baseline is not None:
+        regressions = compare(results, baseline, arguments.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares reading a board with and without the parsed board cache.
+
+A board of every requested size is stored with some journaled changes,
+then read_from_json is timed REPEATS times with the cache removed before
+every read (cold) and with the cache written by the previous read (warm).
+
+    python scripts/board_cache.py --tasks 10000 100000 1000000 --repeats 5
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from whattodo.api.board import Board
+from whattodo.api.task import Task
+from whattodo.file_storage import CACHE_FILE
+from whattodo.file_storage import append_records
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import store_to_json
+
+
+def store_board(tasks: int) -> None:
+    board = Board(name="benchmark", columnar=True)
+    for number in range(tasks):
+        board.add(Task(description=f"benchmark task number {number}"))
+    store_to_json(board.to_dict())
+    board.pop_changes()
+    board.update_status_many(range(1, min(tasks, 100) + 1), "done")
+    append_records(board.pop_changes())
+
+
+def time_read(cold: bool, repeats: int) -> float:
+    timings = []
+    read_from_json()
+    for _ in range(repeats):
+        if cold:
+            os.remove(CACHE_FILE)
+        started = time.perf_counter()
+        read_from_json()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def run(tasks: int, repeats: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        store_board(tasks)
+        cold = time_read(cold=True, repeats=repeats)
+        warm = time_read(cold=False, repeats=repeats)
+        print(
+            f"{tasks:>8} tasks: cold {cold * 1000:>9.1f} ms, "
+            f"warm {warm * 1000:>9.1f} ms, {cold / warm:>5.1f}x faster"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=5)
+    arguments = parser.parse_args()
+    for tasks in arguments.tasks:
+        run(tasks, arguments.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Measures the json storage throughput with parallel writer processes.
+
+Every writer adds OPERATIONS tasks, either appending them to the journal
+like task:add does or storing whole snapshots with optimistic retries
+like batch does. The stored board is checked for lost updates.
+
+    python scripts/concurrent_writers.py --writers 1 2 4 8 --operations 200
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from whattodo.api.board import Board
+from whattodo.api.task import Task
+from whattodo.file_storage import RevisionConflictError
+from whattodo.file_storage import append_to_journal
+from whattodo.file_storage import locked
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import read_revision
+from whattodo.file_storage import store_to_json
+
+
+def append_tasks(directory: str, writer: int, operations: int) -> int:
+    os.chdir(directory)
+    for number in range(operations):
+        task = Task(description=f"writer {writer} task {number}")
+        append_to_journal({"op": "add", "task": task.to_dict()})
+    return 0
+
+
+def store_tasks(directory: str, writer: int, operations: int) -> int:
+    os.chdir(directory)
+    retries = 0
+    for number in range(operations):
+        while True:
+            with locked(exclusive=False):
+                board = Board.from_dict(read_from_json())
+                revision = read_revision()
+            board.add(Task(description=f"writer {writer} task {number}"))
+            try:
+                store_to_json(board.to_dict(), expected_revision=revision)
+                break
+            except RevisionConflictError:
+                retries += 1
+    return retries
+
+
+def run(mode: str, writers: int, operations: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        store_to_json(Board(name="benchmark").to_dict())
+        worker = append_tasks if mode == "journal" else store_tasks
+        started = time.perf_counter()
+        with multiprocessing.Pool(writers) as pool:
+            retries = sum(
+                pool.starmap(
+                    worker,
+                    [(directory, writer, operations) for writer in range(writers)],
+                )
+            )
+        elapsed = time.perf_counter() - started
+        stored = len(read_from_json()["tasks"])
+        expected = writers * operations
+        print(
+            f"{mode:>8} {writers:>3} writers: {expected / elapsed:>9.0f} operations/s, "
+            f"{retries} retries, {expected - stored} lost updates"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--operations", type=int, default=200)
+    parser.add_argument(
+        "--mode",
+        choices=["journal", "snapshot"],
+        nargs="+",
+        default=["journal", "snapshot"],
+    )
+    arguments = parser.parse_args()
+    for mode in arguments.mode:
+        for writers in arguments.writers:
+            run(mode, writers, arguments.operations)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Tuple
 
 import pytest
@@ -5,7 +6,10 @@ import pytest
 from freezegun.api import freeze_time
 
 from whattodo.api.board import Board
+from whattodo.api.board import assign_task_ids
+from whattodo.api.segmented import SegmentedTasks
 from whattodo.api.task import Task
+from whattodo.api.task_store import TaskStore
 
 
 @pytest.mark.smoke
@@ -131,17 +135,23 @@ def test_from_dict():
 def test_to_dict():
     with freeze_time("2020-12-26 00:00:00"):
         board_dict = {
+            "version": 3,
             "name": "personal",
+            "next_id": 3,
             "tasks": [
                 {
+                    "id": 1,
                     "description": "my first task",
                     "status": False,
-                    "created_at": "2020-12-26 00:00:00",
+                    "created_at": 1608940800000000,
+                    "utc_offset": 0,
                 },
                 {
+                    "id": 2,
                     "description": "my second task",
                     "status": True,
-                    "created_at": "2020-12-26 00:00:00",
+                    "created_at": 1608940800000000,
+                    "utc_offset": 0,
                 },
             ],
         }
@@ -156,6 +166,36 @@ def test_to_dict():
         assert board.to_dict() == board_dict
 
 
+def test_to_dict_must_upgrade_a_version_1_board():
+    board_dict = {
+        "name": "personal",
+        "tasks": [
+            {
+                "description": "my first task",
+                "status": False,
+                "created_at": "2020-12-26 00:00:00",
+            },
+        ],
+    }
+
+    board = Board.from_dict(board_dict)
+
+    assert board.to_dict() == {
+        "version": 3,
+        "name": "personal",
+        "next_id": 2,
+        "tasks": [
+            {
+                "id": 1,
+                "description": "my first task",
+                "status": False,
+                "created_at": 1608940800000000,
+                "utc_offset": 0,
+            },
+        ],
+    }
+
+
 def test_clean_tasks():
     first_task = Task("my first task")
     board = Board(name="personal")
@@ -175,8 +215,67 @@ def test_remove_task():
 
     board.remove_task(0)
 
-    assert len(board._tasks) == 1
-    assert board.tasks[0] == second_task
+    assert board.count_tasks == 1
+    assert board.tasks == [second_task]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_tasks_must_keep_their_ids_when_other_tasks_are_removed(columnar):
+    board = Board(name="personal", columnar=columnar)
+    for number in range(4):
+        board.add(Task(f"task {number}"))
+
+    board.remove_task_by_id(2)
+    board.remove_task(0)
+
+    assert board.count_tasks == 2
+    assert board.retrieve_task_by_id(4).description == "task 3"
+    assert [task.id for task in board.tasks] == [3, 4]
+    board.add(Task("task 4"))
+    assert board.to_dict()["next_id"] == 6
+    assert board.retrieve_task(2).id == 5
+
+
+def test_retrieve_task_by_id_must_raise_index_error_given_a_removed_id():
+    board = Board(name="personal")
+    board.add(Task("my first task"))
+    board.add(Task("my second task"))
+    board.remove_task_by_id(1)
+
+    with pytest.raises(IndexError) as excinfo:
+        board.retrieve_task_by_id(1)
+
+    assert str(excinfo.value) == "No tasks found with the id 1"
+
+
+def test_from_dict_must_give_ids_to_tasks_stored_without_them():
+    board_dict = {
+        "version": 3,
+        "name": "personal",
+        "next_id": 8,
+        "tasks": [
+            {
+                "id": None,
+                "description": "my first task",
+                "status": False,
+                "created_at": 1608940800000000,
+                "utc_offset": 0,
+            },
+            {
+                "id": 5,
+                "description": "my second task",
+                "status": False,
+                "created_at": 1608940800000000,
+                "utc_offset": 0,
+            },
+        ],
+    }
+
+    board = Board.from_dict(board_dict)
+    assign_task_ids(board_dict)
+
+    assert [task.id for task in board.tasks] == [8, 5]
+    assert board.to_dict() == board_dict
 
 
 def test_remove_task_must_raise_value_error_when_no_tasks_on_the_board():
@@ -191,3 +290,304 @@ def test_remove_task_must_raise_index_error_when_incorrect_index_is_given():
     board.add(first_task)
     with pytest.raises(IndexError):
         board.remove_task(len(board._tasks) + 1)
+
+
+def test_iter_list_tasks_must_yield_one_row_per_task():
+    board = Board(name="personal")
+    for number in range(4):
+        board.add(Task(f"task {number}"))
+
+    rows = list(board.iter_list_tasks(1, 3))
+
+    assert len(rows) == 4
+    assert "personal" in rows[0]
+    assert "task 1" in rows[1]
+    assert "task 2" in rows[2]
+
+
+def test_render_must_match_list_tasks(make_task: Tuple[Task, str]):
+    task, _ = make_task
+    board = Board(name="personal")
+    board.add(task)
+
+    assert "".join(Board.render(board.name, board.tasks)) == board.list_tasks
+    assert "".join(Board.render(board.name, [])) == Board("personal").list_tasks
+
+
+def test_columnar_board_must_behave_like_a_task_list():
+    board_dict = {
+        "name": "personal",
+        "tasks": [
+            {
+                "description": "my first task",
+                "status": False,
+                "created_at": "2020-12-26 00:00:00",
+            },
+            {
+                "description": "my second task",
+                "status": True,
+                "created_at": "2020-12-26 00:01:00",
+            },
+        ],
+    }
+
+    board = Board.from_dict(board_dict, columnar=True)
+
+    assert isinstance(board.tasks, TaskStore)
+    assert board.to_dict() == Board.from_dict(board_dict).to_dict()
+    assert board.list_tasks == Board.from_dict(board_dict).list_tasks
+    board.retrieve_task(0).status = "done"
+    board.remove_task(1)
+    board.add(Task("my third task"))
+    assert board.count_tasks == 2
+    assert board.retrieve_task(0).status == "ކ"
+    assert board.retrieve_task(1).description == "my third task"
+    with pytest.raises(IndexError):
+        board.remove_task(2)
+    board.clean_tasks()
+    assert isinstance(board.tasks, TaskStore)
+    assert board.count_tasks == 0
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_pop_changes_must_return_the_changes_made_since_loading(columnar):
+    board_dict = {
+        "version": 2,
+        "name": "personal",
+        "tasks": [
+            {
+                "description": "my first task",
+                "status": False,
+                "created_at": 1608940800000000,
+                "utc_offset": 0,
+            },
+            {
+                "description": "my second task",
+                "status": True,
+                "created_at": 1608940860000000,
+                "utc_offset": 0,
+            },
+        ],
+    }
+    board = Board.from_dict(board_dict, columnar=columnar)
+    task = Task("my third task")
+
+    assert board.pop_changes() == []
+    board.retrieve_task(1).status = "done"
+    board.retrieve_task(1).status = "not done"
+    board.remove_task(-2)
+    board.add(task)
+    board.retrieve_task(-1).status = "done"
+
+    assert board.pop_changes() == [
+        {"op": "update", "id": 2, "status": False, "previous": True},
+        {"op": "remove", "id": 1, "status": False},
+        {"op": "add", "task": {**task.to_dict(), "status": False}},
+        {"op": "update", "id": 3, "status": True, "previous": False},
+    ]
+    assert board.pop_changes() == []
+
+
+def test_clean_tasks_must_supersede_previous_changes():
+    board = Board(name="personal")
+    task = Task("my first task")
+    board.add(task)
+
+    board.clean_tasks()
+    task.status = "done"
+
+    assert board.pop_changes() == [{"op": "clean"}]
+
+
+def make_board_dict(*created_dates):
+    return {
+        "version": 3,
+        "name": "personal",
+        "next_id": len(created_dates) + 1,
+        "tasks": [
+            {
+                "id": task_id,
+                "description": f"task {task_id}",
+                "status": task_id % 2 == 0,
+                "created_at": int(created_at.timestamp() * 1_000_000),
+                "utc_offset": 0,
+            }
+            for task_id, created_at in enumerate(created_dates, 1)
+        ],
+    }
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({}, [1, 2, 3, 4]),
+        ({"status": "done"}, [2, 4]),
+        ({"status": "not done", "order": "id desc"}, [3, 1]),
+        ({"since": datetime(2026, 1, 2)}, [1, 3, 4]),
+        ({"until": datetime(2026, 1, 2)}, [2]),
+        ({"order": "created_at"}, [2, 3, 4, 1]),
+        ({"status": "done", "order": "created_at desc"}, [4, 2]),
+    ],
+)
+def test_query_must_filter_and_sort_tasks(columnar, filters, expected):
+    board = Board.from_dict(
+        make_board_dict(
+            datetime(2026, 1, 4),
+            datetime(2026, 1, 1),
+            datetime(2026, 1, 2),
+            datetime(2026, 1, 3),
+        ),
+        columnar=columnar,
+    )
+
+    assert [task.id for task in board.query(**filters)] == expected
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_query_must_follow_the_changes_made_after_the_first_query(columnar):
+    board = Board.from_dict(
+        make_board_dict(datetime(2026, 1, 1), datetime(2026, 1, 2)), columnar=columnar
+    )
+    assert [task.id for task in board.query(status="done")] == [2]
+
+    board.retrieve_task_by_id(1).status = "done"
+    board.remove_task_by_id(2)
+    with freeze_time("2026-01-03"):
+        board.add(Task("task 3"))
+
+    assert [task.id for task in board.query(status="done")] == [1]
+    assert [task.id for task in board.query(since=datetime(2026, 1, 2))] == [3]
+    board.clean_tasks()
+    assert list(board.query()) == []
+
+
+def test_query_must_raise_value_error_given_an_invalid_filter():
+    board = Board(name="personal")
+
+    with pytest.raises(ValueError):
+        board.query(status="finished")
+    with pytest.raises(ValueError):
+        board.query(order="description")
+
+
+def test_update_status_many_must_count_the_distinct_tasks_it_changed():
+    board = Board(name="personal")
+    for number in range(1, 4):
+        board.add(Task(f"task {number}"))
+    board.update_status_many([1], "done")
+    board.pop_changes()
+
+    assert board.update_status_many([1, 2, 2, 3, 2], "done") == 2
+    assert [record["id"] for record in board.pop_changes()] == [2, 3]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_bulk_methods_must_change_many_tasks_at_once(columnar):
+    board = Board(name="personal", columnar=columnar)
+    for number in range(1, 7):
+        board.add(Task(f"task {number}"))
+
+    assert board.update_status_many([2, 3, 4], "done") == 3
+    assert board.remove_many([1, 5, 1]) == 2
+    assert board.remove_where(lambda task: task.description == "task 2") == 1
+    archived = board.archive_done()
+
+    assert [dict_task["id"] for dict_task in archived] == [3, 4]
+    assert all(dict_task["status"] for dict_task in archived)
+    assert [task.id for task in board.tasks] == [6]
+    operations = [record["op"] for record in board.pop_changes()]
+    assert operations == ["add"] * 6 + ["update"] * 3 + ["remove"] * 5
+
+
+def test_remove_many_must_update_a_built_query_index():
+    board = Board(name="personal")
+    for number in range(1, 6):
+        board.add(Task(f"task {number}"))
+    board.query(status="not done")
+
+    board.remove_many([2, 4])
+
+    assert [task.id for task in board.query(status="not done")] == [1, 3, 5]
+    assert [task.id for task in board.query(order="created_at desc")] == [5, 3, 1]
+
+
+@pytest.mark.parametrize(
+    "bulk_call",
+    [
+        lambda board: board.remove_many([1, 3]),
+        lambda board: board.update_status_many([1, 3], "done"),
+    ],
+)
+def test_bulk_methods_must_change_nothing_given_a_missing_id(bulk_call):
+    board = Board(name="personal")
+    board.add(Task("task 1"))
+    board.pop_changes()
+
+    with pytest.raises(IndexError):
+        bulk_call(board)
+
+    assert board.pop_changes() == []
+    assert board.count_tasks == 1
+
+
+def test_update_status_many_must_raise_value_error_given_an_invalid_status():
+    board = Board(name="personal")
+    board.add(Task("task 1"))
+
+    with pytest.raises(ValueError):
+        board.update_status_many([1], "finished")
+
+
+def test_archive_done_must_remove_the_done_tasks_created_before_a_date():
+    board = Board.from_dict(
+        make_board_dict(
+            datetime(2026, 1, 1),
+            datetime(2026, 1, 2),
+            datetime(2026, 1, 3),
+            datetime(2026, 1, 4),
+        )
+    )
+
+    archived = board.archive_done(before=datetime(2026, 1, 4))
+
+    assert [dict_task["id"] for dict_task in archived] == [2]
+    assert [task.id for task in board.tasks] == [1, 3, 4]
+
+
+def lazy_board():
+    dict_tasks = [
+        dict(Task(f"my task {task_id}").to_dict(), id=task_id)
+        for task_id in range(1, 5)
+    ]
+    tasks = SegmentedTasks([(2, lambda: dict_tasks[:2]), (2, lambda: dict_tasks[2:])])
+    board = Board.from_dict(
+        {"version": 3, "name": "personal", "next_id": 5, "tasks": tasks}, lazy=True
+    )
+    return board, tasks
+
+
+def test_lazy_board_must_only_load_the_segments_accessed_by_position():
+    board, tasks = lazy_board()
+
+    assert board.count_tasks == 4
+    assert board.retrieve_task(-1).description == "my task 4"
+    assert "my task 4" in "".join(board.iter_list_tasks(start=2))
+    assert tasks.loaded == 1
+
+
+def test_lazy_board_must_load_every_segment_for_operations_by_id():
+    board, tasks = lazy_board()
+
+    board.retrieve_task(0).status = "done"
+    board.remove_task_by_id(3)
+    board.add(Task("my task 5"))
+
+    assert tasks.loaded == 2
+    assert [task.id for task in board.tasks] == [1, 2, 4, 5]
+    assert board.pop_changes()[0] == {
+        "op": "update",
+        "id": 1,
+        "status": True,
+        "previous": False,
+    }
@@ -0,0 +1,88 @@
+from datetime import datetime
+from datetime import timezone
+
+import pytest
+
+from whattodo.api.query import QueryIndex
+from whattodo.api.query import parse_order
+from whattodo.api.query import parse_status
+from whattodo.api.query import to_epoch_microseconds
+
+
+@pytest.fixture(scope="function")
+def query_index():
+    return QueryIndex.build(
+        [(1, 300, False), (2, 100, True), (3, 200, False), (4, 200, True)]
+    )
+
+
+@pytest.mark.smoke
+@pytest.mark.parametrize(
+    "order, expected",
+    [
+        ("id", ("id", False)),
+        ("created_at", ("created_at", False)),
+        ("created_at asc", ("created_at", False)),
+        ("created_at desc", ("created_at", True)),
+    ],
+)
+def test_parse_order(order, expected):
+    assert parse_order(order) == expected
+
+
+@pytest.mark.parametrize("order", ["status", "id down", "created_at desc asc"])
+def test_parse_order_must_raise_value_error_given_an_invalid_order(order):
+    with pytest.raises(ValueError):
+        parse_order(order)
+
+
+def test_parse_status_must_raise_value_error_given_an_invalid_status():
+    assert parse_status("done") is True
+    with pytest.raises(ValueError):
+        parse_status("finished")
+
+
+def test_to_epoch_microseconds_must_convert_dates_with_a_timezone():
+    moment = datetime(2020, 12, 26, tzinfo=timezone.utc)
+
+    assert to_epoch_microseconds(moment) == 1608940800000000
+    assert to_epoch_microseconds(moment.replace(tzinfo=None)) == 1608940800000000
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({}, [1, 2, 3, 4]),
+        ({"descending": True}, [4, 3, 2, 1]),
+        ({"order": "created_at"}, [2, 3, 4, 1]),
+        ({"order": "created_at", "descending": True}, [1, 4, 3, 2]),
+        ({"status": True}, [2, 4]),
+        ({"since": 200}, [1, 3, 4]),
+        ({"until": 200}, [2]),
+        ({"since": 150, "until": 300, "order": "created_at"}, [3, 4]),
+        ({"status": False, "since": 200, "order": "created_at"}, [3, 1]),
+        ({"status": True, "until": 150, "order": "created_at"}, [2]),
+        ({"since": 400}, []),
+    ],
+)
+def test_select(query_index, filters, expected):
+    assert query_index.select(**filters) == expected
+
+
+def test_select_must_follow_added_removed_and_updated_tasks(query_index):
+    query_index.add(5, 150, False)
+    query_index.remove(4)
+    query_index.update(1, True)
+
+    assert query_index.select(order="created_at") == [2, 5, 3, 1]
+    assert query_index.select(status=True) == [1, 2]
+    assert query_index.select(status=False, order="created_at") == [5, 3]
+    assert len(query_index) == 4
+
+
+def test_remove_many_must_drop_every_given_task(query_index):
+    query_index.remove_many({1, 3})
+
+    assert query_index.select(order="created_at") == [2, 4]
+    assert query_index.select(status=False) == []
+    assert len(query_index) == 2
@@ -0,0 +1,55 @@
+import pytest
+
+from tests.conftest import make_task_dict
+from whattodo.api.segmented import SegmentedTasks
+
+
+@pytest.fixture(scope="function")
+def segmented_tasks():
+    dict_tasks = [
+        make_task_dict(f"task {task_id}", task_id=task_id) for task_id in range(1, 6)
+    ]
+    return SegmentedTasks(
+        [
+            (2, lambda: dict_tasks[0:2]),
+            (2, lambda: dict_tasks[2:4]),
+            (1, lambda: dict_tasks[4:5]),
+        ]
+    )
+
+
+def test_segmented_tasks_must_not_load_segments_until_accessed(segmented_tasks):
+    assert len(segmented_tasks) == 5
+    assert segmented_tasks.loaded == 0
+
+
+@pytest.mark.parametrize("index, task_id", [(0, 1), (3, 4), (4, 5), (-1, 5), (-5, 1)])
+def test_segmented_tasks_must_only_load_the_segment_accessed(
+    segmented_tasks, index, task_id
+):
+    assert segmented_tasks[index].id == task_id
+    assert segmented_tasks.loaded == 1
+
+
+@pytest.mark.parametrize("index", [5, -6])
+def test_segmented_tasks_must_raise_index_error_out_of_range(segmented_tasks, index):
+    with pytest.raises(IndexError):
+        segmented_tasks[index]
+
+
+@pytest.mark.parametrize(
+    "start, stop, expected, loaded",
+    [
+        (0, None, [1, 2, 3, 4, 5], 3),
+        (1, 3, [2, 3], 2),
+        (2, 4, [3, 4], 1),
+        (5, 9, [], 0),
+    ],
+)
+def test_iter_range_must_only_load_the_segments_of_the_range(
+    segmented_tasks, start, stop, expected, loaded
+):
+    tasks = list(segmented_tasks.iter_range(start, stop))
+
+    assert [task.id for task in tasks] == expected
+    assert segmented_tasks.loaded == loaded
@@ -1,3 +1,5 @@
+import time
+
 from datetime import datetime
 from typing import Tuple
 
@@ -6,6 +8,9 @@ import pytest
 from freezegun.api import freeze_time
 
 from whattodo.api.task import Task
+from whattodo.api.task import decode_created_at
+from whattodo.api.task import encode_created_at
+from whattodo.api.task import upgrade_task_dict
 
 
 @pytest.mark.smoke
@@ -104,11 +109,78 @@ def test_from_dict():
 
 def test_to_dict():
     task_dict = {
+        "id": None,
         "description": "my first task",
         "status": False,
-        "created_at": "2020-12-26 00:00:00",
+        "created_at": 1608940800000000,
+        "utc_offset": 0,
     }
 
     with freeze_time("2020-12-26 00:00:00"):
         task = Task(description="my first task")
         assert task.to_dict() == task_dict
+
+
+def test_from_dict_must_decode_epoch_microseconds():
+    task_dict = {
+        "id": 7,
+        "description": "my first task",
+        "status": True,
+        "created_at": 1608951600000000,
+        "utc_offset": -10800,
+    }
+
+    task = Task.from_dict(dict_task=task_dict)
+
+    assert task.created_at == "2020-12-26 00:00:00"
+    assert task.id == 7
+    assert task.to_dict() == task_dict
+
+
+def test_created_at_must_be_cached():
+    task = Task.from_dict(
+        {"description": "task", "status": False, "created_at": 0, "utc_offset": 0}
+    )
+
+    assert task.created_at is task.created_at
+    assert task.created_at == "1970-01-01 00:00:00"
+
+
+def test_to_dict_must_use_the_local_utc_offset(monkeypatch):
+    monkeypatch.setenv("TZ", "America/Sao_Paulo")
+    time.tzset()
+    task = Task.from_dict(
+        {"description": "task", "status": False, "created_at": "2020-12-26 00:00:00"}
+    )
+
+    assert task.to_dict()["utc_offset"] == -10800
+    assert task.to_dict()["created_at"] == 1608951600000000
+
+
+@pytest.mark.parametrize(
+    "created_at, utc_offset",
+    [(datetime(2020, 12, 26, 15, 13, 45, 123456), 3600), (datetime(1969, 7, 20), 0)],
+)
+def test_created_at_codec_must_round_trip(created_at, utc_offset):
+    encoded = encode_created_at(created_at, utc_offset)
+
+    assert encoded[1] == utc_offset
+    assert decode_created_at(*encoded) == created_at
+
+
+def test_upgrade_task_dict():
+    legacy_task = {
+        "description": "task",
+        "status": True,
+        "created_at": "2020-12-26 00:00:00",
+    }
+    task_dict = {
+        "id": None,
+        "description": "task",
+        "status": True,
+        "created_at": 1608940800000000,
+        "utc_offset": 0,
+    }
+
+    assert upgrade_task_dict(legacy_task) == task_dict
+    assert upgrade_task_dict(task_dict) is task_dict
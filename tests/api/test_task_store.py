@@ -0,0 +1,170 @@
+import pytest
+
+from freezegun.api import freeze_time
+
+from tests.conftest import make_task_dict
+from whattodo.api.task import Task
+from whattodo.api.task_store import TaskStore
+from whattodo.api.task_store import TaskView
+
+
+@pytest.mark.smoke
+def test_task_must_not_have_an_instance_dict(make_task):
+    task, _ = make_task
+
+    assert not hasattr(task, "__dict__")
+    with pytest.raises(AttributeError):
+        task.unexpected_attribute = True
+
+
+def test_from_dicts_must_round_trip_tasks():
+    dict_tasks = [
+        make_task_dict(
+            "first", created_at=-14182940000000, task_id=3, utc_offset=-10800
+        ),
+        make_task_dict("sëcond ✘", status=True),
+    ]
+
+    store = TaskStore.from_dicts(dict_tasks)
+
+    assert len(store) == 2
+    assert [task.to_dict() for task in store] == dict_tasks
+
+
+def test_from_dicts_must_upgrade_version_1_tasks():
+    legacy_task = {
+        "description": "first",
+        "status": True,
+        "created_at": "2020-12-26 00:00:00",
+    }
+
+    store = TaskStore.from_dicts([legacy_task])
+
+    assert store[0].created_at == "2020-12-26 00:00:00"
+    assert store[0].to_dict()["created_at"] == 1608940800000000
+
+
+def test_append_must_copy_the_task():
+    with freeze_time("2020-12-26 00:00:00"):
+        task = Task("my first task")
+    task.status = "done"
+    store = TaskStore()
+
+    store.append(task)
+
+    assert isinstance(store[0], TaskView)
+    assert store[0].to_dict() == task.to_dict()
+    assert str(store[0]) == str(task)
+    assert repr(store[0]) == repr(task)
+
+
+@pytest.mark.parametrize(
+    "param_value, expected_status",
+    [("done", "ކ"), ("banana", "✘"), ("not done", "✘")],
+)
+def test_view_status_must_follow_task_status_rules(param_value, expected_status):
+    store = TaskStore.from_dicts([make_task_dict("first")])
+
+    store[0].status = param_value
+
+    assert store[0].status == expected_status
+
+
+def test_view_description_can_be_updated():
+    store = TaskStore.from_dicts([make_task_dict("first"), make_task_dict("second")])
+
+    store[0].description = "my new description"
+
+    assert store[0].description == "my new description"
+    assert store[1].description == "second"
+
+
+def test_statuses_must_be_kept_per_task_across_bytes():
+    dict_tasks = [make_task_dict(str(number), number % 3 == 0) for number in range(20)]
+
+    store = TaskStore.from_dicts(dict_tasks)
+
+    assert [task.to_dict()["status"] for task in store] == [
+        number % 3 == 0 for number in range(20)
+    ]
+
+
+def test_pop_must_shift_the_remaining_tasks():
+    dict_tasks = [
+        make_task_dict(str(number), number % 3 == 0, task_id=number + 1)
+        for number in range(20)
+    ]
+    store = TaskStore.from_dicts(dict_tasks)
+
+    removed = store.pop(3)
+    store.pop(-1)
+
+    assert isinstance(removed, Task)
+    assert removed.to_dict() == dict_tasks[3]
+    assert [task.to_dict() for task in store] == dict_tasks[:3] + dict_tasks[4:19]
+    store.append(Task("appended"))
+    assert store[-1].description == "appended"
+    assert store[-1].status == "✘"
+
+
+def test_pop_must_raise_index_error_given_invalid_index():
+    store = TaskStore.from_dicts([make_task_dict("first")])
+
+    with pytest.raises(IndexError):
+        store.pop(1)
+
+
+def test_pop_must_compact_the_description_buffer():
+    store = TaskStore.from_dicts(
+        [make_task_dict("x" * 1000 + str(number)) for number in range(10)]
+    )
+
+    for _ in range(8):
+        store.pop(0)
+
+    assert len(store._descriptions) == 2 * 1001
+    assert [task.description for task in store] == ["x" * 1000 + "8", "x" * 1000 + "9"]
+
+
+def test_discard_must_remove_the_tasks_at_the_given_indexes():
+    dict_tasks = [
+        make_task_dict(str(number), number % 3 == 0, task_id=number + 1)
+        for number in range(20)
+    ]
+    store = TaskStore.from_dicts(dict_tasks)
+
+    store.discard({0, 5, 6, 19})
+
+    assert [task.to_dict() for task in store] == [
+        dict_task
+        for number, dict_task in enumerate(dict_tasks)
+        if number not in (0, 5, 6, 19)
+    ]
+    assert len(store._descriptions) == sum(len(task.description) for task in store)
+
+
+def test_clear_must_remove_all_tasks():
+    store = TaskStore.from_dicts([make_task_dict("first")])
+
+    store.clear()
+
+    assert len(store) == 0
+    assert list(store) == []
+
+
+def test_from_columns_must_join_the_stores_in_order():
+    first = TaskStore.from_dicts(
+        [
+            make_task_dict(f"task {number}", number % 2 == 0, task_id=number)
+            for number in range(1, 10)
+        ]
+    )
+    first[0].description = "renamed task"
+    last = TaskStore.from_dicts([make_task_dict("último", True, task_id=10)])
+
+    store = TaskStore.from_columns([first.to_columns(), last.to_columns()])
+
+    assert [task.to_dict() for task in store] == [
+        *(task.to_dict() for task in first),
+        last[0].to_dict(),
+    ]
@@ -0,0 +1,96 @@
+import asyncio
+import socket
+import threading
+import time
+
+from contextlib import suppress
+
+import pytest
+
+from whattodo import file_storage
+from whattodo.client import SOCKET_FILE
+from whattodo.daemon import BoardDaemon
+from whattodo.file_storage import store_to_json
+
+
+def make_task_dict(
+    description, status=False, task_id=None, created_at=1608940800000000, utc_offset=0
+):
+    return {
+        "id": task_id,
+        "description": description,
+        "status": status,
+        "created_at": created_at,
+        "utc_offset": utc_offset,
+    }
+
+
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def utc_timezone(monkeypatch):
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def start_daemon():
+    """
+    Starts a board daemon on a background event loop, loading
+    whatever board is stored when called, and stops it at teardown.
+    """
+    loop = asyncio.new_event_loop()
+    tasks = []
+    threads = []
+
+    def serve(board_daemon):
+        tasks.append(loop.create_task(board_daemon.serve()))
+        with suppress(asyncio.CancelledError):
+            loop.run_until_complete(tasks[0])
+
+    def start():
+        board_daemon = BoardDaemon()
+        thread = threading.Thread(target=serve, args=(board_daemon,))
+        thread.start()
+        threads.append(thread)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with socket.socket(socket.AF_UNIX) as client:
+                # The socket file shows up before the daemon listens.
+                if client.connect_ex(SOCKET_FILE) == 0:
+                    break
+            time.sleep(0.001)
+        return board_daemon
+
+    yield start
+    for thread in threads:
+        loop.call_soon_threadsafe(tasks[0].cancel)
+        thread.join()
+    loop.close()
+
+
+@pytest.fixture(scope="function")
+def segmented_board(monkeypatch):
+    """
+    Stores a board of 7 tasks, every even one done, split in
+    segments of 3 tasks.
+    """
+    monkeypatch.setattr(file_storage, "SEGMENT_SIZE", 3)
+    data = {
+        "version": 3,
+        "name": "personal",
+        "next_id": 8,
+        "tasks": [
+            make_task_dict(f"task número {task_id}", task_id % 2 == 0, task_id)
+            for task_id in range(1, 8)
+        ],
+    }
+    store_to_json(data)
+    return data
@@ -0,0 +1,79 @@
+import gzip
+import os
+
+import pytest
+
+from tests.conftest import make_task_dict
+from whattodo.archive import archive_directory
+from whattodo.archive import count_archived_tasks
+from whattodo.archive import iter_archived_tasks
+from whattodo.archive import read_summaries
+from whattodo.archive import write_segment
+
+
+@pytest.fixture(scope="function")
+def archived_segments():
+    write_segment(
+        [make_task_dict("task 1", True, 1, 100), make_task_dict("task 2", True, 2, 200)]
+    )
+    write_segment(
+        [make_task_dict("task 5", True, 5, 500), make_task_dict("task 4", True, 4, 400)]
+    )
+
+
+@pytest.mark.smoke
+def test_write_segment_must_summarize_the_segment(archived_segments):
+    assert read_summaries() == [
+        {"file": "segment-000001.jsonl.gz", "count": 2, "since": 100, "until": 200},
+        {"file": "segment-000002.jsonl.gz", "count": 2, "since": 400, "until": 500},
+    ]
+    assert count_archived_tasks() == 4
+
+
+def test_write_segment_must_compress_the_segment(archived_segments):
+    segment_path = os.path.join(archive_directory(), "segment-000001.jsonl.gz")
+
+    with gzip.open(segment_path, "rt", encoding="utf-8") as segment_file:
+        assert len(segment_file.readlines()) == 2
+
+
+def test_write_segment_must_skip_an_empty_archive():
+    assert write_segment([]) is None
+    assert not os.path.exists(archive_directory())
+
+
+@pytest.mark.parametrize(
+    "since, until, expected",
+    [
+        (None, None, [1, 2, 5, 4]),
+        (150, None, [2, 5, 4]),
+        (None, 450, [1, 2, 4]),
+        (300, 450, [4]),
+        (600, None, []),
+    ],
+)
+def test_iter_archived_tasks(archived_segments, since, until, expected):
+    result = iter_archived_tasks(since=since, until=until)
+
+    assert [dict_task["id"] for dict_task in result] == expected
+
+
+def test_iter_archived_tasks_must_skip_segments_out_of_the_range(archived_segments):
+    os.remove(os.path.join(archive_directory(), "segment-000001.jsonl.gz"))
+
+    result = iter_archived_tasks(since=300)
+
+    assert [dict_task["id"] for dict_task in result] == [5, 4]
+
+
+def test_archive_must_be_kept_per_board():
+    os.makedirs("whattodo_boards")
+    write_segment(
+        [make_task_dict("task 1", True, 1, 100)], path="whattodo_boards/work.json"
+    )
+
+    assert (
+        archive_directory("whattodo_boards/work.json") == "whattodo_boards/work.archive"
+    )
+    assert count_archived_tasks("whattodo_boards/work.json") == 1
+    assert count_archived_tasks() == 0
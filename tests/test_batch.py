@@ -0,0 +1,159 @@
+import pytest
+
+from whattodo.api.board import Board
+from whattodo.api.task import Task
+from whattodo.batch import apply_operation
+from whattodo.batch import apply_record
+from whattodo.batch import parse_operation
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ('task:add "my first task"', ["task:add", "my first task"]),
+        ("task:update not done 3\n", ["task:update", "not", "done", "3"]),
+        ("   \n", None),
+        ("# a comment", None),
+    ],
+)
+def test_parse_operation(line, expected):
+    assert parse_operation(line) == expected
+
+
+def test_apply_operation_must_add_tasks():
+    board = Board(name="personal")
+
+    apply_operation(board, ["task:add", "my", "first", "task"])
+
+    assert board.retrieve_task(0).description == "my first task"
+
+
+@pytest.mark.parametrize(
+    "status, expected_status", [(["done"], "ކ"), (["not", "done"], "✘")]
+)
+def test_apply_operation_must_update_tasks(status, expected_status):
+    board = Board(name="personal")
+    board.add(Task("my first task"))
+    board.retrieve_task(0).status = "done" if expected_status == "✘" else "not done"
+
+    apply_operation(board, ["task:update", *status, "1"])
+
+    assert board.retrieve_task(0).status == expected_status
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [["task:remove", "1"], ["task:remove", "--position", "0"]],
+)
+def test_apply_operation_must_remove_tasks(arguments):
+    board = Board(name="personal")
+    board.add(Task("my first task"))
+    board.add(Task("my second task"))
+
+    apply_operation(board, arguments)
+
+    assert [task.description for task in board.tasks] == ["my second task"]
+
+
+def test_apply_operation_must_update_tasks_by_position():
+    board = Board(name="personal")
+    board.add(Task("my first task"))
+    board.add(Task("my second task"))
+    board.remove_task_by_id(1)
+
+    apply_operation(board, ["task:update", "--position", "done", "0"])
+
+    assert board.retrieve_task_by_id(2).status == "ކ"
+
+
+@pytest.mark.parametrize(
+    "arguments, expected",
+    [
+        (["task:remove", "1", "3-4"], [2, 5]),
+        (["task:remove", "2-9"], [1]),
+        (["task:remove", "--position", "0-1", "4"], [3, 4]),
+        (["task:remove", "--done"], [1, 3, 5]),
+    ],
+)
+def test_apply_operation_must_remove_many_tasks(arguments, expected):
+    board = Board(name="personal")
+    for number in range(1, 6):
+        board.add(Task(f"task {number}"))
+    board.update_status_many([2, 4], "done")
+
+    apply_operation(board, arguments)
+
+    assert [task.id for task in board.tasks] == expected
+
+
+def test_apply_operation_must_update_many_tasks():
+    board = Board(name="personal")
+    for number in range(1, 6):
+        board.add(Task(f"task {number}"))
+
+    apply_operation(board, ["task:update", "done", "1", "3-9"])
+    apply_operation(board, ["task:update", "not", "done", "4"])
+
+    assert [task.status for task in board.tasks] == ["ކ", "✘", "ކ", "✘", "ކ"]
+
+
+def test_apply_operation_must_clean_the_board():
+    board = Board(name="personal")
+    board.add(Task("my first task"))
+
+    apply_operation(board, ["board:clean"])
+
+    assert board.count_tasks == 0
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        ["task:add"],
+        ["task:update", "done"],
+        ["task:update", "done", "first"],
+        ["task:remove"],
+        ["task:remove", "--done", "1"],
+        ["task:update", "finished", "1"],
+        ["board:clean", "now"],
+        ["board:add", "work"],
+    ],
+)
+def test_apply_operation_must_raise_value_error_given_invalid_operation(arguments):
+    board = Board(name="personal")
+    board.add(Task("my first task"))
+
+    with pytest.raises(ValueError):
+        apply_operation(board, arguments)
+
+
+def test_apply_operation_must_raise_index_error_given_invalid_index():
+    board = Board(name="personal")
+    board.add(Task("my first task"))
+
+    with pytest.raises(IndexError):
+        apply_operation(board, ["task:remove", "3"])
+
+
+@pytest.mark.parametrize(
+    "record, expected_tasks",
+    [
+        (
+            {"op": "add", "task": Task("third").to_dict()},
+            ["first ✘", "second ✘", "third ✘"],
+        ),
+        ({"op": "update", "id": 2, "status": True}, ["first ✘", "second ކ"]),
+        ({"op": "update", "index": 1, "status": True}, ["first ✘", "second ކ"]),
+        ({"op": "remove", "id": 1}, ["second ✘"]),
+        ({"op": "remove", "index": 0}, ["second ✘"]),
+        ({"op": "clean"}, []),
+    ],
+)
+def test_apply_record_must_change_the_board(record, expected_tasks):
+    board = Board(name="personal")
+    board.add(Task("first"))
+    board.add(Task("second"))
+
+    apply_record(board, record)
+
+    assert [str(task) for task in board.tasks] == expected_tasks
@@ -0,0 +1,156 @@
+import os
+
+import pytest
+
+from tests.conftest import make_task_dict
+from whattodo import binary_storage
+from whattodo.binary_storage import BINARY_FILE
+from whattodo.binary_storage import HEADER
+from whattodo.binary_storage import RECORD
+from whattodo.binary_storage import convert_from_json
+from whattodo.binary_storage import convert_to_json
+from whattodo.binary_storage import count_tasks
+from whattodo.binary_storage import iter_tasks
+from whattodo.binary_storage import read_from_binary
+from whattodo.binary_storage import store_to_binary
+from whattodo.file_storage import append_to_journal
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import store_to_json
+
+
+@pytest.fixture(scope="function")
+def binary_board():
+    data = {
+        "version": 3,
+        "name": "pessoal",
+        "next_id": 7,
+        "tasks": [
+            make_task_dict(
+                f"tarefa número {task_id}",
+                task_id % 3 == 0,
+                task_id,
+                utc_offset=-10800,
+            )
+            for task_id in range(1, 7)
+        ],
+    }
+    store_to_binary(data)
+    return data
+
+
+@pytest.mark.smoke
+def test_read_from_binary_must_read_the_stored_board(binary_board):
+    assert read_from_binary() == binary_board
+
+
+def test_store_to_binary_must_write_fixed_width_records_before_the_heap(
+    binary_board,
+):
+    heap_size = sum(len(task["description"].encode()) for task in binary_board["tasks"])
+
+    assert os.path.getsize(BINARY_FILE) == (
+        HEADER.size + len("pessoal") + 6 * RECORD.size + heap_size
+    )
+
+
+def test_store_to_binary_must_upgrade_older_boards():
+    store_to_binary(
+        {
+            "name": "personal",
+            "tasks": [
+                {
+                    "description": "my first task",
+                    "status": True,
+                    "created_at": "2020-12-26 00:00:00",
+                }
+            ],
+        }
+    )
+
+    data = read_from_binary()
+
+    assert data["next_id"] == 2
+    assert data["tasks"][0]["id"] == 1
+    assert isinstance(data["tasks"][0]["created_at"], int)
+
+
+@pytest.mark.parametrize("status, expected", [(None, 6), ("done", 2), ("not done", 4)])
+def test_count_tasks_must_count_the_tasks_with_the_status(
+    binary_board, status, expected
+):
+    assert count_tasks(status) == expected
+
+
+@pytest.mark.parametrize(
+    "start, stop, status, expected",
+    [
+        (0, None, None, [1, 2, 3, 4, 5, 6]),
+        (2, 4, None, [3, 4]),
+        (5, 9, None, [6]),
+        (0, None, "done", [3, 6]),
+        (1, 3, "not done", [2, 4]),
+    ],
+)
+def test_iter_tasks_must_stream_the_requested_window(
+    binary_board, start, stop, status, expected
+):
+    tasks = list(iter_tasks(start, stop, status))
+
+    assert [task["id"] for task in tasks] == expected
+    assert tasks == [binary_board["tasks"][task_id - 1] for task_id in expected]
+
+
+@pytest.mark.parametrize("start, expected", [(0, [1, 2, 4, 5]), (2, [4, 5]), (3, [5])])
+def test_iter_tasks_must_skip_whole_chunks_of_statuses(
+    binary_board, monkeypatch, start, expected
+):
+    monkeypatch.setattr(binary_storage, "STATUS_CHUNK", 2)
+
+    tasks = iter_tasks(start, status="not done")
+
+    assert [task["id"] for task in tasks] == expected
+
+
+def test_iter_tasks_must_only_decode_the_returned_descriptions(
+    binary_board, monkeypatch
+):
+    decoded = []
+    decode_tasks = binary_storage._decode_tasks
+
+    def spy(view, table, count, positions):
+        positions = list(positions)
+        decoded.extend(positions)
+        return decode_tasks(view, table, count, positions)
+
+    monkeypatch.setattr(binary_storage, "_decode_tasks", spy)
+
+    list(iter_tasks(1, 2, "not done"))
+
+    assert decoded == [1]
+
+
+def test_binary_storage_must_read_nothing_when_no_board_is_stored():
+    assert read_from_binary() is None
+    assert count_tasks() == 0
+    assert list(iter_tasks()) == []
+
+
+def test_binary_storage_must_raise_value_error_given_another_file():
+    with open(BINARY_FILE, "wb") as binary_file:
+        binary_file.write(b"{}")
+
+    with pytest.raises(ValueError):
+        read_from_binary()
+
+
+def test_convert_must_round_trip_the_json_board(binary_board):
+    store_to_json(binary_board)
+    append_to_journal({"op": "remove", "id": 2})
+    expected = read_from_json()
+    os.remove(BINARY_FILE)
+
+    assert convert_from_json() == 5
+    os.remove("whattodo_data.json")
+    assert convert_to_json() == 5
+
+    assert read_from_json() == expected
@@ -0,0 +1,73 @@
+import os
+import threading
+
+import pytest
+
+from whattodo.catalog import BOARDS_DIRECTORY
+from whattodo.catalog import active_board_file
+from whattodo.catalog import read_catalog
+from whattodo.catalog import register_board
+from whattodo.catalog import switch_board
+from whattodo.file_storage import DATA_FILE
+from whattodo.file_storage import store_to_json
+
+
+def test_read_catalog_must_be_empty_when_no_board_is_stored():
+    assert read_catalog() == {"active": None, "boards": {}}
+    assert active_board_file() == DATA_FILE
+
+
+def test_read_catalog_must_hold_a_board_stored_without_catalog():
+    store_to_json(data={"version": 2, "name": "personal", "tasks": []})
+
+    assert read_catalog() == {"active": "personal", "boards": {"personal": DATA_FILE}}
+
+
+def test_register_board_must_keep_the_first_board_on_the_default_file():
+    assert register_board("personal") == DATA_FILE
+    assert register_board("work") == os.path.join(BOARDS_DIRECTORY, "work.json")
+    assert register_board("personal") == DATA_FILE
+
+    assert read_catalog() == {
+        "active": "personal",
+        "boards": {
+            "personal": DATA_FILE,
+            "work": os.path.join(BOARDS_DIRECTORY, "work.json"),
+        },
+    }
+
+
+def test_register_board_must_give_unique_files_to_similar_names():
+    register_board("personal")
+
+    assert register_board("my/work") == os.path.join(BOARDS_DIRECTORY, "my_work.json")
+    assert register_board("my work") == os.path.join(BOARDS_DIRECTORY, "my_work-2.json")
+
+
+def test_switch_board_must_change_the_active_board():
+    register_board("personal")
+    register_board("work")
+
+    assert switch_board("personal") == DATA_FILE
+    assert active_board_file() == DATA_FILE
+
+
+def test_switch_board_must_raise_value_error_given_an_unknown_board():
+    register_board("personal")
+
+    with pytest.raises(ValueError):
+        switch_board("work")
+
+
+def test_register_board_must_not_lose_concurrent_boards():
+    register_board("personal")
+    names = [f"board {number}" for number in range(20)]
+    threads = [threading.Thread(target=register_board, args=(name,)) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    boards = read_catalog()["boards"]
+    assert set(boards) == {"personal", *names}
+    assert len(set(boards.values())) == 21
@@ -1,3 +1,6 @@
+import json
+import os
+
 from unittest.mock import patch
 
 import pytest
@@ -5,8 +8,17 @@ import pytest
 from freezegun.api import freeze_time
 from typer.testing import CliRunner
 
+from whattodo import binary_storage
+from whattodo import sqlite_storage
 from whattodo.api.board import Board
+from whattodo.api.task import Task
 from whattodo.cli import app
+from whattodo.client import SOCKET_FILE
+from whattodo.file_storage import DATA_FILE
+from whattodo.file_storage import append_records
+from whattodo.file_storage import append_to_journal
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import store_to_json
 
 
 @pytest.mark.smoke
@@ -28,21 +40,27 @@ def test_add_board_cli_command(mocked_store_to_json):
 
     assert result.exit_code == 0
     assert board_name in result.output
-    mocked_store_to_json.assert_called_once_with(data={"name": board_name, "tasks": []})
+    mocked_store_to_json.assert_called_once_with(
+        data={"version": 3, "name": board_name, "next_id": 1, "tasks": []},
+        path=DATA_FILE,
+    )
 
 
-@patch("whattodo.cli.read_from_json")
-def test_list_board_tasks_cli_command(mocked_read_from_json):
+@patch("whattodo.cli.read_header")
+@patch("whattodo.cli.iter_tasks_from_json")
+def test_list_board_tasks_cli_command(mocked_iter_tasks_from_json, mocked_read_header):
     runner = CliRunner()
     board_dict = {
         "name": "personal",
         "tasks": [
             {
+                "id": 1,
                 "description": "my first task",
                 "status": False,
                 "created_at": "2020-12-26 15:13:45",
             },
             {
+                "id": 2,
                 "description": "my second task",
                 "status": False,
                 "created_at": "2020-12-26 15:13:56",
@@ -50,7 +68,8 @@ def test_list_board_tasks_cli_command(mocked_read_from_json):
         ],
     }
     task_list = Board.from_dict(board_dict).list_tasks
-    mocked_read_from_json.return_value = board_dict
+    mocked_iter_tasks_from_json.return_value = iter(board_dict["tasks"])
+    mocked_read_header.return_value = {"name": "personal", "count": 2, "ordered": True}
 
     result = runner.invoke(app, ["board:list"])
 
@@ -58,31 +77,94 @@ def test_list_board_tasks_cli_command(mocked_read_from_json):
     assert result.output == task_list + "\n"
 
 
-@patch("whattodo.cli.read_from_json")
-def test_count_board_tasks_cli_command(mocked_read_from_json):
+def test_list_board_tasks_cli_command_must_render_an_empty_board():
     runner = CliRunner()
-    board_dict = {
+    runner.invoke(app, ["board:add", "personal"])
+
+    result = runner.invoke(app, ["board:list"])
+
+    assert result.exit_code == 0
+    assert result.output == Board(name="personal").list_tasks + "\n"
+
+
+@pytest.mark.parametrize("options", [[], ["--backend", "sqlite"]])
+def test_list_board_tasks_cli_command_must_write_machine_readable_formats(options):
+    runner = CliRunner()
+    runner.invoke(app, [*options, "board:add", "personal"])
+    runner.invoke(app, [*options, "task:add", "my first task"])
+    runner.invoke(app, [*options, "task:add", "my, second task"])
+    runner.invoke(app, [*options, "task:update", "done", "2"])
+    listing = [*options, "board:list", "--format"]
+
+    document = runner.invoke(app, [*listing, "json"])
+    lines = runner.invoke(app, [*listing, "ndjson", "--status", "done"])
+    rows = runner.invoke(app, [*listing, "csv", "--limit", "1"])
+    table = runner.invoke(app, [*listing, "table"])
+
+    assert json.loads(document.output)["name"] == "personal"
+    assert [task["id"] for task in json.loads(document.output)["tasks"]] == [1, 2]
+    assert [json.loads(line)["description"] for line in lines.output.splitlines()] == [
+        "my, second task"
+    ]
+    assert rows.output.splitlines()[1].startswith("1,my first task,false,")
+    assert table.output.splitlines()[1:3] == [
+        "ID  DESCRIPTION      STATUS    CREATED AT",
+        "--  ---------------  --------  -------------------",
+    ]
+
+
+@pytest.mark.parametrize("options", [[], ["--backend", "sqlite"]])
+def test_list_board_tasks_cli_command_must_list_by_id_after_replacing_tasks(options):
+    runner = CliRunner()
+    runner.invoke(app, [*options, "board:add", "personal"])
+    for number in range(3):
+        runner.invoke(app, [*options, "task:add", f"task {number}"])
+    lines = '{"id": 2, "description": "replaced"}\n'
+    runner.invoke(app, [*options, "import", "--on-conflict", "replace"], input=lines)
+
+    result = runner.invoke(app, [*options, "board:list", "--format", "ndjson"])
+
+    assert [json.loads(line)["id"] for line in result.output.splitlines()] == [1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "options, expected_tasks",
+    [
+        ([], ["task 0", "task 1", "task 2", "task 3", "task 4"]),
+        (["--limit", "2"], ["task 0", "task 1"]),
+        (["--page", "2", "--page-size", "2"], ["task 2", "task 3"]),
+        (["--page", "3", "--page-size", "2"], ["task 4"]),
+        (["--page", "2", "--page-size", "3", "--limit", "1"], ["task 3"]),
+    ],
+)
+def test_list_board_tasks_cli_command_must_paginate(options, expected_tasks):
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    for number in range(5):
+        runner.invoke(app, ["task:add", f"task {number}"])
+
+    result = runner.invoke(app, ["board:list", *options])
+
+    assert result.exit_code == 0
+    listed_tasks = [f"task {number}" for number in range(5)]
+    assert [
+        task for task in listed_tasks if f"{task} " in result.output
+    ] == expected_tasks
+
+
+@patch("whattodo.cli.read_header")
+def test_count_board_tasks_cli_command(mocked_read_header):
+    runner = CliRunner()
+    mocked_read_header.return_value = {
         "name": "personal",
-        "tasks": [
-            {
-                "description": "my first task",
-                "status": False,
-                "created_at": "2020-12-26 15:13:45",
-            },
-            {
-                "description": "my second task",
-                "status": False,
-                "created_at": "2020-12-26 15:13:56",
-            },
-        ],
+        "count": 2,
+        "statuses": {"done": 0, "not done": 2},
     }
-    count = Board.from_dict(board_dict).count_tasks
-    mocked_read_from_json.return_value = board_dict
 
     result = runner.invoke(app, ["board:count"])
 
     assert result.exit_code == 0
-    assert str(count) in result.output
+    assert "The board 'personal' currently have 2 tasks" in result.output
 
 
 @pytest.mark.parametrize(
@@ -93,12 +175,12 @@ def test_count_board_tasks_cli_command(mocked_read_from_json):
         (),
     ],
 )
-@patch("whattodo.cli.read_from_json")
+@patch("whattodo.cli.read_header")
 def test_count_board_cli_command_must_exit_early_when_no_tasks_in_board(
-    mocked_read_from_json, param_board
+    mocked_read_header, param_board
 ):
     runner = CliRunner()
-    mocked_read_from_json.return_value = param_board
+    mocked_read_header.return_value = param_board
 
     result = runner.invoke(app, ["board:count"])
 
@@ -106,70 +188,53 @@ def test_count_board_cli_command_must_exit_early_when_no_tasks_in_board(
     assert "There are no created boards yet!" in result.output
 
 
-@patch("whattodo.cli.store_to_json")
-@patch("whattodo.cli.read_from_json")
-def test_add_task_cli_command(mocked_read_from_json, mocked_store_to_json):
+@patch("whattodo.cli.append_records")
+@patch("whattodo.cli.has_stored_board")
+def test_add_task_cli_command(mocked_has_stored_board, mocked_append_records):
     with freeze_time("2020-12-26 00:00:00"):
         runner = CliRunner()
         task_description = "my added task"
-        board_dict = {
-            "name": "personal",
-            "tasks": [
-                {
-                    "description": "my first task",
-                    "status": False,
-                    "created_at": "2020-12-26 15:13:45",
-                },
-                {
-                    "description": "my second task",
-                    "status": False,
-                    "created_at": "2020-12-26 15:13:56",
-                },
-            ],
-        }
-        expected_board_dict = {
-            "name": "personal",
-            "tasks": [
-                {
-                    "description": "my first task",
-                    "status": False,
-                    "created_at": "2020-12-26 15:13:45",
-                },
-                {
-                    "description": "my second task",
-                    "status": False,
-                    "created_at": "2020-12-26 15:13:56",
-                },
-                {
-                    "description": "my added task",
-                    "status": False,
-                    "created_at": "2020-12-26 00:00:00",
-                },
-            ],
+        expected_record = {
+            "op": "add",
+            "task": {
+                "id": None,
+                "description": "my added task",
+                "status": False,
+                "created_at": 1608940800000000,
+                "utc_offset": 0,
+            },
         }
-        mocked_read_from_json.return_value = board_dict
+        mocked_has_stored_board.return_value = True
 
         result = runner.invoke(app, ["task:add", task_description])
 
         assert result.exit_code == 0
         assert task_description in result.output
-        mocked_store_to_json.assert_called_once_with(expected_board_dict)
+        mocked_append_records.assert_called_once_with(
+            [expected_record], expected_revision=None, path=DATA_FILE
+        )
 
 
-@pytest.mark.parametrize(
-    "param_board",
-    [
-        ({}),
-        ([]),
-        (),
-    ],
-)
-@patch("whattodo.cli.read_from_json")
+@pytest.mark.parametrize("options", [[], ["--backend", "sqlite"]])
+def test_add_task_cli_command_must_print_the_id_given_to_the_task(options):
+    runner = CliRunner()
+    runner.invoke(app, [*options, "board:add", "personal"])
+    runner.invoke(app, [*options, "task:add", "my first task"])
+    runner.invoke(app, [*options, "task:remove", "1"], input="y\n")
+
+    result = runner.invoke(app, [*options, "task:add", "my second task"])
+
+    assert result.exit_code == 0
+    assert "The task 2 was added!" in result.output
+    assert runner.invoke(app, [*options, "task:update", "done", "2"]).exit_code == 0
+
+
+@patch("whattodo.cli.has_stored_board")
 def test_add_task_board_cli_command_must_exit_early_when_no_tasks_in_board(
-    mocked_read_from_json, param_board
+    mocked_has_stored_board,
 ):
     runner = CliRunner()
-    mocked_read_from_json.return_value = param_board
+    mocked_has_stored_board.return_value = False
 
     result = runner.invoke(app, ["task:add", "some task"])
 
@@ -198,9 +263,8 @@ def test_update_task_board_cli_command_must_exit_early_when_no_tasks_in_board(
     assert "There are no created boards yet!" in result.output
 
 
-@patch("whattodo.cli.store_to_json")
-@patch("whattodo.cli.read_from_json")
-def test_update_task_cli_command(mocked_read_from_json, mocked_store_to_json):
+@pytest.mark.parametrize("arguments", [["done", "2"], ["--position", "done", "1"]])
+def test_update_task_cli_command(arguments):
     runner = CliRunner()
     task_description = "my added task"
     board_dict = {
@@ -218,59 +282,40 @@ def test_update_task_cli_command(mocked_read_from_json, mocked_store_to_json):
             },
         ],
     }
-    expected_board_dict = {
-        "name": "personal",
-        "tasks": [
-            {
-                "description": "my first task",
-                "status": False,
-                "created_at": "2020-12-26 15:13:45",
-            },
-            {
-                "description": "my second task",
-                "status": True,
-                "created_at": "2020-12-26 15:13:56",
-            },
-        ],
-    }
-    mocked_read_from_json.return_value = board_dict
+    expected_record = {"op": "update", "id": 2, "status": True, "previous": False}
+    with open(DATA_FILE, "w", encoding="utf-8") as json_file:
+        json.dump(board_dict, json_file)
 
-    result = runner.invoke(app, ["task:update", "done", "1"])
+    with patch(
+        "whattodo.cli.append_records", wraps=append_records
+    ) as mocked_append_records:
+        result = runner.invoke(app, ["task:update", *arguments])
 
     assert result.exit_code == 0
     assert "done" in result.output
-    mocked_store_to_json.assert_called_once_with(expected_board_dict)
+    mocked_append_records.assert_called_once_with(
+        [expected_record], expected_revision=0, path=DATA_FILE
+    )
 
 
-@patch("whattodo.cli.store_to_json")
-@patch("whattodo.cli.read_from_json")
-def test_clean_board_cli_command(mocked_read_from_json, mocked_store_to_json):
+@patch("whattodo.cli.append_records")
+@patch("whattodo.cli.read_header")
+def test_clean_board_cli_command(mocked_read_header, mocked_append_records):
     runner = CliRunner()
-    board_dict = {
+    expected_record = {"op": "clean"}
+    mocked_read_header.return_value = {
         "name": "personal",
-        "tasks": [
-            {
-                "description": "my first task",
-                "status": False,
-                "created_at": "2020-12-26 15:13:45",
-            },
-            {
-                "description": "my second task",
-                "status": False,
-                "created_at": "2020-12-26 15:13:56",
-            },
-        ],
-    }
-    expected_board_dict = {
-        "name": "personal",
-        "tasks": [],
+        "count": 2,
+        "statuses": {"done": 0, "not done": 2},
     }
-    mocked_read_from_json.return_value = board_dict
 
     result = runner.invoke(app, ["board:clean"], input="y\n")
 
     assert result.exit_code == 0
-    mocked_store_to_json.assert_called_once_with(expected_board_dict)
+    assert "The board 'personal' was cleaned!" in result.output
+    mocked_append_records.assert_called_once_with(
+        [expected_record], expected_revision=None, path=DATA_FILE
+    )
 
 
 @pytest.mark.parametrize(
@@ -279,20 +324,20 @@ def test_clean_board_cli_command(mocked_read_from_json, mocked_store_to_json):
         (
             {
                 "name": "personal",
-                "tasks": [],
+                "count": 0,
+                "statuses": {"done": 0, "not done": 0},
             }
         ),
         ({}),
-        ([]),
-        (),
+        (None),
     ],
 )
-@patch("whattodo.cli.read_from_json")
+@patch("whattodo.cli.read_header")
 def test_clean_board_cli_command_must_exit_early_given_invalid_data(
-    mocked_read_from_json, param_board
+    mocked_read_header, param_board
 ):
     runner = CliRunner()
-    mocked_read_from_json.return_value = param_board
+    mocked_read_header.return_value = param_board
 
     result = runner.invoke(app, ["board:clean"])
 
@@ -300,9 +345,8 @@ def test_clean_board_cli_command_must_exit_early_given_invalid_data(
     assert "There are no created boards yet!" in result.output
 
 
-@patch("whattodo.cli.store_to_json")
-@patch("whattodo.cli.read_from_json")
-def test_remove_task_cli_command(mocked_read_from_json, mocked_store_to_json):
+@pytest.mark.parametrize("arguments", [["2"], ["--position", "1"]])
+def test_remove_task_cli_command(arguments):
     runner = CliRunner()
     board_dict = {
         "name": "personal",
@@ -319,19 +363,653 @@ def test_remove_task_cli_command(mocked_read_from_json, mocked_store_to_json):
             },
         ],
     }
-    expected_board_dict = {
-        "name": "personal",
-        "tasks": [
-            {
-                "description": "my first task",
-                "status": False,
-                "created_at": "2020-12-26 15:13:45",
-            },
-        ],
-    }
-    mocked_read_from_json.return_value = board_dict
+    expected_record = {"op": "remove", "id": 2, "status": False}
+    with open(DATA_FILE, "w", encoding="utf-8") as json_file:
+        json.dump(board_dict, json_file)
 
+    with patch(
+        "whattodo.cli.append_records", wraps=append_records
+    ) as mocked_append_records:
+        result = runner.invoke(app, ["task:remove", *arguments], input="y\n")
+
+    assert result.exit_code == 0
+    mocked_append_records.assert_called_once_with(
+        [expected_record], expected_revision=0, path=DATA_FILE
+    )
+
+
+def test_sqlite_backend_cli_commands():
+    runner = CliRunner()
+    options = ["--backend", "sqlite"]
+
+    runner.invoke(app, [*options, "board:add", "personal"])
+    runner.invoke(app, [*options, "task:add", "my first task"])
+    runner.invoke(app, [*options, "task:add", "my second task"])
+    runner.invoke(app, [*options, "task:update", "done", "2"])
+    runner.invoke(app, [*options, "task:remove", "1"], input="y\n")
+    result = runner.invoke(app, [*options, "board:count"])
+
+    assert result.exit_code == 0
+    assert "The board 'personal' currently have 1 tasks" in result.output
+    result = runner.invoke(app, [*options, "board:list"])
+    assert "my second task" in result.output
+    assert "my first task" not in result.output
+    assert not os.path.exists("whattodo_data.json")
+
+
+def test_task_commands_must_keep_addressing_tasks_by_id_after_removals():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    for description in ("first", "second", "third"):
+        runner.invoke(app, ["task:add", description])
+
+    runner.invoke(app, ["task:remove", "1"], input="y\n")
+    runner.invoke(app, ["task:update", "done", "3"])
     result = runner.invoke(app, ["task:remove", "1"], input="y\n")
 
+    assert result.exit_code == 1
+    assert "No tasks found with the id 1" in result.output
+    assert [
+        (task["id"], task["description"], task["status"])
+        for task in read_from_json()["tasks"]
+    ] == [(2, "second", False), (3, "third", True)]
+
+
+@pytest.mark.parametrize("options", [[], ["--backend", "sqlite"]])
+def test_search_board_cli_command(options):
+    runner = CliRunner()
+    runner.invoke(app, [*options, "board:add", "personal"])
+    for description in ("Buy milk", "Bake bread", "buy bread"):
+        runner.invoke(app, [*options, "task:add", description])
+
+    result = runner.invoke(app, [*options, "task:search", "bread", "OR", "mil*"])
+
+    assert result.exit_code == 0
+    assert "Buy milk" in result.output
+    assert "Bake bread" in result.output
+    assert "buy bread" in result.output
+    result = runner.invoke(app, [*options, "task:search", "--limit", "1", "bread"])
+    assert "Bake bread" in result.output
+    assert "buy bread" not in result.output
+    result = runner.invoke(app, [*options, "task:search", "cheese"])
+    assert "No tasks match 'cheese'" in result.output
+
+
+def test_search_board_cli_command_must_exit_given_a_query_without_terms():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+
+    result = runner.invoke(app, ["task:search", "OR"])
+
+    assert result.exit_code == 1
+    assert "The query 'OR' has no terms to search" in result.output
+
+
+@pytest.mark.parametrize("options", [[], ["--backend", "sqlite"]])
+def test_list_board_tasks_cli_command_must_filter_and_sort_tasks(options):
+    runner = CliRunner()
+    runner.invoke(app, [*options, "board:add", "personal"])
+    for day, description in ((3, "first"), (1, "second"), (2, "third")):
+        with freeze_time(f"2026-01-0{day}"):
+            runner.invoke(app, [*options, "task:add", description])
+    runner.invoke(app, [*options, "task:update", "done", "3"])
+
+    result = runner.invoke(
+        app,
+        [*options, "board:list", "--since", "2026-01-02", "--order", "created_at desc"],
+    )
+
+    assert result.exit_code == 0
+    assert result.output.index("first") < result.output.index("third")
+    assert "second" not in result.output
+    result = runner.invoke(app, [*options, "board:list", "--status", "not done"])
+    assert "first" in result.output
+    assert "second" in result.output
+    assert "third" not in result.output
+    result = runner.invoke(app, [*options, "board:list", "--until", "2026-01-02"])
+    assert "second" in result.output
+    assert "first" not in result.output
+
+
+@pytest.mark.parametrize(
+    "arguments", [["--order", "description"], ["--since", "yesterday"]]
+)
+def test_list_board_tasks_cli_command_must_exit_given_invalid_filters(arguments):
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+
+    result = runner.invoke(app, ["board:list", *arguments])
+
+    assert result.exit_code == 1
+    assert "Invalid" in result.output
+
+
+@pytest.mark.parametrize("options", [[], ["--backend", "sqlite"]])
+def test_task_commands_must_change_many_tasks_with_a_single_write(options):
+    runner = CliRunner()
+    runner.invoke(app, [*options, "board:add", "personal"])
+    runner.invoke(
+        app,
+        [*options, "batch"],
+        input="".join(f"task:add task {number}\n" for number in range(1, 7)),
+    )
+
+    with patch(
+        "whattodo.cli.append_records", side_effect=append_records
+    ) as mocked_append_records, patch(
+        "whattodo.sqlite_storage.apply_records",
+        side_effect=sqlite_storage.apply_records,
+    ) as mocked_apply_records:
+        result = runner.invoke(app, [*options, "task:update", "done", "2", "4-5"])
+        assert result.exit_code == 0
+        result = runner.invoke(app, [*options, "task:remove", "--done"], input="y\n")
+        assert result.exit_code == 0
+        result = runner.invoke(app, [*options, "task:remove", "1", "3"], input="y\n")
+        assert result.exit_code == 0
+
+    assert mocked_append_records.call_count + mocked_apply_records.call_count == 3
+    result = runner.invoke(app, [*options, "board:list"])
+    assert "task 6" in result.output
+    assert all(f"task {number}" not in result.output for number in range(1, 6))
+
+
+def test_update_task_cli_command_must_read_the_task_again_after_a_concurrent_write():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["task:add", "first"])
+    writes = []
+
+    def append_after_a_concurrent_write(
+        records, expected_revision=None, path=DATA_FILE
+    ):
+        if not writes:
+            writes.append(append_records([{"op": "update", "id": 1, "status": True}]))
+        return append_records(records, expected_revision=expected_revision, path=path)
+
+    with patch(
+        "whattodo.cli.append_records", side_effect=append_after_a_concurrent_write
+    ) as mocked_append_records:
+        result = runner.invoke(app, ["task:update", "not done", "1"])
+
+    assert result.exit_code == 0
+    assert mocked_append_records.call_count == 2
+    assert mocked_append_records.call_args[0][0] == [
+        {"op": "update", "id": 1, "status": False, "previous": True}
+    ]
+    assert read_from_json()["tasks"][0]["status"] is False
+
+
+def test_task_commands_must_change_no_task_given_a_missing_id():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["task:add", "first"])
+
+    result = runner.invoke(app, ["task:remove", "1", "2"], input="y\n")
+
+    assert result.exit_code == 1
+    assert "No tasks found with the id 2" in result.output
+    assert len(read_from_json()["tasks"]) == 1
+    result = runner.invoke(app, ["task:remove"])
+    assert result.exit_code == 1
+
+
+@pytest.mark.parametrize("options", [[], ["--backend", "sqlite"]])
+@pytest.mark.parametrize(
+    "arguments, message",
+    [
+        (["task:update", "finished", "1"], "Invalid status 'finished'"),
+        (["task:update", "done", "7"], "No tasks found with the id 7"),
+        (["task:remove", "7"], "No tasks found with the id 7"),
+        (["task:update", "--position", "done", "7"], "No tasks found at the index 7"),
+    ],
+)
+def test_task_commands_must_reject_a_single_invalid_task(options, arguments, message):
+    runner = CliRunner()
+    runner.invoke(app, [*options, "board:add", "personal"])
+    runner.invoke(app, [*options, "task:add", "first"])
+
+    result = runner.invoke(app, [*options, *arguments], input="y\n")
+
+    assert result.exit_code == 1
+    assert message in result.output
+    assert "Traceback" not in result.output
+    result = runner.invoke(app, [*options, "board:list", "--format", "ndjson"])
+    assert '"status": false' in result.output
+
+
+def test_archive_board_cli_command_must_move_old_done_tasks_out_of_the_board():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    with freeze_time("2026-01-01"):
+        runner.invoke(app, ["batch"], input="task:add old\ntask:add open\n")
+    runner.invoke(app, ["task:add", "recent"])
+    runner.invoke(app, ["task:update", "done", "1", "3"])
+
+    result = runner.invoke(app, ["board:archive", "--days", "7"])
+
+    assert result.exit_code == 0
+    assert "Archived 1 done tasks" in result.output
+    with open(DATA_FILE, "r", encoding="utf-8") as json_file:
+        assert '"old"' not in json_file.read()
+    assert [task["id"] for task in read_from_json()["tasks"]] == [2, 3]
+    result = runner.invoke(app, ["board:list", "--archived"])
+    assert "old" in result.output
+    assert "recent" not in result.output
+    result = runner.invoke(app, ["board:list", "--archived", "--since", "2026-01-02"])
+    assert "No tasks on this board!" in result.output
+
+
+def test_archive_board_cli_command_must_exit_when_no_board_exists():
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["board:archive"])
+
+    assert result.exit_code == 1
+    assert "There are no created boards yet!" in result.output
+
+
+def test_sqlite_backend_must_exit_early_when_no_board_exists():
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["--backend", "sqlite", "task:add", "some task"])
+
+    assert result.exit_code == 0
+    assert "There are no created boards yet!" in result.output
+
+
+def test_migrate_board_cli_command():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["task:add", "my first task"])
+
+    result = runner.invoke(app, ["board:migrate"])
+
+    assert result.exit_code == 0
+    assert "migrated to sqlite with 1 tasks" in result.output
+    result = runner.invoke(app, ["--backend", "sqlite", "board:count"])
+    assert "currently have 1 tasks" in result.output
+
+
+def test_migrate_board_cli_command_must_exit_early_when_no_board_exists():
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["board:migrate"])
+
+    assert result.exit_code == 0
+    assert "There are no created boards yet!" in result.output
+
+
+def test_convert_board_cli_command_must_round_trip_the_binary_board():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["batch"], input="task:add first\ntask:add second\n")
+
+    result = runner.invoke(app, ["board:convert", "--to", "binary"])
+
+    assert result.exit_code == 0
+    assert "Converted 2 tasks into the binary board" in result.output
+    assert binary_storage.count_tasks() == 2
+    runner.invoke(app, ["task:remove", "1"], input="y\n")
+    result = runner.invoke(app, ["board:convert", "--to", "json"])
+    assert result.exit_code == 0
+    assert [task["id"] for task in read_from_json()["tasks"]] == [1, 2]
+
+
+def test_convert_board_cli_command_must_refuse_while_the_daemon_runs():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["board:convert", "--to", "binary"])
+    open(SOCKET_FILE, "w", encoding="utf-8").close()
+
+    with patch("whattodo.cli.client.request", return_value={"count": 0}):
+        result = runner.invoke(app, ["board:convert", "--to", "json"])
+
+    assert result.exit_code == 1
+    assert "Stop the board daemon" in result.output
+
+
+def test_convert_board_cli_command_must_remove_the_socket_of_a_dead_daemon():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["task:add", "first"])
+    runner.invoke(app, ["board:convert", "--to", "binary"])
+    open(SOCKET_FILE, "w", encoding="utf-8").close()
+
+    result = runner.invoke(app, ["board:convert", "--to", "json"])
+
+    assert result.exit_code == 0
+    assert "Converted 1 tasks into the json board" in result.output
+    assert not os.path.exists(SOCKET_FILE)
+
+
+@pytest.mark.parametrize(
+    "arguments, message",
+    [
+        (["--to", "binary"], "There are no created boards yet!"),
+        (["--to", "json"], "There is no binary board at whattodo_data.bin!"),
+    ],
+)
+def test_convert_board_cli_command_must_exit_when_no_board_exists(arguments, message):
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["board:convert", *arguments])
+
+    assert result.exit_code == 1
+    assert message in result.output
+
+
+def test_batch_cli_command_must_append_operations_with_a_single_write():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    operations = "\n".join(
+        [
+            'task:add "my first task"',
+            "task:add my second task",
+            "# comment",
+            "task:add my third task",
+            "task:update done 2",
+            "task:remove 1",
+        ]
+    )
+
+    with patch("whattodo.cli.append_records", wraps=append_records) as mocked_append:
+        result = runner.invoke(app, ["batch"], input=operations)
+
+    assert result.exit_code == 0
+    assert "Applied 5 operations" in result.output
+    mocked_append.assert_called_once()
+    assert [record["op"] for record in mocked_append.call_args[0][0]] == [
+        "add",
+        "add",
+        "add",
+        "update",
+        "remove",
+    ]
+    board = Board.from_dict(read_from_json())
+    assert [task.description for task in board.tasks] == [
+        "my second task",
+        "my third task",
+    ]
+    assert board.retrieve_task(0).status == "ކ"
+
+
+def test_batch_cli_command_must_persist_at_checkpoints(tmp_path):
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    operations_file = tmp_path / "operations.txt"
+    operations_file.write_text("\n".join(f"task:add task {n}" for n in range(5)))
+
+    with patch("whattodo.cli.append_records", wraps=append_records) as mocked_append:
+        result = runner.invoke(
+            app, ["batch", str(operations_file), "--checkpoint", "2"]
+        )
+
+    assert result.exit_code == 0
+    assert mocked_append.call_count == 3
+    assert len(read_from_json()["tasks"]) == 5
+
+
+def test_batch_cli_command_must_stop_at_the_first_failing_operation():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+
+    result = runner.invoke(
+        app, ["batch"], input="task:add first\ntask:remove 4\ntask:add second\n"
+    )
+
+    assert result.exit_code == 1
+    assert "Operation on line 2 failed" in result.output
+    assert "Applied 1 operations" in result.output
+    assert [task["description"] for task in read_from_json()["tasks"]] == ["first"]
+
+
+def test_batch_cli_command_must_exit_when_no_board_exists():
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["batch"], input="task:add first\n")
+
+    assert result.exit_code == 1
+    assert "There are no created boards yet!" in result.output
+
+
+def test_batch_cli_command_must_apply_operations_again_after_a_concurrent_write():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+
+    def append_after_a_concurrent_write(
+        records, expected_revision=None, path=DATA_FILE
+    ):
+        if mocked_append.call_count == 1:
+            append_to_journal({"op": "add", "task": Task("concurrent").to_dict()})
+        return append_records(records, expected_revision=expected_revision, path=path)
+
+    with patch(
+        "whattodo.cli.append_records", side_effect=append_after_a_concurrent_write
+    ) as mocked_append:
+        result = runner.invoke(app, ["batch"], input="task:add batched\n")
+
+    assert result.exit_code == 0
+    assert mocked_append.call_count == 2
+    assert [task["description"] for task in read_from_json()["tasks"]] == [
+        "concurrent",
+        "batched",
+    ]
+
+
+@pytest.mark.parametrize("options", [[], ["--backend", "sqlite"]])
+@pytest.mark.parametrize("file_name", ["tasks.jsonl", "tasks.csv"])
+def test_exported_tasks_must_be_imported_back(options, file_name):
+    runner = CliRunner()
+    runner.invoke(app, [*options, "board:add", "personal"])
+    runner.invoke(app, [*options, "task:add", "my first task"])
+    runner.invoke(app, [*options, "task:add", "my, second task"])
+    runner.invoke(app, [*options, "task:update", "done", "2"])
+
+    exported = runner.invoke(app, [*options, "export", file_name])
+    runner.invoke(app, [*options, "board:add", "personal", "--force"])
+    imported = runner.invoke(app, [*options, "import", file_name])
+
+    assert exported.exit_code == 0
+    assert "Exported 2 tasks" in exported.output
+    assert imported.exit_code == 0
+    assert "Imported 2 tasks" in imported.output
+    runner.invoke(app, [*options, "export", f"again-{file_name}"])
+    with open(file_name) as exported_file, open(f"again-{file_name}") as again_file:
+        assert "my, second task" in exported_file.read()
+        exported_file.seek(0)
+        assert again_file.read() == exported_file.read()
+
+
+def test_export_cli_command_must_stream_to_stdout():
+    runner = CliRunner(mix_stderr=False)
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["task:add", "my first task"])
+
+    result = runner.invoke(app, ["export", "--format", "csv"])
+
+    assert result.exit_code == 0
+    assert (
+        result.stdout.splitlines()[0] == "id,description,status,created_at,utc_offset"
+    )
+    assert result.stdout.splitlines()[1].startswith("1,my first task,false,")
+    assert "Exported 1 tasks" in result.stderr
+
+
+def test_import_cli_command_must_commit_in_chunks():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    lines = "".join(f'{{"description": "task {n}"}}\n' for n in range(5))
+
+    with patch("whattodo.cli.append_records", wraps=append_records) as mocked_append:
+        result = runner.invoke(app, ["import", "--chunk-size", "2"], input=lines)
+
+    assert result.exit_code == 0
+    assert mocked_append.call_count == 3
+    assert [task["id"] for task in read_from_json()["tasks"]] == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize(
+    "policy, expected_tasks",
+    [
+        ("skip", [(1, "stored"), (2, "new")]),
+        ("replace", [(2, "new"), (1, "imported")]),
+        ("new-id", [(1, "stored"), (2, "new"), (3, "imported")]),
+    ],
+)
+def test_import_cli_command_must_apply_the_conflict_policy(policy, expected_tasks):
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["task:add", "stored"])
+    lines = '{"description": "new"}\n{"id": 1, "description": "imported"}\n'
+
+    result = runner.invoke(app, ["import", "--on-conflict", policy], input=lines)
+
+    assert result.exit_code == 0
+    assert [
+        (task["id"], task["description"]) for task in read_from_json()["tasks"]
+    ] == expected_tasks
+
+
+def test_import_cli_command_must_stop_at_the_first_invalid_record():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    lines = '{"description": "first"}\n{"description": "second"}\n{"id": 1}\n'
+
+    result = runner.invoke(app, ["import", "--chunk-size", "2"], input=lines)
+
+    assert result.exit_code == 1
+    assert "The import stopped: Invalid record 3" in result.output
+    assert "Imported 2 tasks" in result.output
+    assert len(read_from_json()["tasks"]) == 2
+
+
+def test_import_cli_command_must_fail_on_taken_ids_without_committing():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["task:add", "stored"])
+    lines = '{"description": "new"}\n{"id": 1, "description": "imported"}\n'
+
+    result = runner.invoke(
+        app, ["import", "--on-conflict", "fail", "--chunk-size", "0"], input=lines
+    )
+
+    assert result.exit_code == 1
+    assert "The task id 1 is already taken" in result.output
+    assert len(read_from_json()["tasks"]) == 1
+
+
+def test_import_cli_command_must_stop_when_the_board_changes():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+
+    def append_after_a_concurrent_write(
+        records, expected_revision=None, path=DATA_FILE
+    ):
+        append_to_journal({"op": "add", "task": Task("concurrent").to_dict()})
+        return append_records(records, expected_revision=expected_revision, path=path)
+
+    with patch(
+        "whattodo.cli.append_records", side_effect=append_after_a_concurrent_write
+    ):
+        result = runner.invoke(app, ["import"], input='{"description": "first"}\n')
+
+    assert result.exit_code == 1
+    assert "the board was changed by another command" in result.output
+    assert [task["description"] for task in read_from_json()["tasks"]] == ["concurrent"]
+
+
+def test_import_cli_command_must_stop_when_a_replaced_task_is_gone():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    missing_task = IndexError("No tasks found with the id 1")
+
+    with patch("whattodo.cli._commit_import", side_effect=missing_task):
+        result = runner.invoke(app, ["import"], input='{"description": "first"}\n')
+
+    assert result.exit_code == 1
+    assert "The import stopped: No tasks found with the id 1" in result.output
+
+
+@pytest.mark.parametrize("command", [["import"], ["export"]])
+def test_transfer_cli_commands_must_exit_when_no_board_exists(command):
+    runner = CliRunner()
+
+    result = runner.invoke(app, command, input="")
+
+    assert result.exit_code == 1
+    assert "There are no created boards yet!" in result.output
+
+
+@pytest.mark.parametrize("options", [[], ["--backend", "sqlite"]])
+def test_add_board_cli_command_must_refuse_existing_names(options):
+    runner = CliRunner()
+    runner.invoke(app, [*options, "board:add", "personal"])
+    runner.invoke(app, [*options, "task:add", "personal task"])
+
+    refused = runner.invoke(app, [*options, "board:add", "personal"])
+    counted = runner.invoke(app, [*options, "board:count"])
+    forced = runner.invoke(app, [*options, "board:add", "personal", "--force"])
+
+    assert refused.exit_code == 1
+    assert "There is already a board named personal!" in refused.output
+    assert "1 tasks" in counted.output
+    assert forced.exit_code == 0
+    assert "0 tasks" in runner.invoke(app, [*options, "board:count"]).output
+
+
+def test_board_catalog_cli_commands():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["task:add", "personal task"])
+    runner.invoke(app, ["board:add", "work"])
+    runner.invoke(app, ["task:add", "work task"])
+
+    boards = runner.invoke(app, ["board:ls"])
+    switched = runner.invoke(app, ["board:switch", "personal"])
+    listed = runner.invoke(app, ["board:list"])
+
+    assert boards.output == "  personal\n* work\n"
+    assert switched.exit_code == 0
+    assert "personal task" in listed.output
+    assert "work task" not in listed.output
+    assert [task["description"] for task in read_from_json()["tasks"]] == [
+        "personal task"
+    ]
+
+
+def test_switch_board_cli_command_must_exit_given_an_unknown_board():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+
+    result = runner.invoke(app, ["board:switch", "work"])
+
+    assert result.exit_code == 1
+    assert "There is no board named work!" in result.output
+
+
+def test_timings_option_must_report_the_phases_of_the_command():
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+    runner.invoke(app, ["task:add", "my first task"])
+
+    result = runner.invoke(app, ["--timings", "board:list", "--status", "not done"])
+
+    assert result.exit_code == 0
+    assert "my first task" in result.output
+    rows = result.output.splitlines()
+    header = next(index for index, row in enumerate(rows) if row.startswith("phase"))
+    phases = [row.split()[0] for row in rows[header + 1 :]]
+    assert phases[0] == "board:list"
+    assert "snapshot.read" in phases
+    assert "render" in phases
+
+
+@pytest.mark.parametrize("options", [[], ["--profile-memory"]])
+def test_profile_option_must_write_a_report(options):
+    runner = CliRunner()
+    runner.invoke(app, ["board:add", "personal"])
+
+    result = runner.invoke(app, ["--profile", "report.txt", *options, "board:count"])
+
     assert result.exit_code == 0
-    mocked_store_to_json.assert_called_once_with(expected_board_dict)
+    assert os.path.getsize("report.txt") > 0
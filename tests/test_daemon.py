@@ -0,0 +1,269 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from contextlib import suppress
+from unittest.mock import patch
+
+import pytest
+
+from typer.testing import CliRunner
+
+from whattodo.api.board import Board
+from whattodo.api.task import Task
+from whattodo.archive import iter_archived_tasks
+from whattodo.cli import app
+from whattodo.client import is_running
+from whattodo.client import request
+from whattodo.file_storage import append_records
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import store_to_json
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def store_board(*descriptions):
+    board = Board(name="personal")
+    for description in descriptions:
+        board.add(Task(description))
+    store_to_json(board.to_dict())
+
+
+def test_daemon_must_serve_the_stored_board(start_daemon):
+    store_board("my first task", "my second task")
+    start_daemon()
+
+    assert request("summary") == {"name": "personal", "count": 2, "next_id": 3}
+    assert [task["description"] for task in request("tasks", 1, None)] == [
+        "my second task"
+    ]
+    assert request("retrieve", 1, False)["description"] == "my first task"
+    assert request("retrieve", 1, True)["description"] == "my second task"
+
+
+def test_daemon_must_answer_null_when_no_board_exists(start_daemon):
+    start_daemon()
+
+    assert request("summary") is None
+    assert request("retrieve", 1, False) is None
+
+
+def test_daemon_must_persist_applied_records_on_flush(start_daemon):
+    store_board("my first task")
+    start_daemon()
+
+    request("apply", {"op": "add", "task": Task("my second task").to_dict()})
+    request("apply", {"op": "update", "id": 1, "status": True})
+    request("flush")
+
+    tasks = read_from_json()["tasks"]
+    assert [task["description"] for task in tasks] == [
+        "my first task",
+        "my second task",
+    ]
+    assert tasks[0]["status"] is True
+
+
+def test_daemon_must_keep_the_changes_it_fails_to_write(start_daemon, caplog):
+    store_board("my first task")
+    start_daemon()
+    writes = []
+
+    def append_after_a_failure(records, **kwargs):
+        writes.append(records)
+        if len(writes) == 1:
+            raise OSError("No space left on device")
+        return append_records(records, **kwargs)
+
+    with patch("whattodo.daemon.append_records", side_effect=append_after_a_failure):
+        request("apply", {"op": "update", "id": 1, "status": True})
+        request("flush")
+        assert read_from_json()["tasks"][0]["status"] is False
+        assert "couldn't be written" in caplog.text
+        request("flush")
+
+    assert read_from_json()["tasks"][0]["status"] is True
+
+
+def test_daemon_must_flush_and_remove_its_socket_on_sigterm():
+    store_board("my first task")
+    launcher = (
+        "from whattodo import daemon; daemon.FLUSH_DELAY = 60; "
+        "from whattodo.cli import app; app()"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", launcher, "serve"],
+        stdout=subprocess.DEVNULL,
+        env=dict(os.environ, PYTHONPATH=PROJECT_ROOT),
+    )
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with suppress(ConnectionError):
+            request("apply", {"op": "update", "id": 1, "status": True})
+            break
+        time.sleep(0.01)
+
+    process.send_signal(signal.SIGTERM)
+
+    assert process.wait(timeout=5) == 0
+    assert not is_running()
+    assert read_from_json()["tasks"][0]["status"] is True
+
+
+def test_daemon_must_replace_the_board_on_add_board(start_daemon):
+    store_board()
+    start_daemon()
+
+    request("add_board", "work")
+
+    assert request("summary") == {"name": "work", "count": 0, "next_id": 1}
+
+
+def test_daemon_must_report_the_failing_batch_operation(start_daemon):
+    store_board()
+    start_daemon()
+
+    result = request("batch", ["task:add", "first"], ["task:remove", "3"])
+
+    assert result == {"applied": 1, "error": "No tasks found with the id 3"}
+
+
+@pytest.mark.parametrize(
+    "arguments, exception",
+    [(("retrieve", 3, False), IndexError), (("unknown",), ValueError)],
+)
+def test_request_must_raise_the_daemon_errors(start_daemon, arguments, exception):
+    store_board("my first task")
+    start_daemon()
+
+    with pytest.raises(exception):
+        request(*arguments)
+
+
+def test_request_must_raise_connection_error_when_no_daemon_is_running():
+    assert not is_running()
+
+    with pytest.raises(ConnectionError):
+        request("summary")
+
+
+def test_cli_commands_must_be_forwarded_to_a_running_daemon(start_daemon):
+    store_board()
+    start_daemon()
+    os.remove("whattodo_data.json")
+    runner = CliRunner()
+
+    runner.invoke(app, ["task:add", "my first task"])
+    runner.invoke(app, ["batch"], input="task:add second\ntask:update done 1\n")
+    result = runner.invoke(app, ["board:list"])
+
+    assert "my first task" in result.output
+    assert [
+        (task["description"], task["status"]) for task in request("tasks", 0, None)
+    ] == [
+        ("my first task", True),
+        ("second", False),
+    ]
+
+
+def test_import_cli_command_must_apply_the_tasks_on_a_running_daemon(start_daemon):
+    store_board("my first task")
+    start_daemon()
+    runner = CliRunner()
+    lines = '{"id": 1, "description": "taken"}\n{"description": "imported"}\n'
+
+    result = runner.invoke(app, ["import", "--on-conflict", "new-id"], input=lines)
+
+    assert result.exit_code == 0
+    assert [
+        (task["id"], task["description"]) for task in request("tasks", 0, None)
+    ] == [(1, "my first task"), (2, "taken"), (3, "imported")]
+
+
+def test_import_cli_command_must_not_reuse_the_ids_of_removed_tasks(start_daemon):
+    store_board("my first task", "my second task")
+    start_daemon()
+    request("apply", {"op": "remove", "id": 2, "status": False})
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["import"], input='{"description": "imported"}\n')
+
+    assert result.exit_code == 0
+    assert [task["id"] for task in request("tasks", 0, None)] == [1, 3]
+
+
+def test_add_task_cli_command_must_print_the_id_the_daemon_gives(start_daemon):
+    store_board("my first task")
+    start_daemon()
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["task:add", "my second task"])
+
+    assert "The task 2 was added!" in result.output
+    assert request("retrieve", 2, False)["description"] == "my second task"
+
+
+def test_daemon_must_switch_between_boards(start_daemon):
+    store_board("my first task")
+    start_daemon()
+
+    request("add_board", "work")
+    request("apply", {"op": "add", "task": Task("work task").to_dict()})
+    request("switch_board", "personal")
+
+    assert request("summary") == {"name": "personal", "count": 1, "next_id": 2}
+    request("switch_board", "work")
+    assert request("tasks", 0, None)[0]["description"] == "work task"
+
+
+def test_daemon_must_journal_only_the_changes_on_flush(start_daemon):
+    store_board("my first task")
+    with open("whattodo_data.json", "rb") as json_file:
+        snapshot = json_file.read()
+    start_daemon()
+
+    request("apply", {"op": "update", "id": 1, "status": True})
+    request("flush")
+
+    with open("whattodo_data.json", "rb") as json_file:
+        assert json_file.read() == snapshot
+    assert read_from_json()["tasks"][0]["status"] is True
+
+
+def test_search_cli_command_must_see_the_changes_pending_on_the_daemon(start_daemon):
+    store_board()
+    start_daemon()
+    runner = CliRunner()
+    runner.invoke(app, ["task:add", "buy milk"])
+
+    result = runner.invoke(app, ["task:search", "milk"])
+
+    assert result.exit_code == 0
+    assert "buy milk" in result.output
+
+
+def test_daemon_must_answer_queries_from_the_resident_board(start_daemon):
+    store_board("first", "second", "third")
+    start_daemon()
+    request("apply", {"op": "update", "id": 2, "status": True, "previous": False})
+
+    result = request("query", "not done", None, None, "id desc", 0, 1)
+
+    assert [task["description"] for task in result] == ["third"]
+    runner = CliRunner()
+    result = runner.invoke(app, ["board:list", "--status", "done"])
+    assert "second" in result.output
+    assert "first" not in result.output
+
+
+def test_daemon_must_archive_the_done_tasks_of_the_resident_board(start_daemon):
+    store_board("first", "second")
+    start_daemon()
+    request("apply", {"op": "update", "id": 1, "status": True, "previous": False})
+
+    assert request("archive", None) == 1
+
+    assert request("summary") == {"name": "personal", "count": 1, "next_id": 3}
+    assert [task["description"] for task in iter_archived_tasks()] == ["first"]
@@ -1,28 +1,936 @@
 import json
+import marshal
+import os
+import threading
 
-from unittest import mock
-from unittest.mock import mock_open
 from unittest.mock import patch
 
 import pytest
 
+from tests.conftest import make_task_dict
+from whattodo import file_storage
+from whattodo import sqlite_storage
+from whattodo.file_storage import CACHE_FILE
+from whattodo.file_storage import INDEX_FILE
+from whattodo.file_storage import JOURNAL_FILE
+from whattodo.file_storage import RevisionConflictError
+from whattodo.file_storage import append_records
+from whattodo.file_storage import append_to_journal
+from whattodo.file_storage import atomic_open
+from whattodo.file_storage import compact_journal
+from whattodo.file_storage import has_stored_board
+from whattodo.file_storage import iter_tasks_from_json
 from whattodo.file_storage import read_from_json
+from whattodo.file_storage import read_header
+from whattodo.file_storage import read_journal
+from whattodo.file_storage import read_lazily_from_json
+from whattodo.file_storage import read_revision
+from whattodo.file_storage import retrieve_task_by_id_from_json
+from whattodo.file_storage import retrieve_task_from_json
+from whattodo.file_storage import search_tasks
+from whattodo.file_storage import segments_directory
 from whattodo.file_storage import store_to_json
 
 
 @pytest.mark.smoke
 def test_store_to_json():
-    open_mock = mock_open()
-    with patch("whattodo.file_storage.open", open_mock, create=True):
-        data = "test_data"
-        store_to_json(data=data)
-    open_mock.assert_called_with("whattodo_data.json", "w+", encoding="utf-8")
-    open_mock.return_value.write.assert_called_once_with(json.dumps(data))
-
-
-@mock.patch("builtins.open", create=True)
-def test_read_from_json(mock_open):
-    data = "test_data"
-    mock_open.side_effect = [mock.mock_open(read_data=json.dumps(data)).return_value]
+    data = {
+        "version": 3,
+        "name": "personal",
+        "next_id": 2,
+        "tasks": [make_task_dict("first", task_id=1)],
+    }
+
+    store_to_json(data=data)
+
+    with open("whattodo_data.json", "r", encoding="utf-8") as json_file:
+        assert json_file.read() == json.dumps(
+            {**data, "revision": 1}, ensure_ascii=False, indent=4
+        )
+
+
+def test_read_from_json():
+    data = {"version": 3, "name": "personal", "next_id": 1, "tasks": []}
+    store_to_json(data=data)
     result = read_from_json()
     assert result == data
+
+
+def test_read_from_json_must_return_none_when_no_board_is_stored():
+    assert read_from_json() is None
+    assert has_stored_board() is False
+
+
+def test_read_from_json_must_replay_the_journal():
+    store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 2,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+
+    append_to_journal({"op": "add", "task": make_task_dict("second")})
+    append_to_journal({"op": "add", "task": make_task_dict("third")})
+    append_to_journal({"op": "update", "id": 2, "status": True})
+    append_to_journal({"op": "remove", "id": 1})
+
+    assert read_from_json() == {
+        "version": 3,
+        "name": "personal",
+        "next_id": 4,
+        "tasks": [
+            make_task_dict("second", status=True, task_id=2),
+            make_task_dict("third", task_id=3),
+        ],
+    }
+
+
+def test_read_from_json_must_replay_clean_records():
+    store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 2,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+
+    append_to_journal({"op": "clean"})
+    append_to_journal({"op": "add", "task": make_task_dict("second")})
+
+    assert read_from_json()["tasks"] == [make_task_dict("second", task_id=2)]
+
+
+def test_read_from_json_must_ignore_a_truncated_journal_record():
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+    append_to_journal({"op": "add", "task": make_task_dict("first")})
+    with open(JOURNAL_FILE, "a", encoding="utf-8") as journal_file:
+        journal_file.write('{"op": "add", "ta')
+
+    assert read_from_json()["tasks"] == [make_task_dict("first", task_id=1)]
+
+
+def test_append_to_journal_must_not_rewrite_the_snapshot():
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+    with open(file_storage.DATA_FILE, "rb") as json_file:
+        snapshot = json_file.read()
+
+    append_to_journal({"op": "add", "task": make_task_dict("first")})
+
+    with open(file_storage.DATA_FILE, "rb") as json_file:
+        assert json_file.read() == snapshot
+
+
+def test_atomic_open_must_create_files_with_the_umask_permissions():
+    umask = os.umask(0o022)
+    try:
+        with atomic_open("created.json") as created_file:
+            created_file.write("{}")
+    finally:
+        os.umask(umask)
+
+    assert os.stat("created.json").st_mode & 0o777 == 0o644
+
+
+def test_atomic_open_must_keep_the_permissions_of_replaced_files():
+    with open("replaced.json", "w", encoding="utf-8") as replaced_file:
+        replaced_file.write("{}")
+    os.chmod("replaced.json", 0o640)
+
+    with atomic_open("replaced.json") as replaced_file:
+        replaced_file.write("[]")
+
+    assert os.stat("replaced.json").st_mode & 0o777 == 0o640
+
+
+def test_store_to_json_must_discard_the_journal():
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+    append_to_journal({"op": "add", "task": make_task_dict("first")})
+
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+
+    assert not os.path.exists(JOURNAL_FILE)
+    assert read_from_json()["tasks"] == []
+
+
+def test_compact_journal_must_fold_the_journal_into_the_snapshot():
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+    append_to_journal({"op": "add", "task": make_task_dict("first")})
+
+    compact_journal()
+
+    assert not os.path.exists(JOURNAL_FILE)
+    with open(file_storage.DATA_FILE, "r", encoding="utf-8") as json_file:
+        assert json.load(json_file)["tasks"] == [make_task_dict("first", task_id=1)]
+
+
+def test_append_to_journal_must_compact_once_the_threshold_is_reached(monkeypatch):
+    monkeypatch.setattr(file_storage, "JOURNAL_MAX_BYTES", 200)
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+
+    for number in range(5):
+        append_to_journal({"op": "add", "task": make_task_dict(f"task {number}")})
+
+    assert os.path.getsize(JOURNAL_FILE) < 200
+    assert len(read_from_json()["tasks"]) == 5
+
+
+def test_read_header_must_not_parse_the_payload():
+    store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 2,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+
+    with patch("whattodo.file_storage.read_from_json") as mocked_read_from_json:
+        header = read_header()
+
+    mocked_read_from_json.assert_not_called()
+    assert header["name"] == "personal"
+    assert header["count"] == 1
+    assert header["statuses"] == {"done": 0, "not done": 1}
+
+
+def test_read_header_must_follow_journaled_operations():
+    store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 2,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+
+    append_to_journal({"op": "add", "task": make_task_dict("second")})
+    append_to_journal({"op": "update", "id": 1, "status": True, "previous": False})
+    append_to_journal({"op": "remove", "id": 2, "status": False})
+
+    with patch("whattodo.file_storage.read_from_json") as mocked_read_from_json:
+        header = read_header()
+
+    mocked_read_from_json.assert_not_called()
+    assert header["count"] == 1
+    assert header["statuses"] == {"done": 1, "not done": 0}
+
+
+def test_read_header_must_rebuild_a_stale_header():
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+    with open(file_storage.DATA_FILE, "w", encoding="utf-8") as json_file:
+        json.dump(
+            {"version": 3, "name": "work", "tasks": [make_task_dict("first", True)]},
+            json_file,
+        )
+
+    header = read_header()
+
+    assert header["name"] == "work"
+    assert header["count"] == 1
+    assert header["statuses"] == {"done": 1, "not done": 0}
+    with patch("whattodo.file_storage.read_from_json") as mocked_read_from_json:
+        assert read_header() == header
+    mocked_read_from_json.assert_not_called()
+
+
+def test_read_header_must_rebuild_when_records_lack_statuses():
+    store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 2,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+
+    append_to_journal({"op": "remove", "id": 1})
+
+    assert read_header()["count"] == 0
+
+
+def test_read_header_must_return_none_when_no_board_is_stored():
+    assert read_header() is None
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64 * 1024])
+@pytest.mark.parametrize(
+    "start, stop, expected",
+    [(0, None, ["0", "1", "2", "3"]), (1, 3, ["1", "2"]), (3, 10, ["3"])],
+)
+def test_iter_tasks_from_json_must_stream_the_requested_window(
+    monkeypatch, chunk_size, start, stop, expected
+):
+    monkeypatch.setattr(file_storage._JsonStream, "CHUNK_SIZE", chunk_size)
+    tasks = [make_task_dict(str(number)) for number in range(4)]
+    store_to_json(data={"version": 3, "name": "personal", "tasks": tasks})
+
+    result = iter_tasks_from_json(start, stop)
+
+    assert [task["description"] for task in result] == expected
+
+
+def test_iter_tasks_from_json_must_stop_parsing_after_the_window():
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+    tasks = ",".join(json.dumps(make_task_dict(str(number))) for number in range(2))
+    with open(file_storage.DATA_FILE, "w", encoding="utf-8") as json_file:
+        json_file.write(
+            '{"version": 2, "name": "personal", "tasks": [' + tasks + ", {broken"
+        )
+
+    result = iter_tasks_from_json(0, 2)
+
+    assert [task["description"] for task in result] == ["0", "1"]
+
+
+def test_iter_tasks_from_json_must_replay_a_pending_journal():
+    store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 2,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+    append_to_journal({"op": "add", "task": make_task_dict("second")})
+    append_to_journal({"op": "remove", "id": 1})
+
+    result = iter_tasks_from_json()
+
+    assert list(result) == [make_task_dict("second", task_id=2)]
+
+
+@pytest.mark.parametrize("start, stop", [(0, None), (0, 2), (1, 3), (2, None), (4, 6)])
+def test_iter_tasks_from_json_must_apply_the_journal_over_the_window(start, stop):
+    tasks = [make_task_dict(str(number), task_id=number + 1) for number in range(4)]
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 5, "tasks": tasks})
+    append_records(
+        [
+            {"op": "remove", "id": 2, "status": False},
+            {"op": "update", "id": 3, "status": True, "previous": False},
+            {"op": "add", "task": make_task_dict("added", task_id=5)},
+            {"op": "add", "task": make_task_dict("replaced", task_id=6)},
+            {"op": "update", "id": 5, "status": True, "previous": False},
+            {"op": "remove", "id": 6, "status": False},
+            {"op": "remove", "id": 1, "status": False},
+            {"op": "add", "task": make_task_dict("readded", task_id=1)},
+        ]
+    )
+
+    with patch("whattodo.file_storage.read_from_json") as mocked_read_from_json:
+        result = list(iter_tasks_from_json(start, stop))
+
+    mocked_read_from_json.assert_not_called()
+    assert result == read_from_json()["tasks"][start:stop]
+
+
+def test_iter_tasks_from_json_must_stop_parsing_after_the_window_with_a_journal():
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+    tasks = ",".join(
+        json.dumps(make_task_dict(str(number), task_id=number + 1))
+        for number in range(2)
+    )
+    with open(file_storage.DATA_FILE, "w", encoding="utf-8") as json_file:
+        json_file.write('{"version": 3, "name": "personal", "tasks": [' + tasks + ", {")
+    append_to_journal({"op": "update", "id": 1, "status": True})
+
+    result = iter_tasks_from_json(0, 2)
+
+    assert [task["status"] for task in result] == [True, False]
+
+
+def test_iter_tasks_from_json_must_apply_the_journal_over_segments(segmented_board):
+    append_records(
+        [
+            {"op": "remove", "id": 2, "status": False},
+            {"op": "add", "task": make_task_dict("added", task_id=100)},
+        ]
+    )
+
+    result = list(iter_tasks_from_json(2))
+
+    assert result == read_from_json()["tasks"][2:]
+
+
+def test_iter_tasks_from_json_must_give_ids_to_a_version_2_snapshot():
+    tasks = [make_task_dict(str(number)) for number in range(3)]
+    for task in tasks:
+        del task["id"]
+    store_to_json(data={"version": 2, "name": "personal", "tasks": tasks})
+
+    result = iter_tasks_from_json(1)
+
+    assert [task["id"] for task in result] == [2, 3]
+
+
+def test_read_from_json_must_replay_positional_records_of_older_journals():
+    store_to_json(
+        data={
+            "version": 2,
+            "name": "personal",
+            "tasks": [make_task_dict("first"), make_task_dict("second")],
+        }
+    )
+    with open(JOURNAL_FILE, "w", encoding="utf-8") as journal_file:
+        journal_file.write('{"op": "remove", "index": 0}\n')
+        journal_file.write('{"op": "update", "id": 2, "status": true}\n')
+        journal_file.write('{"op": "update", "index": 0, "status": false}\n')
+
+    assert read_from_json()["tasks"] == [make_task_dict("second", task_id=2)]
+
+
+def test_read_from_json_must_skip_records_on_removed_tasks():
+    store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 2,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+
+    append_to_journal({"op": "remove", "id": 1})
+    append_to_journal({"op": "remove", "id": 1})
+    append_to_journal({"op": "update", "id": 1, "status": True})
+
+    assert read_from_json()["tasks"] == []
+    assert read_revision() == 4
+
+
+def test_iter_tasks_from_json_must_be_empty_when_no_board_is_stored():
+    assert list(iter_tasks_from_json()) == []
+
+
+def test_append_to_journal_must_upgrade_a_version_1_snapshot():
+    legacy_task = {
+        "description": "first",
+        "status": False,
+        "created_at": "2020-12-26 00:00:00",
+    }
+    store_to_json(data={"name": "personal", "tasks": [legacy_task]})
+
+    append_to_journal({"op": "add", "task": make_task_dict("second")})
+
+    assert not os.path.exists(JOURNAL_FILE)
+    with open(file_storage.DATA_FILE, "r", encoding="utf-8") as json_file:
+        assert json.load(json_file) == {
+            "version": 3,
+            "name": "personal",
+            "next_id": 3,
+            "tasks": [
+                make_task_dict("first", task_id=1),
+                make_task_dict("second", task_id=2),
+            ],
+            "revision": 3,
+        }
+    assert read_header()["version"] == 3
+
+
+def test_store_to_json_must_return_growing_revisions():
+    data = {"version": 3, "name": "personal", "next_id": 1, "tasks": []}
+
+    assert store_to_json(data=data) == 1
+    append_to_journal({"op": "add", "task": make_task_dict("first")})
+    assert read_revision() == 2
+    assert store_to_json(data=data) == 3
+
+
+def test_store_to_json_must_raise_revision_conflict_given_a_stale_revision():
+    data = {"version": 3, "name": "personal", "next_id": 1, "tasks": []}
+    revision = store_to_json(data=data)
+    append_to_journal({"op": "add", "task": make_task_dict("first")})
+
+    with pytest.raises(RevisionConflictError):
+        store_to_json(data=data, expected_revision=revision)
+
+    assert read_from_json()["tasks"] == [make_task_dict("first", task_id=1)]
+
+
+def test_store_to_json_must_keep_the_previous_snapshot_when_writing_fails():
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+
+    with pytest.raises(TypeError):
+        store_to_json(data={"version": 2, "name": "personal", "tasks": [object()]})
+
+    assert read_from_json() == {
+        "version": 3,
+        "name": "personal",
+        "next_id": 1,
+        "tasks": [],
+    }
+    assert not [name for name in os.listdir() if name.endswith(".tmp")]
+
+
+def test_append_to_journal_must_not_lose_concurrent_records(monkeypatch):
+    monkeypatch.setattr(file_storage, "JOURNAL_MAX_BYTES", 2048)
+    store_to_json(data={"version": 3, "name": "personal", "next_id": 1, "tasks": []})
+
+    def append_tasks(writer):
+        for number in range(25):
+            append_to_journal(
+                {"op": "add", "task": make_task_dict(f"{writer} {number}")}
+            )
+
+    writers = [threading.Thread(target=append_tasks, args=(n,)) for n in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert len(read_from_json()["tasks"]) == 100
+    assert read_header()["count"] == 100
+
+
+def test_append_records_must_journal_every_record_and_return_the_revision():
+    revision = store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 2,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+
+    stored_revision = append_records(
+        [
+            {"op": "add", "task": make_task_dict("second")},
+            {"op": "update", "id": 1, "status": True, "previous": False},
+        ],
+        expected_revision=revision,
+    )
+
+    assert stored_revision == revision + 2 == read_revision()
+    assert read_from_json()["tasks"] == [
+        make_task_dict("first", status=True, task_id=1),
+        make_task_dict("second", task_id=2),
+    ]
+    assert read_header()["statuses"] == {"done": 1, "not done": 1}
+
+
+def test_append_records_must_give_added_tasks_the_next_free_ids():
+    store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 5,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+    records = [
+        {"op": "add", "task": make_task_dict("second")},
+        {"op": "add", "task": make_task_dict("imported", task_id=9)},
+        {"op": "add", "task": make_task_dict("third")},
+    ]
+
+    append_records(records)
+    append_to_journal({"op": "add", "task": make_task_dict("fourth")})
+
+    assert [record["task"]["id"] for record in records] == [5, 9, 10]
+    assert [record["task"]["id"] for record in read_journal()] == [5, 9, 10, 11]
+    assert read_header()["next_id"] == 12
+
+
+def test_read_header_must_track_if_tasks_are_stored_in_id_order():
+    store_to_json(
+        data={
+            "version": 3,
+            "name": "personal",
+            "next_id": 3,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+    assert read_header()["ordered"] is True
+
+    append_to_journal({"op": "add", "task": make_task_dict("second")})
+    assert read_header()["ordered"] is True
+
+    append_to_journal({"op": "add", "task": make_task_dict("lower", task_id=2)})
+    assert read_header()["ordered"] is False
+
+    compact_journal()
+    assert read_header()["ordered"] is False
+
+
+def test_append_records_must_raise_revision_conflict_given_a_stale_revision():
+    revision = store_to_json(
+        data={"version": 3, "name": "personal", "next_id": 1, "tasks": []}
+    )
+    append_to_journal({"op": "add", "task": make_task_dict("first")})
+
+    with pytest.raises(RevisionConflictError):
+        append_records([{"op": "clean"}], expected_revision=revision)
+
+    assert read_from_json()["tasks"] == [make_task_dict("first", task_id=1)]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"version": 3, "name": "personal", "next_id": 1, "tasks": []},
+        {
+            "version": 3,
+            "name": 'ação "quoted"',
+            "next_id": 2,
+            "tasks": [make_task_dict("ކ ✘", task_id=1)],
+        },
+        {
+            "version": 3,
+            "name": "personal",
+            "next_id": 3,
+            "tasks": [
+                make_task_dict("first", status=True, task_id=1),
+                make_task_dict("second", task_id=2),
+            ],
+        },
+        {"version": 2, "name": "personal", "tasks": [make_task_dict("first")]},
+        {
+            "name": "personal",
+            "tasks": [
+                {"description": "first", "status": False, "created_at": "2020-12-26"}
+            ],
+        },
+    ],
+)
+def test_store_to_json_must_write_the_same_snapshot_as_json_dump(data):
+    store_to_json(data=data)
+
+    with open(file_storage.DATA_FILE, "r", encoding="utf-8") as json_file:
+        assert json_file.read() == json.dumps(
+            {**data, "revision": 1}, ensure_ascii=False, indent=4
+        )
+
+
+@pytest.fixture(scope="function")
+def searchable_board():
+    store_to_json(
+        {
+            "version": 3,
+            "name": "personal",
+            "next_id": 3,
+            "tasks": [
+                make_task_dict("Buy milk", task_id=1),
+                make_task_dict("Bake bread", task_id=2),
+            ],
+        }
+    )
+    append_to_journal({"op": "add", "task": make_task_dict("buy bread")})
+
+
+def test_search_tasks_must_build_the_index_on_the_first_search(searchable_board):
+    assert not os.path.exists(INDEX_FILE)
+
+    result = search_tasks("bread")
+
+    assert result == [
+        make_task_dict("Bake bread", task_id=2),
+        make_task_dict("buy bread", task_id=3),
+    ]
+    assert sqlite_storage.read_revision(INDEX_FILE) == read_revision()
+
+
+def test_search_tasks_must_follow_the_appended_records(searchable_board):
+    search_tasks("bread")
+
+    with patch("whattodo.sqlite_storage.store_to_sqlite") as mocked_store_to_sqlite:
+        append_records(
+            [
+                {"op": "add", "task": make_task_dict("Buy eggs")},
+                {"op": "remove", "id": 1, "status": False},
+            ]
+        )
+        result = search_tasks("buy", limit=5)
+
+    mocked_store_to_sqlite.assert_not_called()
+    assert [task["id"] for task in result] == [3, 4]
+    assert sqlite_storage.read_revision(INDEX_FILE) == read_revision()
+
+
+def test_search_tasks_must_keep_the_index_over_compactions(searchable_board):
+    search_tasks("bread")
+
+    compact_journal()
+
+    assert sqlite_storage.read_revision(INDEX_FILE) == read_revision()
+
+
+def test_store_to_json_must_discard_the_search_index(searchable_board):
+    search_tasks("bread")
+
+    store_to_json({"version": 3, "name": "work", "next_id": 1, "tasks": []})
+
+    assert not os.path.exists(INDEX_FILE)
+    assert search_tasks("bread") == []
+
+
+def test_search_tasks_must_rebuild_an_index_left_behind(searchable_board):
+    search_tasks("bread")
+    sqlite_storage.store_to_sqlite(
+        {"version": 3, "name": "personal", "next_id": 1, "tasks": []},
+        revision=1,
+        path=INDEX_FILE,
+    )
+
+    append_to_journal({"op": "remove", "id": 2, "status": False})
+
+    assert [task["id"] for task in search_tasks("bread")] == [3]
+
+
+def test_search_tasks_must_return_nothing_when_no_board_is_stored():
+    assert search_tasks("bread") == []
+    assert not os.path.exists(INDEX_FILE)
+
+
+def test_search_tasks_must_raise_value_error_given_no_terms(searchable_board):
+    with pytest.raises(ValueError):
+        search_tasks("OR")
+
+
+@pytest.fixture(scope="function")
+def cached_board():
+    store_to_json(
+        {
+            "version": 3,
+            "name": "personal",
+            "next_id": 2,
+            "tasks": [make_task_dict("first", task_id=1)],
+        }
+    )
+    append_to_journal({"op": "add", "task": make_task_dict("second")})
+    return read_from_json()
+
+
+def test_read_from_json_must_load_the_cached_board(cached_board):
+    assert os.path.exists(CACHE_FILE)
+
+    with patch("whattodo.file_storage.json.loads") as mocked_json_loads:
+        result = read_from_json()
+
+    mocked_json_loads.assert_not_called()
+    assert result == cached_board
+    assert read_revision() == 2
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda: append_to_journal({"op": "clean"}),
+        lambda: store_to_json(
+            {"version": 3, "name": "work", "next_id": 1, "tasks": []}
+        ),
+    ],
+)
+def test_read_from_json_must_not_load_a_stale_cache(cached_board, change):
+    change()
+
+    assert read_from_json() != cached_board
+    assert read_from_json() == read_from_json()
+
+
+def test_read_from_json_must_compare_the_cached_content_hash(cached_board):
+    stat = os.stat(file_storage.DATA_FILE)
+    with open(file_storage.DATA_FILE, "r+", encoding="utf-8") as json_file:
+        content = json_file.read()
+        json_file.seek(0)
+        json_file.write(content.replace('"first"', '"fir5t"'))
+    os.utime(file_storage.DATA_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert read_from_json()["tasks"][0]["description"] == "fir5t"
+
+
+def test_read_from_json_must_ignore_a_corrupt_cache(cached_board):
+    with open(CACHE_FILE, "wb") as cache_file:
+        cache_file.write(b"not a cache")
+
+    assert read_from_json() == cached_board
+
+
+def test_read_from_json_must_only_load_the_key_of_a_stale_cache(cached_board):
+    append_to_journal({"op": "clean"})
+
+    with patch(
+        "whattodo.file_storage.marshal.load", side_effect=marshal.load
+    ) as mocked_load:
+        read_from_json(cache=False)
+
+    assert mocked_load.call_count == 1
+
+
+def test_read_from_json_must_not_write_the_cache_of_a_board_to_change(cached_board):
+    os.remove(CACHE_FILE)
+
+    assert read_from_json(cache=False) == cached_board
+    assert not os.path.exists(CACHE_FILE)
+
+
+def segment_files():
+    return sorted(os.listdir(segments_directory()))
+
+
+def test_store_to_json_must_split_large_boards_in_segments(segmented_board):
+    with open(file_storage.DATA_FILE, "r", encoding="utf-8") as json_file:
+        manifest = json.load(json_file)
+
+    assert [segment["count"] for segment in manifest["segments"]] == [3, 3, 1]
+    assert manifest["segments"][1] == {
+        "file": "segment-00000001-000001.json",
+        "count": 3,
+        "done": 2,
+        "min_id": 4,
+        "max_id": 6,
+    }
+    assert len(segment_files()) == 3
+    assert read_from_json() == segmented_board
+    assert read_header()["statuses"] == {"done": 3, "not done": 4}
+
+
+def test_store_to_json_must_remove_the_segments_of_a_smaller_board(segmented_board):
+    store_to_json(dict(segmented_board, tasks=segmented_board["tasks"][:2]))
+
+    assert not os.path.exists(segments_directory())
+    assert len(read_from_json()["tasks"]) == 2
+
+
+def test_compact_journal_must_only_rewrite_the_changed_segments(segmented_board):
+    append_records(
+        [
+            {"op": "update", "id": 5, "status": True, "previous": False},
+            {"op": "add", "task": make_task_dict("task 8", task_id=8)},
+        ]
+    )
+    expected = read_from_json()
+
+    compact_journal()
+
+    assert segment_files() == [
+        "segment-00000001-000000.json",
+        "segment-00000004-000001.json",
+        "segment-00000004-000002.json",
+    ]
+    assert not os.path.exists(JOURNAL_FILE)
+    assert read_revision() == 4
+    assert read_from_json() == expected
+    assert read_header()["statuses"] == {"done": 4, "not done": 4}
+
+
+def test_compact_journal_must_drop_emptied_segments(segmented_board):
+    append_records([{"op": "remove", "id": task_id} for task_id in (4, 5, 6)])
+    append_records([{"op": "add", "task": make_task_dict("task 8")}])
+
+    compact_journal()
+
+    assert [task["id"] for task in read_from_json()["tasks"]] == [1, 2, 3, 7, 8]
+    assert len(segment_files()) == 2
+
+
+def test_compact_journal_must_fold_a_shrunk_segmented_board(segmented_board):
+    append_records([{"op": "remove", "id": task_id} for task_id in range(1, 6)])
+
+    compact_journal()
+
+    assert not os.path.exists(segments_directory())
+    assert [task["id"] for task in read_from_json()["tasks"]] == [6, 7]
+
+
+def test_iter_tasks_from_json_must_only_open_the_segments_of_the_window(
+    segmented_board,
+):
+    os.remove(os.path.join(segments_directory(), "segment-00000001-000000.json"))
+
+    tasks = list(iter_tasks_from_json(start=4, stop=7))
+
+    assert [task["id"] for task in tasks] == [5, 6, 7]
+
+
+@pytest.mark.parametrize("start, stop", [(0, None), (2, 4), (3, 6), (6, 9), (8, 9)])
+def test_iter_tasks_from_json_must_stream_segmented_windows(
+    segmented_board, start, stop
+):
+    tasks = list(iter_tasks_from_json(start=start, stop=stop))
+
+    assert tasks == segmented_board["tasks"][start:stop]
+
+
+def test_read_lazily_from_json_must_read_segments_on_access(segmented_board):
+    data = read_lazily_from_json()
+
+    assert data["tasks"].loaded == 0
+    assert data["tasks"][-1].description == "task número 7"
+    assert data["tasks"].loaded == 1
+
+
+def test_retrieve_task_by_id_from_json_must_only_read_the_segment_holding_it(
+    segmented_board,
+):
+    append_records(
+        [
+            {"op": "update", "id": 5, "status": True, "previous": False},
+            {"op": "remove", "id": 6, "status": True},
+            {"op": "add", "task": make_task_dict("task 8")},
+        ]
+    )
+    os.remove(os.path.join(segments_directory(), segment_files()[0]))
+
+    assert retrieve_task_by_id_from_json(5) == dict(
+        segmented_board["tasks"][4], status=True
+    )
+    assert retrieve_task_by_id_from_json(8)["description"] == "task 8"
+    for missing_id in (6, 9):
+        with pytest.raises(
+            IndexError, match=f"No tasks found with the id {missing_id}"
+        ):
+            retrieve_task_by_id_from_json(missing_id)
+
+
+def test_iter_tasks_from_json_must_skip_the_segments_before_start_with_a_journal(
+    segmented_board,
+):
+    append_records([{"op": "remove", "id": 2, "status": True}])
+    os.remove(os.path.join(segments_directory(), segment_files()[0]))
+
+    assert [task["id"] for task in iter_tasks_from_json(2, 4)] == [4, 5]
+
+
+def test_retrieve_task_from_json_must_apply_the_journal():
+    store_to_json(
+        {
+            "version": 3,
+            "name": "personal",
+            "next_id": 3,
+            "tasks": [
+                make_task_dict("first", task_id=1),
+                make_task_dict("second", task_id=2),
+            ],
+        }
+    )
+    append_records([{"op": "clean"}, {"op": "add", "task": make_task_dict("third")}])
+
+    assert retrieve_task_from_json(0)["id"] == 3
+    assert retrieve_task_from_json(-1)["id"] == 3
+    with pytest.raises(IndexError, match="No tasks found at the index 1"):
+        retrieve_task_from_json(1)
+
+
+def test_retrieve_task_from_json_must_answer_none_without_a_board():
+    assert retrieve_task_from_json(0) is None
+    assert retrieve_task_by_id_from_json(1) is None
+
+
+def test_read_lazily_from_json_must_raise_revision_conflict_on_replaced_segments(
+    segmented_board,
+):
+    data = read_lazily_from_json()
+    append_records([{"op": "update", "id": 1, "status": True}])
+    compact_journal()
+
+    with pytest.raises(RevisionConflictError):
+        data["tasks"][0]
+
+
+def test_read_lazily_from_json_must_read_a_board_with_a_pending_journal(
+    segmented_board,
+):
+    append_records([{"op": "update", "id": 1, "status": True}])
+
+    assert read_lazily_from_json() == read_from_json()
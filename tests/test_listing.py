@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+
+import pytest
+
+from freezegun.api import freeze_time
+
+from whattodo.api.task import Task
+from whattodo.listing import render_table
+from whattodo.listing import write_listing
+
+
+@pytest.fixture
+def dict_tasks():
+    with freeze_time("2026-01-01 12:00:00"):
+        return [
+            dict(Task("my first task").to_dict(), id=1),
+            dict(Task('my "second", task').to_dict(), id=12, status=True),
+        ]
+
+
+def test_write_listing_must_stream_a_single_json_document(dict_tasks):
+    output = io.StringIO()
+
+    write_listing("personal", dict_tasks, output, "json")
+
+    assert json.loads(output.getvalue()) == {"name": "personal", "tasks": dict_tasks}
+
+
+def test_write_listing_must_write_an_empty_json_document():
+    output = io.StringIO()
+
+    write_listing("personal", [], output, "json")
+
+    assert json.loads(output.getvalue()) == {"name": "personal", "tasks": []}
+
+
+def test_write_listing_must_write_a_json_line_per_task(dict_tasks):
+    output = io.StringIO()
+
+    write_listing("personal", dict_tasks, output, "ndjson")
+
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == dict_tasks
+
+
+def test_write_listing_must_write_a_csv_row_per_task(dict_tasks):
+    output = io.StringIO()
+
+    write_listing("personal", dict_tasks, output, "csv")
+
+    output.seek(0)
+    rows = list(csv.DictReader(output))
+    assert [(row["id"], row["description"], row["status"]) for row in rows] == [
+        ("1", "my first task", "false"),
+        ("12", 'my "second", task', "true"),
+    ]
+
+
+def test_write_listing_must_reject_unknown_formats():
+    with pytest.raises(ValueError, match="Unknown format xml"):
+        write_listing("personal", [], io.StringIO(), "xml")
+
+
+def test_render_table_must_size_the_columns_on_the_widest_cells(dict_tasks):
+    rows = list(render_table("personal", dict_tasks))
+
+    assert rows == [
+        "personal\n",
+        "ID  DESCRIPTION        STATUS    CREATED AT\n",
+        "--  -----------------  --------  -------------------\n",
+        "1   my first task      not done  2026-01-01 12:00:00\n",
+        '12  my "second", task  done      2026-01-01 12:00:00\n',
+    ]
+
+
+def test_render_table_must_size_the_columns_on_the_sample_only(dict_tasks):
+    rows = list(render_table("personal", dict_tasks, sample=1))
+
+    assert rows[1] == "ID  DESCRIPTION    STATUS    CREATED AT\n"
+    assert rows[-1] == '12  my "second", task  done      2026-01-01 12:00:00\n'
+
+
+def test_render_table_must_render_an_empty_board():
+    assert list(render_table("personal", [])) == [
+        "personal\n",
+        "No tasks on this board!\n",
+    ]
+
+
+def test_render_table_must_yield_rows_as_tasks_are_read(dict_tasks):
+    def tasks():
+        yield from dict_tasks
+        raise AssertionError("The tasks were read past the sample")
+
+    rows = render_table("personal", tasks(), sample=2)
+
+    assert [next(rows) for _ in range(5)][-1].startswith("12  ")
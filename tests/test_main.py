@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from typer.testing import CliRunner
+
+from whattodo.__main__ import main
+from whattodo.api.board import Board
+from whattodo.api.task import Task
+from whattodo.cli import app
+from whattodo.client import request
+from whattodo.file_storage import store_to_json
+
+# Total import time allowed to board:count, in microseconds, interpreter
+# startup included. Going through typer takes well over twice as long.
+STARTUP_BUDGET = 100_000
+
+# Modules the fast path must never import.
+HEAVY_MODULES = ("typer", "click", "asyncio", "sqlite3", "whattodo.api.board")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def store_board(name, *descriptions):
+    board = Board(name=name)
+    for description in descriptions:
+        board.add(Task(description))
+    store_to_json(board.to_dict())
+
+
+def run_with_importtime(*arguments):
+    """
+    Runs the whattodo command in a fresh interpreter, returning its
+    output, the imported modules and their total import time.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "whattodo", *arguments],
+        capture_output=True,
+        check=True,
+        text=True,
+        env=dict(os.environ, PYTHONPATH=PROJECT_ROOT),
+    )
+    modules = set()
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        modules.add(module.strip())
+        # Nested imports are already counted by their top level module.
+        if not module.startswith("  "):
+            total += int(cumulative)
+    return result.stdout, modules, total
+
+
+@pytest.mark.parametrize(
+    "arguments", [["board:count"], ["board:ls"], ["board:switch", "work"]]
+)
+@pytest.mark.parametrize("boards", [[], ["personal"], ["personal", "work"]])
+def test_main_must_answer_like_the_typer_app(arguments, boards, capsys):
+    runner = CliRunner()
+    for board_name in boards:
+        runner.invoke(app, ["board:add", board_name])
+        runner.invoke(app, ["task:add", f"task of {board_name}"])
+    expected = runner.invoke(app, arguments)
+
+    try:
+        main(arguments)
+    except SystemExit as excinfo:
+        assert excinfo.code == expected.exit_code
+    assert capsys.readouterr().out == expected.output
+
+
+def test_main_must_go_through_typer_for_options_and_other_backends(monkeypatch):
+    store_board("personal", "my first task")
+
+    with pytest.raises(SystemExit) as excinfo:
+        main(["--backend", "sqlite", "board:count"])
+    assert excinfo.value.code == 0
+
+    monkeypatch.setenv("WHATTODO_BACKEND", "sqlite")
+    with pytest.raises(SystemExit) as excinfo:
+        main(["board:ls"])
+    assert excinfo.value.code == 1
+
+
+def test_main_must_count_the_tasks_held_by_a_running_daemon(start_daemon, capsys):
+    store_board("personal", "my first task")
+    start_daemon()
+    request("apply", {"op": "add", "task": Task("held task").to_dict()})
+
+    main(["board:count"])
+
+    assert capsys.readouterr().out == "The board 'personal' currently have 2 tasks\n"
+
+
+@pytest.mark.slow
+def test_board_count_must_start_within_the_budget():
+    store_board("personal", "my first task", "my second task")
+
+    output, modules, total = min(
+        (run_with_importtime("board:count") for _ in range(3)),
+        key=lambda run: run[2],
+    )
+
+    assert output == "The board 'personal' currently have 2 tasks\n"
+    assert not modules.intersection(HEAVY_MODULES)
+    assert total < STARTUP_BUDGET
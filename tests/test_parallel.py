@@ -0,0 +1,52 @@
+import pytest
+
+from tests.conftest import make_task_dict
+from whattodo import parallel
+from whattodo.api.board import Board
+from whattodo.file_storage import append_records
+from whattodo.file_storage import read_from_json
+from whattodo.parallel import read_board_in_parallel
+
+
+@pytest.fixture(autouse=True)
+def parallel_threshold(monkeypatch):
+    monkeypatch.setattr(parallel, "PARALLEL_THRESHOLD", 5)
+
+
+def test_read_board_in_parallel_must_read_like_read_from_json(segmented_board):
+    board = read_board_in_parallel(workers=2)
+
+    assert board.to_dict() == Board.from_dict(read_from_json()).to_dict()
+    assert [task.id for task in board.query(status="done")] == [2, 4, 6]
+
+
+def test_read_board_in_parallel_must_apply_the_pending_journal(segmented_board):
+    append_records(
+        [
+            {"op": "update", "id": 2, "status": True},
+            {"op": "remove", "id": 4},
+            {"op": "update", "id": 4, "status": True},
+            {"op": "add", "task": make_task_dict("task 8")},
+        ]
+    )
+
+    board = read_board_in_parallel(workers=2)
+
+    assert board.to_dict() == Board.from_dict(read_from_json()).to_dict()
+    assert board.pop_changes() == []
+
+
+@pytest.mark.parametrize("workers, threshold", [(1, 5), (2, 100)])
+def test_read_board_in_parallel_must_fall_back_to_serial_decoding(
+    segmented_board, monkeypatch, workers, threshold
+):
+    monkeypatch.setattr(parallel, "PARALLEL_THRESHOLD", threshold)
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", None)
+
+    board = read_board_in_parallel(workers=workers)
+
+    assert board.count_tasks == 7
+
+
+def test_read_board_in_parallel_must_return_none_when_no_board_is_stored():
+    assert read_board_in_parallel(workers=2) is None
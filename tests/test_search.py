@@ -0,0 +1,40 @@
+import pytest
+
+from whattodo.search import compile_query
+from whattodo.search import parse_query
+from whattodo.search import tokenize
+
+
+@pytest.mark.smoke
+def test_tokenize_must_split_case_folded_words():
+    assert tokenize("Buy MILK, eggs & Straße") == ["buy", "milk", "eggs", "strasse"]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("milk", [[("milk", False)]]),
+        ("buy Milk", [[("buy", False), ("milk", False)]]),
+        ("buy AND milk", [[("buy", False), ("milk", False)]]),
+        ("milk OR eggs", [[("milk", False)], [("eggs", False)]]),
+        ("egg*", [[("egg", True)]]),
+        ("e-mail*", [[("e", False), ("mail", True)]]),
+        ("OR milk OR", [[("milk", False)]]),
+    ],
+)
+def test_parse_query(query, expected):
+    assert parse_query(query) == expected
+
+
+@pytest.mark.parametrize("query", ["", "   ", "OR", "* ,"])
+def test_parse_query_must_raise_value_error_given_no_terms(query):
+    with pytest.raises(ValueError):
+        parse_query(query)
+
+
+def test_compile_query_must_select_prefixes_as_a_term_range():
+    sql, parameters = compile_query("buy egg* OR milk")
+
+    assert sql.count("INTERSECT") == 1
+    assert sql.count("UNION") == 1
+    assert parameters == ["buy", "egg", "egh", "milk"]
@@ -0,0 +1,347 @@
+import os
+import sqlite3
+
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import make_task_dict
+from whattodo.sqlite_storage import DATABASE_FILE
+from whattodo.sqlite_storage import apply_record
+from whattodo.sqlite_storage import apply_records
+from whattodo.sqlite_storage import connect
+from whattodo.sqlite_storage import count_tasks
+from whattodo.sqlite_storage import iter_tasks
+from whattodo.sqlite_storage import migrate_from_json
+from whattodo.sqlite_storage import query_tasks
+from whattodo.sqlite_storage import read_board_name
+from whattodo.sqlite_storage import read_from_sqlite
+from whattodo.sqlite_storage import read_revision
+from whattodo.sqlite_storage import retrieve_task
+from whattodo.sqlite_storage import retrieve_task_by_id
+from whattodo.sqlite_storage import search_tasks
+from whattodo.sqlite_storage import store_to_sqlite
+
+
+@pytest.fixture(scope="function")
+def stored_board():
+    board_dict = {
+        "version": 3,
+        "name": "personal",
+        "next_id": 3,
+        "tasks": [
+            make_task_dict("first", task_id=1),
+            make_task_dict("second", task_id=2),
+        ],
+    }
+    store_to_sqlite(board_dict)
+    return board_dict
+
+
+@pytest.mark.smoke
+def test_read_from_sqlite_must_return_none_when_no_board_is_stored():
+    assert read_from_sqlite() is None
+    assert read_board_name() is None
+
+
+def test_readers_must_not_create_the_database():
+    assert read_revision() is None
+    assert count_tasks() == 0
+    assert not list(iter_tasks())
+    assert not list(query_tasks(status="done"))
+    assert search_tasks("milk") == []
+    with pytest.raises(ValueError):
+        retrieve_task(0)
+    with pytest.raises(ValueError):
+        retrieve_task_by_id(1)
+
+    assert not os.path.exists(DATABASE_FILE)
+
+
+def test_store_to_sqlite_must_round_trip_the_board(stored_board):
+    assert read_from_sqlite() == stored_board
+
+
+def test_store_to_sqlite_must_replace_the_previous_board(stored_board):
+    store_to_sqlite({"version": 3, "name": "work", "next_id": 1, "tasks": []})
+
+    assert read_from_sqlite() == {
+        "version": 3,
+        "name": "work",
+        "next_id": 3,
+        "tasks": [],
+    }
+
+
+def test_connect_must_use_wal_mode():
+    store_to_sqlite({"name": "personal", "tasks": []})
+
+    with connect() as connection:
+        journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+
+    assert journal_mode == "wal"
+
+
+def test_tasks_must_be_indexed_on_status_and_created_at():
+    with connect() as connection:
+        indexes = {row[1] for row in connection.execute("PRAGMA index_list('tasks')")}
+
+    assert {"tasks_status", "tasks_created_at"} <= indexes
+
+
+def test_count_tasks(stored_board):
+    assert count_tasks() == 2
+
+
+def test_retrieve_task_must_retrieve_the_correct_task(stored_board):
+    assert retrieve_task(0) == make_task_dict("first", task_id=1)
+    assert retrieve_task(1) == make_task_dict("second", task_id=2)
+
+
+def test_retrieve_task_by_id_must_retrieve_the_correct_task(stored_board):
+    assert retrieve_task_by_id(2) == make_task_dict("second", task_id=2)
+
+    with pytest.raises(IndexError) as excinfo:
+        retrieve_task_by_id(3)
+
+    assert excinfo.value.args[0] == "No tasks found with the id 3"
+
+
+def test_retrieve_task_must_raise_value_error_when_no_tasks_are_on_board():
+    store_to_sqlite({"name": "personal", "tasks": []})
+
+    with pytest.raises(ValueError) as excinfo:
+        retrieve_task(0)
+
+    assert excinfo.value.args[0] == "No tasks on this board!"
+
+
+def test_retrieve_task_must_count_negative_indexes_from_the_last_task(stored_board):
+    assert retrieve_task(-1) == make_task_dict("second", task_id=2)
+    assert retrieve_task(-2)["id"] == 1
+
+
+def test_apply_record_must_count_negative_indexes_from_the_last_task(stored_board):
+    apply_record({"op": "remove", "index": -1})
+
+    assert [task["id"] for task in read_from_sqlite()["tasks"]] == [1]
+
+
+@pytest.mark.parametrize("index", [2, -3])
+def test_retrieve_task_must_raise_index_error_given_invalid_index(stored_board, index):
+    with pytest.raises(IndexError) as excinfo:
+        retrieve_task(index)
+
+    assert excinfo.value.args[0] == f"No tasks found at the index {index}"
+
+
+def test_apply_record_must_add_tasks(stored_board):
+    apply_record({"op": "add", "task": make_task_dict("third")})
+
+    assert read_from_sqlite()["tasks"][-1] == make_task_dict("third", task_id=3)
+
+
+def test_apply_record_must_update_the_task_status(stored_board):
+    apply_record({"op": "update", "id": 2, "status": True})
+    apply_record({"op": "update", "index": 0, "status": True})
+
+    assert retrieve_task(1) == make_task_dict("second", status=True, task_id=2)
+    assert retrieve_task(0) == make_task_dict("first", status=True, task_id=1)
+
+
+@pytest.mark.parametrize(
+    "record", [{"op": "remove", "id": 1}, {"op": "remove", "index": 0}]
+)
+def test_apply_record_must_remove_tasks(stored_board, record):
+    apply_record(record)
+
+    assert read_from_sqlite()["tasks"] == [make_task_dict("second", task_id=2)]
+
+
+def test_apply_record_must_not_give_the_id_of_a_removed_task_again(stored_board):
+    apply_record({"op": "remove", "id": 2})
+    apply_record({"op": "add", "task": make_task_dict("third")})
+
+    assert retrieve_task(1) == make_task_dict("third", task_id=3)
+
+
+def test_apply_record_must_clean_tasks(stored_board):
+    apply_record({"op": "clean"})
+
+    assert count_tasks() == 0
+
+
+@pytest.mark.parametrize("op", ["update", "remove"])
+@pytest.mark.parametrize("key", ["id", "index"])
+def test_apply_record_must_raise_index_error_given_invalid_index(stored_board, op, key):
+    with pytest.raises(IndexError):
+        apply_record({"op": op, key: 5, "status": True})
+
+    assert count_tasks() == 2
+
+
+def test_store_to_sqlite_must_upgrade_version_1_tasks():
+    legacy_task = {
+        "description": "first",
+        "status": False,
+        "created_at": "2020-12-26 00:00:00",
+    }
+
+    store_to_sqlite({"name": "personal", "tasks": [legacy_task]})
+
+    assert retrieve_task(0) == make_task_dict("first", task_id=1)
+
+
+def test_migrate_from_json(stored_board):
+    board_dict = {
+        "version": 3,
+        "name": "work",
+        "next_id": 8,
+        "tasks": [make_task_dict("imported", True, task_id=4)],
+    }
+
+    count = migrate_from_json(board_dict)
+
+    assert count == 1
+    assert read_from_sqlite() == board_dict
+
+
+@pytest.mark.parametrize(
+    "start, stop, expected", [(0, None, ["first", "second"]), (1, 2, ["second"])]
+)
+def test_iter_tasks_must_stream_the_requested_window(
+    stored_board, start, stop, expected
+):
+    result = iter_tasks(start, stop)
+
+    assert [task["description"] for task in result] == expected
+
+
+@pytest.fixture(scope="function")
+def searchable_board():
+    store_to_sqlite(
+        {
+            "version": 3,
+            "name": "personal",
+            "next_id": 5,
+            "tasks": [
+                make_task_dict("Buy milk", task_id=1),
+                make_task_dict("buy eggs and bread", task_id=2),
+                make_task_dict("Call the bank", task_id=3),
+                make_task_dict("Bake bread", task_id=4),
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("bread", [2, 4]),
+        ("BUY bread", [2]),
+        ("milk OR bank", [1, 3]),
+        ("ba*", [3, 4]),
+        ("b* bread", [2, 4]),
+        ("cheese", []),
+    ],
+)
+def test_search_tasks(searchable_board, query, expected):
+    assert [task["id"] for task in search_tasks(query)] == expected
+
+
+def test_search_tasks_must_return_up_to_the_limit(searchable_board):
+    assert [task["id"] for task in search_tasks("b*", limit=2)] == [1, 2]
+
+
+def test_search_tasks_must_read_only_the_postings_of_the_terms(searchable_board):
+    with connect() as connection:
+        plan = " ".join(
+            row[-1]
+            for row in connection.execute(
+                "EXPLAIN QUERY PLAN SELECT task_id FROM postings "
+                "WHERE term >= 'ba' AND term < 'bb'"
+            )
+        )
+
+    assert "SEARCH postings USING PRIMARY KEY" in plan
+
+
+def test_apply_records_must_keep_the_postings_up_to_date(searchable_board):
+    apply_records(
+        [
+            {"op": "add", "task": make_task_dict("Buy cheese")},
+            {"op": "remove", "id": 1, "status": False},
+            {"op": "update", "id": 2, "status": True, "previous": False},
+        ]
+    )
+
+    assert [task["id"] for task in search_tasks("buy")] == [2, 5]
+    assert search_tasks("milk") == []
+    apply_record({"op": "clean"})
+    with connect() as connection:
+        assert connection.execute("SELECT COUNT(*) FROM postings").fetchone()[0] == 0
+
+
+def test_apply_records_must_move_the_board_to_the_given_revision(searchable_board):
+    assert read_revision() is None
+
+    apply_records([{"op": "add", "task": make_task_dict("Buy cheese")}], revision=3)
+
+    assert read_revision() == 3
+
+
+def test_connect_must_index_databases_created_before_the_postings():
+    legacy_schema = """
+            CREATE TABLE board (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+            CREATE TABLE tasks (
+                id INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                created_at INTEGER NOT NULL,
+                utc_offset INTEGER NOT NULL
+            );
+            INSERT INTO board VALUES (0, 'personal');
+            INSERT INTO tasks VALUES (1, 'Buy milk', 0, 1608940800000000, 0);
+            """
+    with sqlite3.connect("whattodo_data.db") as connection:
+        connection.executescript(legacy_schema)
+    connection.close()
+
+    assert [task["id"] for task in search_tasks("milk")] == [1]
+    assert read_revision() is None
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({}, [1, 2, 3]),
+        ({"status": "done"}, [2]),
+        ({"since": datetime(2020, 12, 26, 0, 1)}, [2, 3]),
+        ({"until": datetime(2020, 12, 26, 0, 2)}, [1, 2]),
+        ({"order": "created_at desc"}, [3, 2, 1]),
+        ({"status": "not done", "order": "id desc", "start": 1}, [1]),
+    ],
+)
+def test_query_tasks(filters, expected):
+    store_to_sqlite(
+        {
+            "version": 3,
+            "name": "personal",
+            "next_id": 4,
+            "tasks": [
+                {**make_task_dict("first", task_id=1), "created_at": 1608940800000000},
+                {
+                    **make_task_dict("second", status=True, task_id=2),
+                    "created_at": 1608940860000000,
+                },
+                {**make_task_dict("third", task_id=3), "created_at": 1608940920000000},
+            ],
+        }
+    )
+
+    assert [task["id"] for task in query_tasks(**filters)] == expected
+
+
+def test_query_tasks_must_raise_value_error_given_an_invalid_order(stored_board):
+    with pytest.raises(ValueError):
+        query_tasks(order="description")
@@ -0,0 +1,119 @@
+import pytest
+
+from whattodo.api.board import Board
+from whattodo.api.task import Task
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import store_to_json
+from whattodo.timings import add_hook
+from whattodo.timings import collect
+from whattodo.timings import counted
+from whattodo.timings import phase
+from whattodo.timings import remove_hook
+from whattodo.timings import render
+from whattodo.timings import start_profiler
+
+
+def test_phase_must_only_be_timed_while_a_hook_is_added():
+    with phase("untimed") as record:
+        record["tasks"] = 2
+
+    assert record["wall"] == 0.0
+    assert record["started"] == 0.0
+
+
+def test_phase_must_call_the_hooks_with_its_record():
+    records = []
+    add_hook(records.append)
+    try:
+        with phase("outer") as outer:
+            outer["bytes_read"] = 10
+            with phase("inner"):
+                pass
+    finally:
+        remove_hook(records.append)
+
+    assert [record["name"] for record in records] == ["inner", "outer"]
+    assert [record["depth"] for record in records] == [1, 0]
+    assert records[1]["bytes_read"] == 10
+    assert records[1]["wall"] >= records[0]["wall"] > 0
+
+
+def test_phase_must_be_reported_when_the_block_raises():
+    with collect() as phases:
+        with pytest.raises(ValueError):
+            with phase("failing"):
+                raise ValueError("failed")
+
+    assert [record["name"] for record in phases] == ["failing"]
+
+
+def test_remove_hook_must_raise_value_error_for_unknown_hooks():
+    with pytest.raises(ValueError):
+        remove_hook(print)
+
+
+def test_collect_must_stop_collecting_after_the_block():
+    with collect() as phases:
+        with phase("collected"):
+            pass
+    with phase("ignored"):
+        pass
+
+    assert [record["name"] for record in phases] == ["collected"]
+
+
+def test_counted_must_count_the_consumed_tasks():
+    with phase("render") as record:
+        consumed = list(counted(["first", "second"], record))
+
+    assert consumed == ["first", "second"]
+    assert record["tasks"] == 2
+
+
+def test_render_must_list_the_phases_in_the_order_they_started():
+    with collect() as phases:
+        with phase("outer"):
+            with phase("inner") as record:
+                record["tasks"] = 3
+
+    rows = list(render(phases))
+
+    assert rows[0].split()[0] == "phase"
+    assert rows[1].startswith("outer ")
+    assert rows[2].startswith("  inner ")
+    assert rows[2].split()[-1] == "3"
+
+
+def test_storage_and_model_phases_must_count_bytes_and_tasks():
+    board = Board(name="personal")
+    board.add(Task("my first task"))
+    board.add(Task("my second task"))
+
+    with collect() as phases:
+        store_to_json(board.to_dict())
+        read_from_json()
+        Board.from_dict(read_from_json())
+    records = {record["name"]: record for record in phases}
+
+    assert records["Board.to_dict"]["tasks"] == 2
+    assert records["snapshot.write"]["bytes_written"] > 0
+    assert records["snapshot.read"]["bytes_read"] == (
+        records["snapshot.write"]["bytes_written"]
+    )
+    assert records["json.decode"]["tasks"] == 2
+    assert records["cache.write"]["bytes_written"] > 0
+    assert records["cache.read"]["tasks"] == 2
+    assert records["Board.from_dict"]["tasks"] == 2
+
+
+@pytest.mark.parametrize(
+    "memory, expected", [(False, "function calls"), (True, "Peak traced memory")]
+)
+def test_start_profiler_must_write_the_report(memory, expected, tmp_path):
+    report_path = tmp_path / "report.txt"
+
+    stop = start_profiler(str(report_path), memory=memory)
+    Board.from_dict({"name": "personal", "tasks": []})
+    stop()
+
+    assert expected in report_path.read_text()
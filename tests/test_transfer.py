@@ -0,0 +1,151 @@
+import io
+
+import pytest
+
+from freezegun.api import freeze_time
+
+from whattodo.api.task import Task
+from whattodo.transfer import TaskImport
+from whattodo.transfer import guess_format
+from whattodo.transfer import read_tasks
+from whattodo.transfer import write_tasks
+
+
+def _task(description, task_id=None, status=False):
+    return dict(Task(description).to_dict(), id=task_id, status=status)
+
+
+@pytest.mark.parametrize(
+    "file_name, expected_format",
+    [
+        ("tasks.csv", "csv"),
+        ("TASKS.CSV", "csv"),
+        ("tasks.jsonl", "jsonl"),
+        ("-", "jsonl"),
+    ],
+)
+def test_guess_format_must_read_the_extension(file_name, expected_format):
+    assert guess_format(file_name) == expected_format
+
+
+@pytest.mark.parametrize("file_format", ["jsonl", "csv"])
+def test_written_tasks_must_be_read_back(file_format):
+    tasks = [
+        _task("my first task", task_id=1),
+        _task('my "second", task', task_id=4, status=True),
+    ]
+    output = io.StringIO()
+
+    written = write_tasks(tasks, output, file_format)
+
+    assert written == 2
+    output.seek(0)
+    assert list(read_tasks(output, file_format)) == tasks
+
+
+@freeze_time("2026-01-01 12:00:00")
+def test_read_tasks_must_fill_in_missing_csv_columns():
+    lines = io.StringIO("description,status\nmy first task,done\nmy second task,\n")
+
+    tasks = list(read_tasks(lines, "csv"))
+
+    assert tasks == [
+        _task("my first task", status=True),
+        _task("my second task"),
+    ]
+
+
+def test_read_tasks_must_upgrade_iso_creation_dates():
+    lines = ['{"description": "old task", "created_at": "2020-12-26T15:13:45"}', ""]
+
+    tasks = list(read_tasks(lines, "jsonl"))
+
+    assert tasks == [
+        dict(
+            Task.from_dict(
+                {
+                    "description": "old task",
+                    "status": False,
+                    "created_at": "2020-12-26T15:13:45",
+                }
+            ).to_dict(),
+            id=None,
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    "lines, file_format, message",
+    [
+        (['{"description": "first"}', "{broken"], "jsonl", "Invalid record 2"),
+        (['{"status": true}'], "jsonl", "Invalid record 1"),
+        (["null"], "jsonl", "Invalid record 1"),
+        (["description,status\n", "first,maybe\n"], "csv", "Invalid status 'maybe'"),
+        (["id,description\n", "one,first\n"], "csv", "Invalid record 1"),
+        (["{}"], "xml", "Unknown format xml"),
+    ],
+)
+def test_read_tasks_must_reject_invalid_records(lines, file_format, message):
+    with pytest.raises(ValueError, match=message):
+        list(read_tasks(lines, file_format))
+
+
+def test_write_tasks_must_reject_unknown_formats():
+    with pytest.raises(ValueError, match="Unknown format xml"):
+        write_tasks([], io.StringIO(), "xml")
+
+
+def test_task_import_must_give_the_next_free_ids():
+    task_import = TaskImport({1: False}, next_id=3, on_conflict="skip")
+
+    records = [
+        *task_import.records(_task("without id")),
+        *task_import.records(_task("with id", task_id=7)),
+        *task_import.records(_task("after it")),
+    ]
+
+    assert [record["task"]["id"] for record in records] == [3, 7, 8]
+    assert task_import.imported == 3
+
+
+def test_task_import_must_skip_taken_ids():
+    task_import = TaskImport({1: False}, next_id=2, on_conflict="skip")
+
+    assert task_import.records(_task("taken", task_id=1)) == []
+    assert task_import.records(_task("duplicated", task_id=2)) != []
+    assert task_import.records(_task("duplicated again", task_id=2)) == []
+    assert (task_import.imported, task_import.skipped) == (1, 2)
+
+
+def test_task_import_must_replace_the_tasks_holding_taken_ids():
+    task_import = TaskImport({1: True}, next_id=2, on_conflict="replace")
+    dict_task = _task("replacing", task_id=1)
+
+    records = task_import.records(dict_task)
+
+    assert records == [
+        {"op": "remove", "id": 1, "status": True},
+        {"op": "add", "task": dict_task},
+    ]
+
+
+def test_task_import_must_give_new_ids_to_tasks_with_taken_ids():
+    task_import = TaskImport({1: False}, next_id=2, on_conflict="new-id")
+
+    dict_task = _task("moved", task_id=1)
+
+    records = task_import.records(dict_task)
+
+    assert records == [{"op": "add", "task": dict(dict_task, id=2)}]
+
+
+def test_task_import_must_fail_on_taken_ids():
+    task_import = TaskImport({1: False}, next_id=2, on_conflict="fail")
+
+    with pytest.raises(ValueError, match="The task id 1 is already taken"):
+        task_import.records(_task("taken", task_id=1))
+
+
+def test_task_import_must_reject_unknown_policies():
+    with pytest.raises(ValueError, match="Unknown conflict policy merge"):
+        TaskImport({}, next_id=1, on_conflict="merge")
@@ -0,0 +1,87 @@
+"""
+Entry point of the whattodo command.
+
+Shell prompts run the hot read-only commands on every prompt, so
+those are answered here from the board header and catalog without
+importing typer or the board api. Any other command, or one given
+options, goes through the typer app.
+"""
+
+import os
+import sys
+
+from contextlib import suppress
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from whattodo import client
+from whattodo.catalog import active_board_file
+from whattodo.catalog import read_catalog
+from whattodo.file_storage import read_header
+
+
+def _read_summary() -> Optional[Tuple[str, int]]:
+    """
+    Retrieves the board name and task count from the daemon when
+    it runs, or else from the header of the active board.
+    """
+    if client.is_running():
+        with suppress(ConnectionError):
+            summary = client.request("summary")
+            return (summary["name"], summary["count"]) if summary else None
+    header = read_header(active_board_file())
+    return (header["name"], header["count"]) if header else None
+
+
+def count_tasks() -> None:
+    """
+    Answers board:count.
+    """
+    summary = _read_summary()
+    if not summary:
+        print("There are no created boards yet!")
+    else:
+        name, count = summary
+        print(f"The board '{name}' currently have {count} tasks")
+
+
+def list_boards() -> None:
+    """
+    Answers board:ls.
+    """
+    catalog = read_catalog()
+    if not catalog["boards"]:
+        print("There are no created boards yet!")
+    for name in sorted(catalog["boards"]):
+        print(f"{'*' if name == catalog['active'] else ' '} {name}")
+
+
+FAST_COMMANDS: Dict[str, Callable[[], None]] = {
+    "board:count": count_tasks,
+    "board:ls": list_boards,
+}
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """
+    Runs the command given on ARGUMENTS, defaulting to the ones
+    of the process.
+
+        >>> main(["board:count"])
+        ... The board 'Personal' currently have 2 tasks
+    """
+    arguments = sys.argv[1:] if arguments is None else arguments
+    command = FAST_COMMANDS.get(arguments[0]) if len(arguments) == 1 else None
+    if command is not None and os.environ.get("WHATTODO_BACKEND", "json") == "json":
+        command()
+        return
+    from whattodo.cli import app  # pylint: disable=import-outside-toplevel
+
+    app(args=arguments, prog_name="whattodo")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,88 @@
 """Board API for whattodo project."""
 
+from array import array
+from datetime import datetime
+from itertools import chain
+from itertools import islice
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Optional
+from typing import Set
 from typing import Type
 from typing import TypedDict
 from typing import TypeVar
+from typing import Union
 
+from whattodo.api.query import QueryIndex
+from whattodo.api.query import parse_order
+from whattodo.api.query import parse_status
+from whattodo.api.query import to_epoch_microseconds
+from whattodo.api.segmented import SegmentedTasks
 from whattodo.api.task import Task
 from whattodo.api.task import TaskDict
+from whattodo.api.task_store import TaskStore
+from whattodo.api.task_store import TaskView
+from whattodo.timings import phase
 
 B = TypeVar("B", bound="Board")
 
+# Version 3 gives every task a stable id, version 2 stores creation
+# dates as epoch microseconds plus a UTC offset, version 1 (no "version"
+# key) as formatted strings.
+FORMAT_VERSION = 3
+
 BoardDict = TypedDict(
     "BoardDict",
-    {"name": str, "tasks": List[TaskDict]},
+    {"version": int, "name": str, "next_id": int, "tasks": List[TaskDict]},
+)
+
+# Records address tasks by id, journals written before format
+# version 3 by their 0 based index.
+JournalRecord = TypedDict(
+    "JournalRecord",
+    {
+        "op": str,
+        "task": TaskDict,
+        "id": int,
+        "index": int,
+        "status": bool,
+        "previous": bool,
+    },
+    total=False,
 )
 
 
-class Board:
+def assign_task_ids(dict_board) -> None:
+    """
+    Gives ids to the tasks of a board dict that lack one, in the
+    order they were added, like Board.from_dict does.
+
+        >>> dict_board = {"version": 2, "name": "Personal", "tasks": [...]}
+        >>> assign_task_ids(dict_board)
+        >>> [dict_task["id"] for dict_task in dict_board["tasks"]]
+        ... [1, 2]
+    """
+    tasks = dict_board["tasks"]
+    next_id = max(
+        dict_board.get("next_id", 1),
+        max((dict_task.get("id") or 0 for dict_task in tasks), default=0) + 1,
+    )
+    for dict_task in tasks:
+        if dict_task.get("id") is None:
+            dict_task["id"] = next_id
+            next_id += 1
+    dict_board["next_id"] = next_id
+
+
+class Board:  # pylint: disable=too-many-public-methods
     """
     Board representation that will hold tasks.
     """
 
-    def __init__(self, name):
+    def __init__(self, name, columnar: bool = False):
         """
         >>> board = Board(name="Personal")
         >>> board.add(first_task)
@@ -30,9 +91,29 @@ class Board:
         ... Personal
         ... =============================================================================
         ... my first task                                    ✘        2020-12-25 00:00:00
+
+        Very large boards can keep their tasks in a compact
+        TaskStore instead of a list of Task objects.
+
+        >>> board = Board(name="Personal", columnar=True)
+
+        Tasks get an id when added, which is never given again.
+
+        >>> board.retrieve_task_by_id(first_task.id)
         """
         self._name = name
-        self._tasks: List[Task] = []
+        self._tasks: Union[List[Task], TaskStore, SegmentedTasks] = []
+        if columnar:
+            self._tasks = TaskStore()
+            self._tasks._board = self  # pylint: disable=protected-access
+        self._changes: List[JournalRecord] = []
+        # Task positions by id. Removed tasks are left in place until
+        # their positions are compacted, so removing costs O(1).
+        self._index: Dict[int, int] = {}
+        self._removed: Set[int] = set()
+        self._next_id = 1
+        # Built on the first query, then kept up to date by every change.
+        self._query_index: Optional[QueryIndex] = None
 
     @property
     def name(self) -> str:
@@ -44,45 +125,144 @@ class Board:
     @property
     def tasks(self):
         """
-        Retrieves the tasks repository.
+        Retrieves the tasks repository, without the removed tasks.
         """
+        self._compact()
         return self._tasks
 
     @tasks.setter
-    def tasks(self, tasks: List) -> None:
+    def tasks(self, tasks: Union[List, TaskStore]) -> None:
         """
         Sets the tasks repository.
         """
         self._tasks = tasks
+        self._removed = set()
+        self._query_index = None
+        self._index_tasks()
 
     def add(self, task: Task):
         """
-        Adds a Task object to the board.
+        Adds a Task object to the board, giving it an id unless
+        it has one no other task of the board has.
         """
-        self._tasks.append(task)
+        self._materialize()
+        task_id = task.id
+        if task_id is None or task_id in self._index:
+            task_id = self._next_id
+        self._next_id = max(self._next_id, task_id + 1)
+        # pylint: disable=protected-access
+        task._id = task_id
+        self._index[task_id] = len(self._tasks)
+        self._tasks.append(task)  # type: ignore[union-attr]
+        if not isinstance(self._tasks, TaskStore):
+            task._board = self
+        dict_task = task.to_dict()
+        if self._query_index is not None:
+            self._query_index.add(task_id, dict_task["created_at"], dict_task["status"])
+        self._changes.append({"op": "add", "task": dict_task})
+
+    def pop_changes(self) -> List[JournalRecord]:
+        """
+        Retrieves the journal records of every change made since
+        the board was loaded or its changes were last popped, so
+        only those need to be persisted.
+
+            >>> board.retrieve_task_by_id(1).status = "done"
+            >>> board.pop_changes()
+            ... [{"op": "update", "id": 1, "status": True, "previous": False}]
+            >>> board.pop_changes()
+            ... []
+        """
+        changes, self._changes = self._changes, []
+        return changes
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        order: str = "id",
+    ) -> Iterator[Union[Task, TaskView]]:
+        """
+        Retrieves the tasks with STATUS created from SINCE up to, but
+        excluding, UNTIL, sorted by ORDER, "id" or "created_at" with an
+        optional "asc" or "desc" direction. Dates without a timezone
+        are local ones.
+
+        Queries are answered from indexes by creation date and status,
+        built on the first query and kept up to date by every change,
+        so a time window costs O(log n + k).
+
+            >>> board.query(status="done", since=datetime(2026, 1, 1))
+            >>> board.query(order="created_at desc")
+
+        @raises ValueError: When the status or order is invalid.
+        """
+        field, descending = parse_order(order)
+        self._materialize()
+        if self._query_index is None:
+            self._query_index = self._build_query_index()
+        ids = self._query_index.select(
+            status=None if status is None else parse_status(status),
+            since=None if since is None else to_epoch_microseconds(since),
+            until=None if until is None else to_epoch_microseconds(until),
+            order=field,
+            descending=descending,
+        )
+        return (self._tasks[self._index[task_id]] for task_id in ids)
 
     @property
     def list_tasks(self) -> str:
         """
         Lists all tasks in a string representation.
         """
-        task_representation = ""
-        if not self._tasks:
-            return f"""
+        with phase("Board.list_tasks") as record:
+            record["tasks"] = len(self.tasks)
+            return "".join(self.render(self._name, self.tasks))
+
+    def iter_list_tasks(self, start: int = 0, stop: Optional[int] = None):
+        """
+        Lists the tasks between the 0 based START and STOP
+        indexes, yielding one row at a time. Lazy boards only load
+        the segments holding those tasks.
+        """
+        tasks = self.tasks
+        if isinstance(tasks, SegmentedTasks):
+            return self.render(self._name, tasks.iter_range(start, stop))
+        return self.render(self._name, islice(tasks, start, stop))
+
+    @staticmethod
+    def render(name: str, tasks: Iterable[Union[Task, TaskView]]) -> Iterator[str]:
+        """
+        Renders a board representation one row at a time, so rows
+        can be written out while the remaining tasks are produced.
+
+            >>> "".join(Board.render("Personal", tasks))
+            ... =============================================================================
+            ... Personal
+            ... =============================================================================
+            ... 1  my first task                                    ✘        2020-12-25 00:00:00
+        """
+        tasks = iter(tasks)
+        first_task = next(tasks, None)
+        if first_task is None:
+            yield f"""
             =============================================================================\n
-            {self._name}\n
+            {name}\n
             =============================================================================\n
             No tasks on this board!
             """
-        for task in self._tasks:
-            task_representation += f"""
-            {task.description}                                    {task.status}        {task.created_at}\n
-            """
-        return f"""
+            return
+        yield f"""
         =============================================================================\n
-        {self._name}\n
+        {name}\n
         =============================================================================\n
-        {task_representation}
+        """
+        for task in chain((first_task,), tasks):
+            yield f"""
+            {task.id}  {task.description}                                    {task.status}        {task.created_at}\n
+            """
+        yield """
         """
 
     @property
@@ -90,7 +270,14 @@ class Board:
         """
         Counts the number of tasks.
         """
-        return len(self._tasks)
+        return len(self._tasks) - len(self._removed)
+
+    @property
+    def next_id(self) -> int:
+        """
+        Retrieves the id the next added task gets.
+        """
+        return self._next_id
 
     def retrieve_task(self, index: int):
         """
@@ -101,13 +288,31 @@ class Board:
         @raises IdexError: When the given index doesn't have a task.
         """
 
-        if not self._tasks:
+        tasks = self.tasks
+        if not tasks:
             raise ValueError("No tasks on this board!")
         try:
-            return self._tasks[index]
+            return tasks[index]
         except IndexError as excinfo:
             raise IndexError(f"No tasks found at the index {index}") from excinfo
 
+    def retrieve_task_by_id(self, task_id: int):
+        """
+        Retrieves a task given it's id.
+
+        @raises ValueError: When no tasks are present on the board.
+
+        @raises IdexError: When no task has the given id.
+        """
+
+        if not self.count_tasks:
+            raise ValueError("No tasks on this board!")
+        self._materialize()
+        try:
+            return self._tasks[self._index[task_id]]
+        except KeyError as excinfo:
+            raise IndexError(f"No tasks found with the id {task_id}") from excinfo
+
     def remove_task(self, index: int) -> None:
         """
         Removes a task given it's 0 based index.
@@ -117,36 +322,259 @@ class Board:
         @raises IdexError: When the given index doesn't have a task.
         """
 
-        if not self._tasks:
-            raise ValueError("No tasks on this board!")
-        try:
-            self._tasks.pop(index)
-        except IndexError as excinfo:
-            raise IndexError(f"No tasks found at the index {index}") from excinfo
+        self.remove_task_by_id(self.retrieve_task(index).id)
+
+    def remove_task_by_id(self, task_id: int) -> None:
+        """
+        Removes a task given it's id.
+
+        @raises ValueError: When no tasks are present on the board.
+
+        @raises IdexError: When no task has the given id.
+        """
+
+        self._drop_task(task_id)
+        if self._query_index is not None:
+            self._query_index.remove(task_id)
+
+    def has_task(self, task_id: int) -> bool:
+        """
+        Checks if a task has the given id.
+        """
+        self._materialize()
+        return task_id in self._index
+
+    def remove_many(self, task_ids: Iterable[int]) -> int:
+        """
+        Removes the tasks with the given ids, returning how many were
+        removed. Every id is checked before any task is removed, and
+        each removal costs O(1) plus a single pass over the query index,
+        so removing k tasks costs O(k + n) rather than O(k * n).
+
+            >>> board.remove_many([3, 5, 9])
+            ... 3
+
+        @raises ValueError: When no tasks are present on the board.
+
+        @raises IdexError: When no task has one of the given ids.
+        """
+        unique_ids = list(dict.fromkeys(task_ids))
+        for task_id in unique_ids:
+            self.retrieve_task_by_id(task_id)
+        for task_id in unique_ids:
+            self._drop_task(task_id)
+        if self._query_index is not None:
+            self._query_index.remove_many(set(unique_ids))
+        return len(unique_ids)
+
+    def remove_where(self, predicate: Callable[[Union[Task, TaskView]], bool]) -> int:
+        """
+        Removes the tasks matching the predicate in a single pass,
+        returning how many were removed.
+
+            >>> board.remove_where(lambda task: "groceries" in task.description)
+            ... 2
+        """
+        return self.remove_many([task.id for task in self.tasks if predicate(task)])
+
+    def update_status_many(self, task_ids: Iterable[int], status: str) -> int:
+        """
+        Updates the tasks with the given ids to STATUS, "done" or
+        "not done", returning how many distinct tasks changed. Every
+        id is checked before any task is updated.
+
+            >>> board.update_status_many(range(9, 121), "done")
+            ... 112
+
+        @raises ValueError: When the status is invalid or no tasks are
+        present on the board.
+
+        @raises IdexError: When no task has one of the given ids.
+        """
+        parse_status(status)
+        tasks = {task_id: self.retrieve_task_by_id(task_id) for task_id in task_ids}
+        changed = 0
+        for task in tasks.values():
+            previous = task.status
+            task.status = status
+            changed += task.status != previous
+        return changed
+
+    def archive_done(self, before: Optional[datetime] = None) -> List[TaskDict]:
+        """
+        Removes every done task created before the given date, if
+        any, returning them so they can be kept out of the board.
+
+            >>> [dict_task["description"] for dict_task in board.archive_done()]
+            ... ["my first task"]
+        """
+        done = [task.to_dict() for task in self.query(status="done", until=before)]
+        self.remove_many(dict_task["id"] for dict_task in done)  # type: ignore[misc]
+        return done
 
     def clean_tasks(self) -> None:
         """
         Removes all tasks from the board.
         """
-        self.tasks = []
+        if isinstance(self._tasks, TaskStore):
+            self._tasks.clear()
+        else:
+            # Segments of a lazy board that weren't loaded stay so.
+            if isinstance(self._tasks, list):
+                for task in self._tasks:
+                    task._board = None  # pylint: disable=protected-access
+            self._tasks = []
+        self._index = {}
+        self._removed = set()
+        self._query_index = None
+        # Cleaning supersedes every change made before it.
+        self._changes = [{"op": "clean"}]
+
+    def _drop_task(self, task_id: int) -> None:
+        """
+        Removes a task given it's id, leaving the query index alone.
+        """
+        removed = self.retrieve_task_by_id(task_id)
+        self._removed.add(self._index.pop(task_id))
+        if isinstance(removed, Task):
+            removed._board = None  # pylint: disable=protected-access
+        self._changes.append(
+            {"op": "remove", "id": task_id, "status": removed.to_dict()["status"]}
+        )
+
+    def _track_update(self, task_id: int, previous: bool) -> None:
+        """
+        Records a status change of the task with the given id.
+        """
+        if self._query_index is not None:
+            self._query_index.update(task_id, not previous)
+        self._changes.append(
+            {
+                "op": "update",
+                "id": task_id,
+                "status": not previous,
+                "previous": previous,
+            }
+        )
+
+    def _materialize(self) -> None:
+        """
+        Loads every segment of a lazy board, for the operations
+        needing the ids of all its tasks.
+        """
+        if isinstance(self._tasks, SegmentedTasks):
+            self._tasks = list(self._tasks)
+            self._index_tasks()
+
+    def _compact(self) -> None:
+        """
+        Drops the removed tasks, shifting the positions of the
+        remaining ones.
+        """
+        if not self._removed:
+            return
+        if isinstance(self._tasks, TaskStore):
+            self._tasks.discard(self._removed)
+        else:
+            self._tasks = [
+                task
+                for position, task in enumerate(self._tasks)
+                if position not in self._removed
+            ]
+        self._removed = set()
+        self._index_tasks()
+
+    def _build_query_index(self) -> QueryIndex:
+        tasks = self.tasks
+        # pylint: disable=protected-access
+        if isinstance(tasks, TaskStore):
+            return QueryIndex.build(
+                zip(
+                    tasks._ids,
+                    tasks._created_at,
+                    (tasks._get_status(index) for index in range(len(tasks))),
+                )
+            )
+        dict_tasks = (task.to_dict() for task in tasks)
+        return QueryIndex.build(
+            (dict_task["id"], dict_task["created_at"], dict_task["status"])
+            for dict_task in dict_tasks
+        )
+
+    def _index_tasks(self) -> None:
+        """
+        Maps the task ids to their positions, giving ids in order
+        to the tasks stored before format version 3.
+        """
+        # pylint: disable=protected-access
+        if isinstance(self._tasks, TaskStore):
+            ids = self._tasks._ids
+        else:
+            ids = array("q", (task._id or 0 for task in self._tasks))
+        self._next_id = max(self._next_id, max(ids, default=0) + 1)
+        for position, task_id in enumerate(ids):
+            if not task_id:
+                ids[position] = self._next_id
+                if not isinstance(self._tasks, TaskStore):
+                    self._tasks[position]._id = self._next_id
+                self._next_id += 1
+        self._index = {task_id: position for position, task_id in enumerate(ids)}
 
     @classmethod
-    def from_dict(cls: Type[B], dict_board) -> B:
+    def from_dict(
+        cls: Type[B], dict_board, columnar: bool = False, lazy: bool = False
+    ) -> B:
         """
-        Returns a board object created from a dict.
+        Returns a board object created from a dict of any
+        format version.
+
+        LAZY boards keep tasks given as SegmentedTasks, only loading
+        the segments holding the tasks accessed by position, until
+        an operation needs the ids of every task.
+
+            >>> board = Board.from_dict(read_lazily_from_json(), lazy=True)
+            >>> board.retrieve_task(-1)
+
+        COLUMNAR boards take tasks already given as a TaskStore as is.
         """
-        board = cls(name=dict_board["name"])
-        board._tasks = [  # pylint: disable=protected-access
-            Task.from_dict(dict_task) for dict_task in dict_board["tasks"]
-        ]
+        with phase("Board.from_dict") as record:
+            board = cls(name=dict_board["name"], columnar=columnar)
+            # pylint: disable=protected-access
+            if lazy and isinstance(dict_board["tasks"], SegmentedTasks):
+                board._tasks = dict_board["tasks"]
+                board._tasks._board = board
+                board._next_id = dict_board["next_id"]
+                return board
+            if columnar:
+                tasks = dict_board["tasks"]
+                if not isinstance(tasks, TaskStore):
+                    tasks = TaskStore.from_dicts(tasks)
+                board._tasks = tasks
+                board._tasks._board = board
+            else:
+                board._tasks = [
+                    Task.from_dict(dict_task) for dict_task in dict_board["tasks"]
+                ]
+                for task in board._tasks:
+                    task._board = board
+            board._next_id = dict_board.get("next_id", 1)
+            board._index_tasks()
+            record["tasks"] = len(board._tasks)
         return board
 
     def to_dict(self) -> BoardDict:
         """
-        Parses the board to a dict.
+        Parses the board to a dict on the current format version.
         """
-        parsed_tasks = [task.to_dict() for task in self.tasks] if self.tasks else []
-        return {"name": self.name, "tasks": parsed_tasks}
+        with phase("Board.to_dict") as record:
+            parsed_tasks = [task.to_dict() for task in self.tasks] if self.tasks else []
+            record["tasks"] = len(parsed_tasks)
+        return {
+            "version": FORMAT_VERSION,
+            "name": self.name,
+            "next_id": self._next_id,
+            "tasks": parsed_tasks,
+        }
 
     def __repr__(self) -> str:
         return f"<Board {self._name} >"
@@ -0,0 +1,192 @@
+"""Secondary indexes answering board queries by status and creation date."""
+
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from whattodo.api.task import encode_created_at
+
+ORDER_FIELDS = ("id", "created_at")
+
+STATUSES = {"done": True, "not done": False}
+
+
+def parse_order(order: str) -> Tuple[str, bool]:
+    """
+    Parses an order made of a field and an optional direction,
+    returning the field and whether it is descending.
+
+        >>> parse_order("created_at desc")
+        ... ("created_at", True)
+
+    @raises ValueError: When the field or direction is unknown.
+    """
+    field, *direction = order.split()
+    if field not in ORDER_FIELDS or direction not in ([], ["asc"], ["desc"]):
+        raise ValueError(
+            f"Invalid order '{order}', use one of {', '.join(ORDER_FIELDS)} "
+            "optionally followed by asc or desc"
+        )
+    return field, direction == ["desc"]
+
+
+def parse_status(status: str) -> bool:
+    """
+    Parses a status as given to Task.status.
+
+    @raises ValueError: When the status is neither done or not done.
+    """
+    try:
+        return STATUSES[status]
+    except KeyError as excinfo:
+        raise ValueError(
+            f"Invalid status '{status}', use done or not done"
+        ) from excinfo
+
+
+def to_epoch_microseconds(moment: datetime) -> int:
+    """
+    Encodes a date like task creation dates are stored, taking
+    dates without a timezone as local ones.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return encode_created_at(moment)[0]
+
+
+class QueryIndex:
+    """
+    Indexes of the tasks of a board by creation date and status,
+    keyed on task ids so they survive position shifts.
+
+    Creation dates are kept sorted in an integer array alongside
+    the task ids, so a time window is found with two binary searches
+    and read in O(log n + k). Every status keeps the set of its ids.
+
+        >>> index = QueryIndex.build([(1, 1608940800000000, False)])
+        >>> index.select(status=False, since=1608940800000000)
+        ... [1]
+    """
+
+    __slots__ = ("_created_at", "_ids", "_keys", "_statuses")
+
+    def __init__(self) -> None:
+        self._created_at = array("q")
+        self._ids = array("q")
+        self._keys: Dict[int, int] = {}
+        self._statuses: Dict[bool, Set[int]] = {True: set(), False: set()}
+
+    @classmethod
+    def build(cls, tasks: Iterable[Tuple[int, int, bool]]) -> "QueryIndex":
+        """
+        Returns an index over tasks given as their id, creation
+        date in epoch microseconds and status.
+        """
+        index = cls()
+        for task_id, created_at, status in tasks:
+            index._keys[task_id] = created_at
+            index._statuses[status].add(task_id)
+        entries = sorted(
+            (created_at, task_id) for task_id, created_at in index._keys.items()
+        )
+        index._created_at = array("q", (created_at for created_at, _ in entries))
+        index._ids = array("q", (task_id for _, task_id in entries))
+        return index
+
+    def add(self, task_id: int, created_at: int, status: bool) -> None:
+        """
+        Indexes a task. Tasks are mostly added in creation order,
+        which only appends to the creation date array.
+        """
+        position = bisect_right(self._created_at, created_at)
+        self._created_at.insert(position, created_at)
+        self._ids.insert(position, task_id)
+        self._keys[task_id] = created_at
+        self._statuses[status].add(task_id)
+
+    def remove(self, task_id: int) -> None:
+        """
+        Drops a task from the indexes.
+        """
+        created_at = self._keys.pop(task_id)
+        position = bisect_left(self._created_at, created_at)
+        while self._ids[position] != task_id:
+            position += 1
+        del self._created_at[position]
+        del self._ids[position]
+        self._statuses[True].discard(task_id)
+        self._statuses[False].discard(task_id)
+
+    def remove_many(self, task_ids: Set[int]) -> None:
+        """
+        Drops many tasks from the indexes in a single pass over the
+        creation date array, rather than one shift of it per task.
+        """
+        for task_id in task_ids:
+            del self._keys[task_id]
+        self._statuses[True] -= task_ids
+        self._statuses[False] -= task_ids
+        kept = [
+            position
+            for position, task_id in enumerate(self._ids)
+            if task_id not in task_ids
+        ]
+        self._created_at = array("q", (self._created_at[position] for position in kept))
+        self._ids = array("q", (self._ids[position] for position in kept))
+
+    def update(self, task_id: int, status: bool) -> None:
+        """
+        Moves a task to the ids of its new status.
+        """
+        self._statuses[not status].discard(task_id)
+        self._statuses[status].add(task_id)
+
+    def select(
+        self,
+        status: Optional[bool] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        order: str = "id",
+        descending: bool = False,
+    ) -> List[int]:
+        """
+        Retrieves the ids of the tasks with STATUS created from SINCE
+        up to, but excluding, UNTIL, both in epoch microseconds, sorted
+        by ORDER. Only the smallest of the time window and the status
+        ids is read.
+        """
+        start = 0 if since is None else bisect_left(self._created_at, since)
+        stop = len(self._ids) if until is None else bisect_left(self._created_at, until)
+        ids: List[int]
+        if status is None or stop - start <= len(self._statuses[status]):
+            ids = self._ids[start:stop].tolist()
+            if status is not None:
+                ids = [task_id for task_id in ids if task_id in self._statuses[status]]
+            windowed = True
+        else:
+            ids = [
+                task_id
+                for task_id in self._statuses[status]
+                if (since is None or self._keys[task_id] >= since)
+                and (until is None or self._keys[task_id] < until)
+            ]
+            windowed = False
+        if order == "id":
+            ids.sort(reverse=descending)
+        elif not windowed:
+            ids.sort(key=lambda task_id: (self._keys[task_id], task_id))
+            if descending:
+                ids.reverse()
+        elif descending:
+            ids.reverse()
+        return ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
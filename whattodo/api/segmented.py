@@ -0,0 +1,86 @@
+"""Lazily decoded task sequence of boards stored in segments."""
+
+from bisect import bisect_right
+from itertools import accumulate
+from itertools import islice
+from typing import TYPE_CHECKING
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from whattodo.api.task import Task
+from whattodo.api.task import TaskDict
+
+if TYPE_CHECKING:  # pragma: no cover
+    from whattodo.api.board import Board
+
+SegmentLoader = Callable[[], List[TaskDict]]
+
+
+class SegmentedTasks:
+    """
+    Sequence of the tasks of a board split in segments, each given
+    as its task count and a function loading its task dicts. A
+    segment is only loaded and decoded into Task objects when one
+    of its tasks is accessed.
+
+        >>> tasks = SegmentedTasks([(2, load_first_segment), (1, load_tail)])
+        >>> tasks[2].description
+        ... "my third task"
+        >>> tasks.loaded
+        ... 1
+    """
+
+    def __init__(self, segments: Sequence[Tuple[int, SegmentLoader]]):
+        self._loaders = [loader for _, loader in segments]
+        self._starts = [0, *accumulate(count for count, _ in segments)]
+        self._segments: Dict[int, List[Task]] = {}
+        self._board: Optional["Board"] = None
+
+    @property
+    def loaded(self) -> int:
+        """
+        Counts the segments loaded so far.
+        """
+        return len(self._segments)
+
+    def iter_range(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Task]:
+        """
+        Yields the tasks between the 0 based START and STOP indexes,
+        loading only the segments holding them.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        position = start
+        while position < stop:
+            segment = bisect_right(self._starts, position) - 1
+            offset = position - self._starts[segment]
+            tasks = self._segment(segment)
+            yield from islice(tasks, offset, offset + stop - position)
+            position = self._starts[segment + 1]
+
+    def _segment(self, segment: int) -> List[Task]:
+        if segment not in self._segments:
+            tasks = [
+                Task.from_dict(dict_task) for dict_task in self._loaders[segment]()
+            ]
+            for task in tasks:
+                task._board = self._board  # pylint: disable=protected-access
+            self._segments[segment] = tasks
+        return self._segments[segment]
+
+    def __len__(self) -> int:
+        return self._starts[-1]
+
+    def __getitem__(self, index: int) -> Task:
+        position = index + len(self) if index < 0 else index
+        if not 0 <= position < len(self):
+            raise IndexError("task index out of range")
+        segment = bisect_right(self._starts, position) - 1
+        return self._segment(segment)[position - self._starts[segment]]
+
+    def __iter__(self) -> Iterator[Task]:
+        return self.iter_range()
@@ -1,24 +1,106 @@
 """Task API for whattodo project."""
 
 from datetime import datetime
+from datetime import timedelta
+from typing import TYPE_CHECKING
+from typing import Optional
+from typing import Tuple
 from typing import Type
 from typing import TypedDict
 from typing import TypeVar
 
+if TYPE_CHECKING:  # pragma: no cover
+    from whattodo.api.board import Board
+
 T = TypeVar("T", bound="Task")
 
+DONE_SYMBOL = "ކ"
+NOT_DONE_SYMBOL = "✘"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
 TaskDict = TypedDict(
     "TaskDict",
+    {
+        "id": Optional[int],
+        "description": str,
+        "status": bool,
+        "created_at": int,
+        "utc_offset": int,
+    },
+)
+
+# Format version 1 stored the creation date as a DATE_FORMAT string.
+LegacyTaskDict = TypedDict(
+    "LegacyTaskDict",
     {"description": str, "status": bool, "created_at": str},
 )
 
 
-class Task:
+def encode_created_at(
+    created_at: datetime, utc_offset: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Encodes a local creation date as epoch microseconds and
+    the UTC offset in seconds. The local timezone offset is
+    used when none is given.
+
+        >>> encode_created_at(datetime(2020, 12, 26), utc_offset=-10800)
+        ... (1608951600000000, -10800)
+    """
+    if utc_offset is None:
+        offset = created_at.astimezone().utcoffset()
+        utc_offset = int(offset.total_seconds()) if offset else 0
+    wall_clock = (created_at - EPOCH) // ONE_MICROSECOND
+    return wall_clock - utc_offset * 1_000_000, utc_offset
+
+
+def decode_created_at(epoch_microseconds: int, utc_offset: int) -> datetime:
+    """
+    Decodes epoch microseconds and a UTC offset into the
+    local creation date.
+    """
+    return EPOCH + timedelta(microseconds=epoch_microseconds + utc_offset * 1_000_000)
+
+
+def upgrade_task_dict(dict_task) -> TaskDict:
+    """
+    Returns the current format representation of a task dict,
+    which lacks an id until a board gives it one.
+    """
+    if not isinstance(dict_task["created_at"], str):
+        return dict_task
+    created_at, utc_offset = encode_created_at(
+        datetime.fromisoformat(dict_task["created_at"])
+    )
+    return {
+        "id": dict_task.get("id"),
+        "description": dict_task["description"],
+        "status": dict_task["status"],
+        "created_at": created_at,
+        "utc_offset": utc_offset,
+    }
+
+
+class Task:  # pylint: disable=too-many-instance-attributes
     """
     Task representation that contains a description,
     status and creation date.
     """
 
+    __slots__ = (
+        "_id",
+        "_description",
+        "_status",
+        "_created_at",
+        "_epoch_microseconds",
+        "_utc_offset",
+        "_created_at_display",
+        "_board",
+    )
+
     def __init__(self, description: str):
         """
         Task usage
@@ -35,9 +117,28 @@ class Task:
             >>> task.description
             ... updated description
         """
+        # Given by the board the task is added to.
+        self._id: Optional[int] = None
         self._description: str = description
         self._status: bool = False
-        self._created_at: datetime = datetime.now()
+        self._created_at: Optional[datetime] = datetime.now()
+        self._epoch_microseconds: Optional[int] = None
+        self._utc_offset: Optional[int] = None
+        self._created_at_display: Optional[str] = None
+        # The board holding the task, which tracks its changes.
+        self._board: Optional["Board"] = None
+
+    @property
+    def id(self) -> Optional[int]:  # pylint: disable=invalid-name
+        """
+        Retrieves the task id, which stays the same while
+        other tasks are added or removed.
+
+            >>> board.add(task)
+            >>> task.id
+            ... 1
+        """
+        return self._id
 
     @property
     def description(self) -> str:
@@ -63,7 +164,7 @@ class Task:
         Retrieves an unicode character representing the
         task status.
         """
-        return "ކ" if self._status else "✘"
+        return DONE_SYMBOL if self._status else NOT_DONE_SYMBOL
 
     @status.setter
     def status(self, updated_status: str) -> None:
@@ -79,43 +180,75 @@ class Task:
             >>> task.status = "not done"
             ... ✘
         """
+        previous = self._status
         if updated_status == "done":
             self._status = True
         elif updated_status == "not done":
             self._status = False
+        if self._board is not None and self._status != previous:
+            # pylint: disable=protected-access
+            self._board._track_update(self._id, previous)  # type: ignore[arg-type]
 
     @property
     def created_at(self) -> str:
         """
         Retrieves the creation date of a task.
+        The string is built on first access and cached.
 
             >>> task.created_at
             ... 2020-12-25 00:00:00
         """
-        return self._created_at.strftime("%Y-%m-%d %H:%M:%S")
+        if self._created_at_display is None:
+            self._created_at_display = self._local_created_at().strftime(DATE_FORMAT)
+        return self._created_at_display
+
+    def _local_created_at(self) -> datetime:
+        if self._created_at is None:
+            self._created_at = decode_created_at(
+                self._epoch_microseconds, self._utc_offset  # type: ignore[arg-type]
+            )
+        return self._created_at
 
     @classmethod
     def from_dict(cls: Type[T], dict_task) -> T:
         """
-        Returns a board object created from a dict.
+        Returns a task object created from a dict, accepting
+        both format version 1 and 2 creation dates. Version 2
+        dates are only decoded when displayed.
         """
-        task = cls(
-            description=dict_task["description"]
-        )  # pylint: disable=protected-access
-        task._status = dict_task["status"]  # pylint: disable=protected-access
-        task._created_at = datetime.strptime(  # pylint: disable=protected-access
-            dict_task["created_at"], "%Y-%m-%d %H:%M:%S"
-        )
+        task = cls.__new__(cls)
+        # pylint: disable=protected-access
+        task._id = dict_task.get("id")
+        task._description = dict_task["description"]
+        task._status = dict_task["status"]
+        task._board = None
+        created_at = dict_task["created_at"]
+        if isinstance(created_at, str):
+            task._created_at = datetime.fromisoformat(created_at)
+            task._epoch_microseconds = None
+            task._utc_offset = None
+            task._created_at_display = created_at
+        else:
+            task._created_at = None
+            task._epoch_microseconds = created_at
+            task._utc_offset = dict_task["utc_offset"]
+            task._created_at_display = None
         return task
 
     def to_dict(self) -> TaskDict:
         """
-        Parses the board to a dict.
+        Parses the task to a dict on the current format version.
         """
+        if self._epoch_microseconds is None or self._utc_offset is None:
+            self._epoch_microseconds, self._utc_offset = encode_created_at(
+                self._local_created_at(), self._utc_offset
+            )
         return {
+            "id": self._id,
             "description": self._description,
             "status": self._status,
-            "created_at": self.created_at,
+            "created_at": self._epoch_microseconds,
+            "utc_offset": self._utc_offset,
         }
 
     def __str__(self) -> str:
@@ -0,0 +1,349 @@
+"""Columnar task storage for whattodo project."""
+
+from array import array
+from itertools import accumulate
+from typing import TYPE_CHECKING
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from whattodo.api.task import DATE_FORMAT
+from whattodo.api.task import DONE_SYMBOL
+from whattodo.api.task import NOT_DONE_SYMBOL
+from whattodo.api.task import Task
+from whattodo.api.task import TaskDict
+from whattodo.api.task import decode_created_at
+from whattodo.api.task import upgrade_task_dict
+
+if TYPE_CHECKING:  # pragma: no cover
+    from whattodo.api.board import Board
+
+# Ids, statuses, creation dates, UTC offsets, description lengths
+# and descriptions of the tasks of a store, as raw bytes.
+Columns = Tuple[bytes, bytes, bytes, bytes, bytes, bytes]
+
+
+class TaskStore:  # pylint: disable=too-many-instance-attributes
+    """
+    Compact sequence of tasks for very large boards.
+
+    Ids are kept in an integer array, 0 standing for a task without
+    an id yet. Statuses are kept in a bit array, creation dates as
+    epoch microseconds with their UTC offsets, and descriptions in a
+    single UTF-8 buffer addressed by offsets. Tasks are only
+    materialized as TaskView objects when accessed.
+
+        >>> store = TaskStore()
+        >>> store.append(Task("my first task"))
+        >>> store[0].description
+        ... "my first task"
+        >>> store[0].status = "done"
+        >>> store[0].status
+        ... ކ
+    """
+
+    __slots__ = (
+        "_ids",
+        "_statuses",
+        "_created_at",
+        "_utc_offsets",
+        "_offsets",
+        "_lengths",
+        "_descriptions",
+        "_board",
+    )
+
+    def __init__(self) -> None:
+        self._ids = array("q")
+        self._statuses = bytearray()
+        self._created_at = array("q")
+        self._utc_offsets = array("l")
+        self._offsets = array("q")
+        self._lengths = array("q")
+        self._descriptions = bytearray()
+        # The board holding the store, which tracks its changes.
+        self._board: Optional["Board"] = None
+
+    @classmethod
+    def from_dicts(cls, dict_tasks: Iterable[TaskDict]) -> "TaskStore":
+        """
+        Returns a store filled with tasks created from dicts.
+        """
+        store = cls()
+        for dict_task in dict_tasks:
+            dict_task = upgrade_task_dict(dict_task)
+            store._append(
+                dict_task.get("id") or 0,
+                dict_task["description"],
+                dict_task["status"],
+                dict_task["created_at"],
+                dict_task["utc_offset"],
+            )
+        return store
+
+    @classmethod
+    def from_columns(cls, parts: Iterable[Columns]) -> "TaskStore":
+        """
+        Returns a store holding the tasks of every part, in order,
+        each given as the columns of a store.
+
+            >>> store = TaskStore.from_columns([first.to_columns(), last.to_columns()])
+        """
+        store = cls()
+        statuses = 0
+        for ids, part_statuses, created_at, utc_offsets, lengths, descriptions in parts:
+            statuses |= int.from_bytes(part_statuses, "little") << len(store)
+            store._ids.frombytes(ids)
+            store._created_at.frombytes(created_at)
+            store._utc_offsets.frombytes(utc_offsets)
+            store._lengths.frombytes(lengths)
+            store._descriptions += descriptions
+        store._statuses = bytearray(statuses.to_bytes((len(store) + 7) // 8, "little"))
+        store._offsets = array("q", accumulate(store._lengths, initial=0))
+        store._offsets.pop()
+        return store
+
+    def to_columns(self) -> Columns:
+        """
+        Retrieves the columns of the store as raw bytes, cheap to send
+        to other processes, with descriptions in the order of the tasks.
+        """
+        # Descriptions are only out of order past replaced ones.
+        if sum(self._lengths) != len(self._descriptions):
+            self._compact_descriptions()
+        return (
+            self._ids.tobytes(),
+            bytes(self._statuses),
+            self._created_at.tobytes(),
+            self._utc_offsets.tobytes(),
+            self._lengths.tobytes(),
+            bytes(self._descriptions),
+        )
+
+    def append(self, task: Task) -> None:
+        """
+        Copies a Task object into the store.
+        """
+        dict_task = task.to_dict()
+        self._append(
+            dict_task["id"] or 0,
+            dict_task["description"],
+            dict_task["status"],
+            dict_task["created_at"],
+            dict_task["utc_offset"],
+        )
+
+    def pop(self, index: int = -1) -> Task:
+        """
+        Removes a task given it's 0 based index, returning
+        a detached copy of it.
+
+        @raises IndexError: When the given index doesn't have a task.
+        """
+        index = self._normalize(index)
+        removed = TaskView(self, index).detach()
+        del self._ids[index]
+        del self._created_at[index]
+        del self._utc_offsets[index]
+        del self._offsets[index]
+        del self._lengths[index]
+        bits = int.from_bytes(self._statuses, "little")
+        bits = (bits & ((1 << index) - 1)) | (bits >> (index + 1) << index)
+        self._statuses = bytearray(bits.to_bytes((len(self) + 7) // 8, "little"))
+        if len(self._descriptions) > 2 * sum(self._lengths) + 4096:
+            self._compact_descriptions()
+        return removed
+
+    def discard(self, indexes: Set[int]) -> None:
+        """
+        Removes the tasks at the given 0 based indexes at once,
+        keeping the remaining ones in order.
+        """
+        kept = [index for index in range(len(self)) if index not in indexes]
+        statuses = [self._get_status(index) for index in kept]
+        self._ids = array("q", (self._ids[index] for index in kept))
+        self._created_at = array("q", (self._created_at[index] for index in kept))
+        self._utc_offsets = array("l", (self._utc_offsets[index] for index in kept))
+        self._offsets = array("q", (self._offsets[index] for index in kept))
+        self._lengths = array("q", (self._lengths[index] for index in kept))
+        self._statuses = bytearray((len(kept) + 7) // 8)
+        for index, status in enumerate(statuses):
+            self._set_status(index, status)
+        self._compact_descriptions()
+
+    def clear(self) -> None:
+        """
+        Removes all tasks from the store.
+        """
+        self._ids = array("q")
+        self._statuses = bytearray()
+        self._created_at = array("q")
+        self._utc_offsets = array("l")
+        self._offsets = array("q")
+        self._lengths = array("q")
+        self._descriptions = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._created_at)
+
+    def __getitem__(self, index: int) -> "TaskView":
+        return TaskView(self, self._normalize(index))
+
+    def __iter__(self) -> Iterator["TaskView"]:
+        return (TaskView(self, index) for index in range(len(self)))
+
+    def _append(  # pylint: disable=too-many-arguments
+        self,
+        task_id: int,
+        description: str,
+        status: bool,
+        created_at: int,
+        utc_offset: int,
+    ) -> None:
+        index = len(self)
+        if index % 8 == 0:
+            self._statuses.append(0)
+        self._ids.append(task_id)
+        self._created_at.append(created_at)
+        self._utc_offsets.append(utc_offset)
+        self._offsets.append(0)
+        self._lengths.append(0)
+        self._set_description(index, description)
+        self._set_status(index, status)
+
+    def _normalize(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TaskStore index out of range")
+        return index
+
+    def _get_status(self, index: int) -> bool:
+        return bool(self._statuses[index >> 3] >> (index & 7) & 1)
+
+    def _set_status(self, index: int, status: bool) -> None:
+        if status:
+            self._statuses[index >> 3] |= 1 << (index & 7)
+        else:
+            self._statuses[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def _get_description(self, index: int) -> str:
+        offset = self._offsets[index]
+        return self._descriptions[offset : offset + self._lengths[index]].decode()
+
+    def _set_description(self, index: int, description: str) -> None:
+        encoded = description.encode()
+        self._offsets[index] = len(self._descriptions)
+        self._lengths[index] = len(encoded)
+        self._descriptions += encoded
+
+    def _compact_descriptions(self) -> None:
+        descriptions = bytearray()
+        for index, offset in enumerate(self._offsets):
+            self._offsets[index] = len(descriptions)
+            descriptions += self._descriptions[offset : offset + self._lengths[index]]
+        self._descriptions = descriptions
+
+
+class TaskView:
+    """
+    Lightweight Task stand-in that reads and writes a single
+    position of a TaskStore. Views aren't meant to be held
+    across removals, since those shift task positions.
+    """
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: TaskStore, index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def id(self) -> Optional[int]:  # pylint: disable=invalid-name
+        """
+        Retrieves the task id, following Task.id.
+        """
+        task_id = self._store._ids[self._index]  # pylint: disable=protected-access
+        return task_id or None
+
+    @property
+    def description(self) -> str:
+        """
+        Retrieves the task description
+        """
+        return self._store._get_description(  # pylint: disable=protected-access
+            self._index
+        )
+
+    @description.setter
+    def description(self, updated_description: str) -> None:
+        """
+        Alters the task description
+        """
+        self._store._set_description(  # pylint: disable=protected-access
+            self._index, updated_description
+        )
+
+    @property
+    def status(self) -> str:
+        """
+        Retrieves an unicode character representing the
+        task status.
+        """
+        status = self._store._get_status(  # pylint: disable=protected-access
+            self._index
+        )
+        return DONE_SYMBOL if status else NOT_DONE_SYMBOL
+
+    @status.setter
+    def status(self, updated_status: str) -> None:
+        """
+        Alters the task status, following Task.status.
+        """
+        # pylint: disable=protected-access
+        if updated_status not in ("done", "not done"):
+            return
+        previous = self._store._get_status(self._index)
+        self._store._set_status(self._index, updated_status == "done")
+        board = self._store._board
+        if board is not None and previous != (updated_status == "done"):
+            board._track_update(self._store._ids[self._index], previous)
+
+    @property
+    def created_at(self) -> str:
+        """
+        Retrieves the creation date of a task.
+        """
+        # pylint: disable=protected-access
+        created_at = decode_created_at(
+            self._store._created_at[self._index],
+            self._store._utc_offsets[self._index],
+        )
+        return created_at.strftime(DATE_FORMAT)
+
+    def detach(self) -> Task:
+        """
+        Materializes the viewed task as a Task object.
+        """
+        return Task.from_dict(self.to_dict())
+
+    def to_dict(self) -> TaskDict:
+        """
+        Parses the task to a dict.
+        """
+        # pylint: disable=protected-access
+        return {
+            "id": self.id,
+            "description": self.description,
+            "status": self._store._get_status(self._index),
+            "created_at": self._store._created_at[self._index],
+            "utc_offset": self._store._utc_offsets[self._index],
+        }
+
+    def __str__(self) -> str:
+        return f"{self.description} {self.status}"
+
+    def __repr__(self) -> str:
+        return f"<Task {self.description} >"
@@ -0,0 +1,121 @@
+"""Cold storage of archived tasks in compressed append-only segments."""
+
+import gzip
+import json
+import os
+
+from json.decoder import JSONDecodeError
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TypedDict
+
+from whattodo.api.task import TaskDict
+from whattodo.file_storage import DATA_FILE
+from whattodo.file_storage import atomic_open
+from whattodo.file_storage import locked
+
+# Segments of a board live on a directory named after its data file,
+# such as the one of the default board.
+ARCHIVE_DIRECTORY = "whattodo_data.archive"
+MANIFEST_FILE = "manifest.json"
+
+SegmentSummary = TypedDict(
+    "SegmentSummary",
+    {"file": str, "count": int, "since": int, "until": int},
+)
+
+
+def archive_directory(path: str = DATA_FILE) -> str:
+    """
+    Retrieves the directory holding the segments of the board
+    stored on PATH.
+    """
+    return os.path.splitext(path)[0] + ".archive"
+
+
+def write_segment(
+    dict_tasks: List[TaskDict], path: str = DATA_FILE
+) -> Optional[SegmentSummary]:
+    """
+    Writes the tasks into a new gzip compressed segment of json
+    lines, returning its summary. Segments are never rewritten,
+    so archiving costs as much as the archived tasks.
+
+        >>> write_segment(board.archive_done(before=last_month))
+        ... {"file": "segment-000001.jsonl.gz", "count": 2, ...}
+    """
+    if not dict_tasks:
+        return None
+    directory = archive_directory(path)
+    with locked(path=path):
+        os.makedirs(directory, exist_ok=True)
+        summaries = read_summaries(path)
+        created_dates = [dict_task["created_at"] for dict_task in dict_tasks]
+        summary: SegmentSummary = {
+            "file": f"segment-{len(summaries) + 1:06d}.jsonl.gz",
+            "count": len(dict_tasks),
+            "since": min(created_dates),
+            "until": max(created_dates),
+        }
+        lines = "".join(
+            json.dumps(dict_task, ensure_ascii=False) + "\n" for dict_task in dict_tasks
+        )
+        segment_path = os.path.join(directory, summary["file"])
+        with atomic_open(segment_path, binary=True) as segment_file:
+            with gzip.GzipFile(fileobj=segment_file, mode="wb") as gzip_file:
+                gzip_file.write(lines.encode())
+        # The segment is only listed once fully written.
+        with atomic_open(os.path.join(directory, MANIFEST_FILE)) as manifest_file:
+            json.dump([*summaries, summary], manifest_file, ensure_ascii=False)
+    return summary
+
+
+def read_summaries(path: str = DATA_FILE) -> List[SegmentSummary]:
+    """
+    Retrieves the summaries of the segments of a board, in the
+    order they were written.
+
+        >>> read_summaries()
+        ... [{"file": "segment-000001.jsonl.gz", "count": 2, "since": ..., ...}]
+    """
+    manifest_path = os.path.join(archive_directory(path), MANIFEST_FILE)
+    with locked(exclusive=False, path=path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+                return json.load(manifest_file)
+        except (FileNotFoundError, JSONDecodeError):
+            return []
+
+
+def count_archived_tasks(path: str = DATA_FILE) -> int:
+    """
+    Counts the archived tasks from the segment summaries.
+    """
+    return sum(summary["count"] for summary in read_summaries(path))
+
+
+def iter_archived_tasks(
+    since: Optional[int] = None, until: Optional[int] = None, path: str = DATA_FILE
+) -> Iterator[TaskDict]:
+    """
+    Streams the archived tasks created from SINCE up to, but
+    excluding, UNTIL, both in epoch microseconds. Segments are
+    decompressed one line at a time and only when their date
+    range overlaps the requested one.
+    """
+    directory = archive_directory(path)
+    for summary in read_summaries(path):
+        if since is not None and summary["until"] < since:
+            continue
+        if until is not None and summary["since"] >= until:
+            continue
+        segment_path = os.path.join(directory, summary["file"])
+        with gzip.open(segment_path, "rt", encoding="utf-8") as segment_file:
+            for line in segment_file:
+                dict_task = json.loads(line)
+                if since is not None and dict_task["created_at"] < since:
+                    continue
+                if until is not None and dict_task["created_at"] >= until:
+                    continue
+                yield dict_task
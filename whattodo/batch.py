@@ -0,0 +1,141 @@
+"""Batch operations and journal records applied to an in-memory board."""
+
+import re
+import shlex
+
+from itertools import islice
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from whattodo.api.board import Board
+from whattodo.api.board import JournalRecord
+from whattodo.api.task import DONE_SYMBOL
+from whattodo.api.task import Task
+
+FLAGS = ("--position", "--done")
+
+# Ranges such as 9-120 select the tasks between both ids or indexes.
+TASK_RANGE = re.compile(r"(\d+)-(\d+)")
+
+
+def parse_operation(line: str) -> Optional[List[str]]:
+    """
+    Splits an operation line into its command and arguments.
+    Blank lines and lines starting with "#" hold no operation.
+
+        >>> parse_operation('task:add "my first task"')
+        ... ["task:add", "my first task"]
+    """
+    arguments = shlex.split(line, comments=True)
+    return arguments or None
+
+
+def apply_operation(board: Board, arguments: List[str]) -> None:
+    """
+    Applies a single operation to the board. Supported operations
+    mirror the CLI commands, addressing tasks by id, or by index when
+    the --position option is given, or by ranges of either:
+
+        task:add <description>
+        task:update [--position] <status> <id or range>...
+        task:remove [--position] <id or range>...
+        task:remove --done
+        board:clean
+
+    Single ids must have a task, while ranges select the tasks they
+    hold. Operations on many tasks apply to none of them when one
+    of the ids is missing.
+
+    @raises ValueError: When the operation is unknown or malformed.
+
+    @raises IdexError: When the given id or index doesn't have a task.
+    """
+    command, *parameters = arguments
+    flags = set()
+    if command != "task:add":
+        flags = {parameter for parameter in parameters if parameter in FLAGS}
+        parameters = [parameter for parameter in parameters if parameter not in FLAGS]
+    by_position = "--position" in flags
+    if command == "task:add" and parameters:
+        board.add(Task(description=" ".join(parameters)))
+    elif command == "task:update" and len(parameters) >= 2 and "--done" not in flags:
+        status, selectors = _split_status(parameters)
+        board.update_status_many(_select_ids(board, selectors, by_position), status)
+    elif command == "task:remove" and flags == {"--done"} and not parameters:
+        board.remove_where(lambda task: task.status == DONE_SYMBOL)
+    elif command == "task:remove" and parameters and "--done" not in flags:
+        board.remove_many(_select_ids(board, parameters, by_position))
+    elif command == "board:clean" and not parameters and not flags:
+        board.clean_tasks()
+    else:
+        raise ValueError(f"Invalid operation: {shlex.join(arguments)}")
+
+
+def apply_record(board: Board, record: JournalRecord) -> None:
+    """
+    Applies a journal record to the board.
+
+    @raises ValueError: When no tasks are present on the board.
+
+    @raises IdexError: When the given id or index doesn't have a task.
+    """
+    operation = record["op"]
+    if operation == "add":
+        board.add(Task.from_dict(record["task"]))
+    elif operation == "update" and "id" in record:
+        board.retrieve_task_by_id(record["id"]).status = (
+            "done" if record["status"] else "not done"
+        )
+    elif operation == "update":
+        board.retrieve_task(record["index"]).status = (
+            "done" if record["status"] else "not done"
+        )
+    elif operation == "remove" and "id" in record:
+        board.remove_task_by_id(record["id"])
+    elif operation == "remove":
+        board.remove_task(record["index"])
+    elif operation == "clean":
+        board.clean_tasks()
+    else:
+        raise ValueError(f"Invalid record operation {operation}")
+
+
+def _split_status(parameters: List[str]) -> Tuple[str, List[str]]:
+    if parameters[:2] == ["not", "done"] and len(parameters) > 2:
+        return "not done", parameters[2:]
+    return parameters[0], parameters[1:]
+
+
+def _select_ids(board: Board, selectors: List[str], by_position: bool) -> List[int]:
+    """
+    Resolves ids, indexes and ranges of either into task ids, all
+    of them before the board is changed.
+    """
+    task_ids = []
+    for selector in selectors:
+        task_range = TASK_RANGE.fullmatch(selector)
+        if task_range is None:
+            task_ids.append(_retrieve(board, selector, by_position).id)
+            continue
+        first, last = int(task_range.group(1)), int(task_range.group(2))
+        if by_position:
+            task_ids.extend(task.id for task in islice(board.tasks, first, last + 1))
+        else:
+            task_ids.extend(
+                task_id for task_id in range(first, last + 1) if board.has_task(task_id)
+            )
+    return task_ids
+
+
+def _retrieve(board: Board, task_id: str, by_position: bool):
+    if by_position:
+        return board.retrieve_task(_parse_index(task_id))
+    return board.retrieve_task_by_id(_parse_index(task_id, "id"))
+
+
+def _parse_index(index: str, kind: str = "index") -> int:
+    try:
+        return int(index)
+    except ValueError as excinfo:
+        raise ValueError(f"Invalid task {kind} {index}") from excinfo
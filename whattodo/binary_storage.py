@@ -0,0 +1,268 @@
+"""Optional module to handle data persistance using a compact binary file."""
+
+import mmap
+import struct
+
+from contextlib import contextmanager
+from contextlib import suppress
+from itertools import islice
+from typing import IO
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+from whattodo.api.board import FORMAT_VERSION
+from whattodo.api.board import BoardDict
+from whattodo.api.board import assign_task_ids
+from whattodo.api.query import parse_status
+from whattodo.api.task import TaskDict
+from whattodo.api.task import upgrade_task_dict
+from whattodo.file_storage import DATA_FILE
+from whattodo.file_storage import atomic_open
+from whattodo.file_storage import locked
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import store_to_json
+
+BINARY_FILE = "whattodo_data.bin"
+
+# Boards are stored as a header, the UTF-8 board name, a table of fixed
+# width task records and a heap of UTF-8 descriptions, addressed by the
+# offset and length kept on their records. Files are mapped in memory,
+# so counting, filtering by status and paging only decode the
+# descriptions of the tasks returned.
+MAGIC = b"WTDB"
+BINARY_VERSION = 1
+
+# Magic, binary version, reserved, task count, done task count, next
+# task id and name length.
+HEADER = struct.Struct("<4sHHqqqI")
+
+# Task id, created at, description offset, description length, UTC
+# offset and status, padded to a multiple of 8 bytes.
+RECORD = struct.Struct("<qqQIiB3x")
+STATUS_OFFSET = struct.calcsize("<qqQIi")
+
+# Statuses counted at once when skipping to a page of filtered tasks.
+STATUS_CHUNK = 64 * 1024
+
+
+def store_to_binary(data: BoardDict, path: str = BINARY_FILE) -> int:
+    """
+    Wrapper used to write a whole board of any format version into
+    the binary file, returning the number of tasks written. The file
+    is replaced once fully written, like json snapshots are.
+
+        >>> store_to_binary(read_from_json())
+        ... 2
+    """
+    dict_board: Dict[str, Any] = {
+        **data,
+        "tasks": [dict(upgrade_task_dict(task)) for task in data["tasks"]],
+    }
+    assign_task_ids(dict_board)
+    table = bytearray()
+    heap = bytearray()
+    done = 0
+    for task in dict_board["tasks"]:
+        description = task["description"].encode()
+        table += RECORD.pack(
+            task["id"],
+            task["created_at"],
+            len(heap),
+            len(description),
+            task["utc_offset"],
+            task["status"],
+        )
+        heap += description
+        done += bool(task["status"])
+    name = dict_board["name"].encode()
+    count = len(dict_board["tasks"])
+    header = HEADER.pack(
+        MAGIC, BINARY_VERSION, 0, count, done, dict_board["next_id"], len(name)
+    )
+    with locked(path=path):
+        with atomic_open(path, binary=True) as binary_file:
+            binary_file.writelines([header, name, table, heap])
+    return count
+
+
+def read_from_binary(path: str = BINARY_FILE) -> Optional[BoardDict]:
+    """
+    Wrapper used to read a whole board from the binary file.
+
+    @raises ValueError: When the file doesn't hold a binary board.
+    """
+    with _mapped(path) as view:
+        if view is None:
+            return None
+        name, count, _, next_id, table = _parse_header(view)
+        return {
+            "version": FORMAT_VERSION,
+            "name": name,
+            "next_id": next_id,
+            "tasks": list(_decode_tasks(view, table, count, range(count))),
+        }
+
+
+def count_tasks(status: Optional[str] = None, path: str = BINARY_FILE) -> int:
+    """
+    Counts the stored tasks, or the ones with the given STATUS,
+    reading only the header.
+
+    @raises ValueError: When the status is invalid or the file
+    doesn't hold a binary board.
+    """
+    wanted = None if status is None else parse_status(status)
+    with _mapped(path) as view:
+        if view is None:
+            return 0
+        _, count, done, _, _ = _parse_header(view)
+    if wanted is None:
+        return count
+    return done if wanted else count - done
+
+
+def iter_tasks(
+    start: int = 0,
+    stop: Optional[int] = None,
+    status: Optional[str] = None,
+    path: str = BINARY_FILE,
+) -> Iterator[TaskDict]:
+    """
+    Streams the stored tasks between the 0 based START and STOP
+    indexes, counted among the tasks with the given STATUS when
+    one is given. Filtering only reads the status of every record.
+
+        >>> list(iter_tasks(start=50, stop=100, status="not done"))
+
+    @raises ValueError: When the status is invalid or the file
+    doesn't hold a binary board.
+    """
+    wanted = None if status is None else parse_status(status)
+    with _mapped(path) as view:
+        if view is None:
+            return
+        _, count, _, _, table = _parse_header(view)
+        if wanted is None:
+            positions: Iterable[int] = range(
+                start, count if stop is None else min(stop, count)
+            )
+        else:
+            statuses = _read_statuses(view, table, count)
+            positions = islice(
+                _find_all(statuses, bytes([wanted]), start),
+                None if stop is None else max(stop - start, 0),
+            )
+        yield from _decode_tasks(view, table, count, positions)
+
+
+def convert_from_json(json_path: str = DATA_FILE, path: str = BINARY_FILE) -> int:
+    """
+    Converts the board stored as json, journal included, into the
+    binary file, returning the number of tasks converted.
+    """
+    data = read_from_json(json_path)
+    return store_to_binary(data, path) if data else 0
+
+
+def convert_to_json(path: str = BINARY_FILE, json_path: str = DATA_FILE) -> int:
+    """
+    Converts the board stored on the binary file back into a json
+    snapshot, returning the number of tasks converted.
+
+    @raises ValueError: When the file doesn't hold a binary board.
+    """
+    data = read_from_binary(path)
+    if data is None:
+        return 0
+    store_to_json(data, path=json_path)
+    return len(data["tasks"])
+
+
+@contextmanager
+def _mapped(path: str) -> Iterator[Optional[memoryview]]:
+    """
+    Maps the binary file in memory, yielding a view of it, or None
+    when it doesn't exist. Files are replaced rather than rewritten,
+    so the mapping keeps holding the same board once unlocked.
+    """
+    binary_file: Optional[IO[bytes]] = None
+    with locked(exclusive=False, path=path), suppress(FileNotFoundError):
+        binary_file = open(path, "rb")  # pylint: disable=consider-using-with
+    if binary_file is None:
+        yield None
+        return
+    with binary_file, mmap.mmap(
+        binary_file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            view.release()
+
+
+def _parse_header(view: memoryview) -> Tuple[str, int, int, int, int]:
+    """
+    Retrieves the board name, task count, done task count, next
+    task id and the offset of the record table.
+    """
+    try:
+        magic, version, _, count, done, next_id, name_length = HEADER.unpack_from(view)
+    except struct.error as excinfo:
+        raise ValueError("The file doesn't hold a binary board") from excinfo
+    if magic != MAGIC:
+        raise ValueError("The file doesn't hold a binary board")
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary board version {version}")
+    table = HEADER.size + name_length
+    return str(view[HEADER.size : table], "utf-8"), count, done, next_id, table
+
+
+def _decode_tasks(
+    view: memoryview, table: int, count: int, positions: Iterable[int]
+) -> Iterator[TaskDict]:
+    heap = table + count * RECORD.size
+    for position in positions:
+        task_id, created_at, offset, length, utc_offset, status = RECORD.unpack_from(
+            view, table + position * RECORD.size
+        )
+        yield {
+            "id": task_id,
+            "description": str(view[heap + offset : heap + offset + length], "utf-8"),
+            "status": bool(status),
+            "created_at": created_at,
+            "utc_offset": utc_offset,
+        }
+
+
+def _read_statuses(view: memoryview, table: int, count: int) -> bytes:
+    """
+    Copies the status byte of every record, stepping over the rest.
+    """
+    end = table + count * RECORD.size
+    return bytes(view[table + STATUS_OFFSET : end : RECORD.size])
+
+
+def _find_all(statuses: bytes, status: bytes, skip: int) -> Iterator[int]:
+    """
+    Yields the positions holding STATUS past the first SKIP ones,
+    counting whole chunks of statuses to skip them.
+    """
+    position = 0
+    while position < len(statuses):
+        found = statuses.count(status, position, position + STATUS_CHUNK)
+        if found > skip:
+            break
+        skip -= found
+        position += STATUS_CHUNK
+    position = statuses.find(status, position)
+    while position != -1:
+        if skip:
+            skip -= 1
+        else:
+            yield position
+        position = statuses.find(status, position + 1)
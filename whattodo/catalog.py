@@ -0,0 +1,103 @@
+"""Catalog of the boards kept by the json storage, one file per board."""
+
+import json
+import os
+import re
+
+from json.decoder import JSONDecodeError
+from typing import Dict
+from typing import Optional
+from typing import TypedDict
+
+from whattodo.file_storage import DATA_FILE
+from whattodo.file_storage import atomic_open
+from whattodo.file_storage import locked
+from whattodo.file_storage import read_header
+
+CATALOG_FILE = "whattodo_catalog.json"
+BOARDS_DIRECTORY = "whattodo_boards"
+
+CatalogDict = TypedDict(
+    "CatalogDict", {"active": Optional[str], "boards": Dict[str, str]}
+)
+
+
+def read_catalog() -> CatalogDict:
+    """
+    Retrieves the board names mapped to their data files along with
+    the active board name. Without a catalog, a board stored on the
+    default data file is the only one.
+
+        >>> read_catalog()
+        ... {"active": "personal", "boards": {"personal": "whattodo_data.json"}}
+    """
+    with locked(exclusive=False, path=CATALOG_FILE):
+        try:
+            with open(CATALOG_FILE, "r", encoding="utf-8") as catalog_file:
+                return json.load(catalog_file)
+        except (FileNotFoundError, JSONDecodeError):
+            pass
+    header = read_header(DATA_FILE)
+    if header is None:
+        return {"active": None, "boards": {}}
+    return {"active": header["name"], "boards": {header["name"]: DATA_FILE}}
+
+
+def active_board_file() -> str:
+    """
+    Retrieves the data file of the active board, which is the
+    default data file while no board was created.
+    """
+    catalog = read_catalog()
+    if catalog["active"] is None:
+        return DATA_FILE
+    return catalog["boards"][catalog["active"]]
+
+
+def register_board(name: str) -> str:
+    """
+    Makes NAME the active board, adding it to the catalog when
+    needed, and returns its data file. The first board is kept
+    on the default data file.
+    """
+    with locked(path=CATALOG_FILE):
+        catalog = read_catalog()
+        if name not in catalog["boards"]:
+            catalog["boards"][name] = _new_board_file(name, catalog)
+        catalog["active"] = name
+        _store_catalog(catalog)
+    return catalog["boards"][name]
+
+
+def switch_board(name: str) -> str:
+    """
+    Makes NAME the active board and returns its data file.
+
+    @raises ValueError: When the catalog doesn't have the board.
+    """
+    with locked(path=CATALOG_FILE):
+        catalog = read_catalog()
+        if name not in catalog["boards"]:
+            raise ValueError(f"There is no board named {name}!")
+        catalog["active"] = name
+        _store_catalog(catalog)
+    return catalog["boards"][name]
+
+
+def _new_board_file(name: str, catalog: CatalogDict) -> str:
+    if not catalog["boards"]:
+        return DATA_FILE
+    os.makedirs(BOARDS_DIRECTORY, exist_ok=True)
+    stem = re.sub(r"[^\w-]", "_", name)
+    taken = set(catalog["boards"].values())
+    path = os.path.join(BOARDS_DIRECTORY, f"{stem}.json")
+    number = 1
+    while path in taken or os.path.exists(path):
+        number += 1
+        path = os.path.join(BOARDS_DIRECTORY, f"{stem}-{number}.json")
+    return path
+
+
+def _store_catalog(catalog: CatalogDict) -> None:
+    with atomic_open(CATALOG_FILE) as catalog_file:
+        json.dump(catalog, catalog_file, ensure_ascii=False, indent=4)
@@ -1,42 +1,685 @@
 """CLI for whattodo project."""
 
+# pylint: disable=too-many-lines
+
+import os
+import time
+
+from contextlib import ExitStack
+from contextlib import suppress
+from datetime import datetime
+from datetime import timedelta
+from enum import Enum
+from itertools import islice
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import List
+from typing import MutableMapping
+from typing import Optional
+from typing import TextIO
+from typing import Tuple
+
 import typer
 
+from whattodo import client
 from whattodo.api.board import Board
+from whattodo.api.board import JournalRecord
+from whattodo.api.query import parse_status
+from whattodo.api.query import to_epoch_microseconds
 from whattodo.api.task import Task
+from whattodo.api.task import TaskDict
+from whattodo.api.task import upgrade_task_dict
+from whattodo.batch import apply_operation
+from whattodo.batch import parse_operation
+from whattodo.binary_storage import BINARY_FILE
+from whattodo.binary_storage import convert_from_json
+from whattodo.binary_storage import convert_to_json
+from whattodo.catalog import active_board_file
+from whattodo.catalog import read_catalog
+from whattodo.catalog import register_board
+from whattodo.catalog import switch_board
+from whattodo.file_storage import RevisionConflictError
+from whattodo.file_storage import append_records
+from whattodo.file_storage import compact_journal
+from whattodo.file_storage import has_stored_board
+from whattodo.file_storage import iter_tasks_from_json
+from whattodo.file_storage import locked
 from whattodo.file_storage import read_from_json
+from whattodo.file_storage import read_header
+from whattodo.file_storage import read_revision
+from whattodo.file_storage import retrieve_task_by_id_from_json
+from whattodo.file_storage import retrieve_task_from_json
+from whattodo.file_storage import search_tasks
 from whattodo.file_storage import store_to_json
+from whattodo.timings import PhaseDict
+from whattodo.timings import collect
+from whattodo.timings import counted
+from whattodo.timings import phase
+from whattodo.timings import render
+from whattodo.timings import start_profiler
+
+# Modules only some commands need, such as sqlite_storage or daemon,
+# are imported by those commands to keep the others starting fast.
+# pylint: disable=import-outside-toplevel
 
 app = typer.Typer(help="WhatTodo CLI manager.")
-state = {"verbose": False}
+state = {"verbose": False, "backend": "json", "board_file": None}
+
+# Returned by _forward when commands must use the storage files.
+NO_DAEMON = object()
+
+# Number of batch operations sent to the daemon per request.
+BATCH_CHUNK_SIZE = 1000
+
+# Times a batch is applied again on a board changed by another command.
+STORE_RETRIES = 5
+
+# Number of imported tasks committed with a single write.
+IMPORT_CHUNK_SIZE = 10_000
+
+
+class StorageBackend(str, Enum):
+    """
+    Storage engines available to the CLI.
+    """
+
+    json = "json"
+    sqlite = "sqlite"
+
+
+class TaskStatus(str, Enum):
+    """
+    Task statuses the tasks can be filtered by.
+    """
+
+    done = "done"
+    not_done = "not done"
+
+
+class ListFormat(str, Enum):
+    """
+    Output formats of board listings, text being the original one.
+    """
+
+    text = "text"
+    table = "table"
+    json = "json"
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class TransferFormat(str, Enum):
+    """
+    File formats tasks are imported from and exported to.
+    """
+
+    jsonl = "jsonl"
+    csv = "csv"
+
+
+class BoardFormat(str, Enum):
+    """
+    File formats a json board can be converted into and back from.
+    """
+
+    binary = "binary"
+    json = "json"
+
+
+class ConflictPolicy(str, Enum):
+    """
+    What to do with imported tasks whose id is already taken.
+    """
+
+    skip = "skip"
+    replace_task = "replace"
+    new_id = "new-id"
+    fail = "fail"
+
+
+def _uses_sqlite() -> bool:
+    return state["backend"] == StorageBackend.sqlite
+
+
+def _board_file() -> str:
+    """
+    Retrieves the data file of the active board, looking it up
+    once per command so a concurrent switch can't split its work.
+    """
+    if state.get("board_file") is None:
+        state["board_file"] = active_board_file()
+    return str(state["board_file"])
+
+
+def _forward(operation: str, *arguments: Any) -> Any:
+    """
+    Sends a request to the board daemon, returning NO_DAEMON when
+    no daemon serves the active storage.
+    """
+    if _uses_sqlite() or not client.is_running():
+        return NO_DAEMON
+    try:
+        return client.request(operation, *arguments)
+    except ConnectionError:
+        return NO_DAEMON
+
+
+def _iter_stored_tasks(start: int, stop: Optional[int]) -> Iterator[TaskDict]:
+    tasks = _forward("tasks", start, stop)
+    if tasks is not NO_DAEMON:
+        return iter(tasks or [])
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        return sqlite_storage.iter_tasks(start, stop)
+    return iter_tasks_from_json(start, stop, path=_board_file())
+
+
+def _query_stored_tasks(  # pylint: disable=too-many-arguments
+    status: Optional[str],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    order: str,
+    *,
+    start: int,
+    stop: Optional[int],
+) -> Iterator[TaskDict]:
+    """
+    Streams the stored tasks matching the filters, following Board.query.
+
+    @raises ValueError: When the order is invalid.
+    """
+    tasks = _forward(
+        "query",
+        status,
+        None if since is None else since.isoformat(),
+        None if until is None else until.isoformat(),
+        order,
+        start,
+        stop,
+    )
+    if tasks is not NO_DAEMON:
+        return iter(tasks or [])
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        return sqlite_storage.query_tasks(
+            status, since, until, order, start=start, stop=stop
+        )
+    board, _ = _read_board()
+    if board is None:
+        return iter([])
+    matches = board.query(status=status, since=since, until=until, order=order)
+    return (task.to_dict() for task in islice(matches, start, stop))
+
+
+def _stored_in_id_order() -> bool:
+    """
+    Checks if the stored tasks are kept sorted by id, so listing them
+    by id can stream them as stored. Tasks imported with lower ids
+    than earlier ones break that order, which the daemon doesn't
+    track.
+    """
+    if _uses_sqlite():
+        return True
+    if _forward("summary") is not NO_DAEMON:
+        return False
+    header = read_header(_board_file())
+    return header is not None and header["ordered"]
+
+
+def _parse_date(date: Optional[str]) -> Optional[datetime]:
+    """
+    @raises ValueError: When the date isn't in ISO 8601 format.
+    """
+    if date is None:
+        return None
+    try:
+        return datetime.fromisoformat(date)
+    except ValueError as excinfo:
+        message = f"Invalid date '{date}', use a date like 2026-01-01"
+        raise ValueError(message) from excinfo
+
+
+def _read_summary() -> Optional[Tuple[str, int]]:
+    """
+    Retrieves the board name and task count of the stored board.
+    """
+    summary = _forward("summary")
+    if summary is not NO_DAEMON:
+        return (summary["name"], summary["count"]) if summary else None
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        name = sqlite_storage.read_board_name()
+        return (name, sqlite_storage.count_tasks()) if name is not None else None
+    header = read_header(_board_file())
+    if not header:
+        return None
+    return header["name"], header["count"]
+
+
+def _has_board() -> bool:
+    summary = _forward("summary")
+    if summary is not NO_DAEMON:
+        return summary is not None
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        return sqlite_storage.read_board_name() is not None
+    return has_stored_board(_board_file())
+
+
+def _board_exists(name: str) -> bool:
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        return sqlite_storage.read_board_name() == name
+    board_file = read_catalog()["boards"].get(name)
+    return board_file is not None and has_stored_board(board_file)
+
+
+def _retrieve_task(
+    task_id: int, by_position: bool
+) -> Tuple[Optional[Task], Optional[int]]:
+    """
+    Retrieves a task given it's id or, BY_POSITION, it's 0 based index,
+    along with the revision it was read on, which only the json storage
+    keeps. A missing task is reported as the batch operations do.
+
+    @raises typer.Exit: When no task has the given id or index.
+    """
+    try:
+        return _read_task(task_id, by_position)
+    except (ValueError, IndexError) as excinfo:
+        typer.echo(str(excinfo))
+        raise typer.Exit(code=1) from excinfo
+
+
+def _read_task(task_id: int, by_position: bool) -> Tuple[Optional[Task], Optional[int]]:
+    dict_task = _forward("retrieve", task_id, by_position)
+    if dict_task is not NO_DAEMON:
+        return (Task.from_dict(dict_task) if dict_task else None), None
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        if sqlite_storage.read_board_name() is None:
+            return None, None
+        if by_position:
+            dict_task = sqlite_storage.retrieve_task(task_id)
+        else:
+            dict_task = sqlite_storage.retrieve_task_by_id(task_id)
+        return Task.from_dict(dict_task), None
+    # Only the segment holding the task is read, whatever the board size.
+    with locked(exclusive=False, path=_board_file()):
+        revision = read_revision(_board_file())
+        if by_position:
+            dict_task = retrieve_task_from_json(task_id, _board_file())
+        else:
+            dict_task = retrieve_task_by_id_from_json(task_id, _board_file())
+    return (Task.from_dict(dict_task) if dict_task else None), revision
+
+
+def _change_task(
+    task_id: int, by_position: bool, change: Callable[[Task], JournalRecord]
+) -> None:
+    """
+    Persists the record CHANGE makes of the task with the given id
+    or index, reading the task again whenever another command stored
+    the board since it was read.
+
+    @raises typer.Exit: When the task is missing or the board keeps
+    changing.
+    """
+    for _ in range(STORE_RETRIES):
+        task, revision = _retrieve_task(task_id, by_position)
+        if task is None:
+            typer.echo("There are no created boards yet!")
+            return
+        try:
+            _persist(change(task), revision)
+            return
+        except RevisionConflictError:
+            continue
+    typer.echo("The board kept changing, the task was not stored")
+    raise typer.Exit(code=1)
+
+
+def _read_board() -> Tuple[Optional[Board], Optional[int]]:
+    """
+    Reads the stored board along with the revision it is on, which
+    the sqlite backend doesn't keep.
+    """
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        storage_data = sqlite_storage.read_from_sqlite()
+        revision = None
+    else:
+        with locked(exclusive=False, path=_board_file()):
+            storage_data = read_from_json(_board_file(), cache=False)
+            revision = read_revision(_board_file())
+    return (Board.from_dict(storage_data) if storage_data else None), revision
+
+
+def _store_board(board: Board, revision: Optional[int]) -> Optional[int]:
+    """
+    Persists the changes made to the board since it was read or
+    last stored, returning the new revision.
+
+    @raises RevisionConflictError: When the stored board isn't on
+    REVISION anymore.
+    """
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        sqlite_storage.apply_records(board.pop_changes())
+        return None
+    return append_records(
+        board.pop_changes(), expected_revision=revision, path=_board_file()
+    )
+
+
+def _store_batch(
+    board: Board, revision: Optional[int], unsaved: List[List[str]]
+) -> Tuple[Board, Optional[int]]:
+    """
+    Stores a batch, applying its UNSAVED operations again on a fresh
+    copy of the board whenever another writer stored it first.
+
+    @raises typer.Exit: When the board keeps changing or the operations
+    no longer apply to it.
+    """
+    for _ in range(STORE_RETRIES):
+        try:
+            return board, _store_board(board, revision)
+        except RevisionConflictError:
+            fresh_board, revision = _read_board()
+            if fresh_board is None:
+                break
+            board = fresh_board
+            try:
+                for arguments in unsaved:
+                    apply_operation(board, arguments)
+            except (ValueError, IndexError) as excinfo:
+                typer.echo(f"The board was changed by another command: {excinfo}")
+                raise typer.Exit(code=1) from excinfo
+    typer.echo(f"The board kept changing, {len(unsaved)} operations were not stored")
+    raise typer.Exit(code=1)
+
+
+def _is_single_id(selectors: List[str]) -> bool:
+    """
+    Checks if a single task is selected, which is updated or removed
+    without loading the whole board when possible.
+    """
+    return len(selectors) == 1 and selectors[0].isdigit()
+
+
+def _apply_to_many(operation: List[str]) -> None:
+    """
+    Applies a batch operation on many tasks to the active board,
+    persisting all of its changes with a single write.
+
+    @raises typer.Exit: When the operation doesn't apply to the board.
+    """
+    result = _forward("batch", operation)
+    if result is not NO_DAEMON:
+        if result is None:
+            typer.echo("There are no created boards yet!")
+        elif result["error"] is not None:
+            typer.echo(result["error"])
+            raise typer.Exit(code=1)
+        return
+    board, revision = _read_board()
+    if board is None:
+        typer.echo("There are no created boards yet!")
+        return
+    try:
+        apply_operation(board, operation)
+    except (ValueError, IndexError) as excinfo:
+        typer.echo(str(excinfo))
+        raise typer.Exit(code=1) from excinfo
+    _store_batch(board, revision, [operation])
+
+
+def _persist(record: JournalRecord, revision: Optional[int] = None) -> None:
+    """
+    Persists a single change. A task added without an id gets the
+    next free one, set on its record.
+
+    @raises RevisionConflictError: When REVISION is given and the
+    stored board isn't on it anymore.
+    """
+    added = _forward("apply", record)
+    if added is not NO_DAEMON:
+        if added:
+            record["task"]["id"] = added[0]
+        return
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        sqlite_storage.apply_record(record)
+    else:
+        append_records([record], expected_revision=revision, path=_board_file())
 
 
 @app.command("board:add")
-def add_board(board_name: str):
+def add_board(
+    board_name: str,
+    force: bool = typer.Option(
+        False, "--force", help="Replace an existing board with the same name."
+    ),
+):
     """
     Creates a new Board with BOARD_NAME to hold tasks.
     """
+    if not force and _board_exists(board_name):
+        typer.echo(
+            f"There is already a board named {board_name}! "
+            "Use --force to replace it with an empty one."
+        )
+        raise typer.Exit(code=1)
     if state["verbose"]:
         typer.echo("About to create a board with name {board_name}")
     typer.echo(f"Creating a board with name {board_name}")
     board = Board(name=board_name)
-    store_to_json(data=board.to_dict())
+    if _forward("add_board", board_name) is not NO_DAEMON:
+        pass
+    elif _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        sqlite_storage.store_to_sqlite(board.to_dict())
+    else:
+        store_to_json(data=board.to_dict(), path=register_board(board_name))
     if state["verbose"]:
         typer.echo("Just created the board {board_name}")
 
 
+@app.command("board:ls")
+def list_boards():
+    """
+    Lists the names of all boards, marking the active one.
+    """
+    if _uses_sqlite():
+        typer.echo("Only the json storage keeps many boards!")
+        raise typer.Exit(code=1)
+    catalog = read_catalog()
+    if not catalog["boards"]:
+        typer.echo("There are no created boards yet!")
+        typer.Abort()
+    for name in sorted(catalog["boards"]):
+        typer.echo(f"{'*' if name == catalog['active'] else ' '} {name}")
+
+
+@app.command("board:switch")
+def switch_active_board(board_name: str):
+    """
+    Makes BOARD_NAME the active board.
+    """
+    if _uses_sqlite():
+        typer.echo("Only the json storage keeps many boards!")
+        raise typer.Exit(code=1)
+    try:
+        if _forward("switch_board", board_name) is NO_DAEMON:
+            switch_board(board_name)
+    except ValueError as excinfo:
+        typer.echo(str(excinfo))
+        raise typer.Exit(code=1) from excinfo
+    typer.echo(f"Switched to the board {board_name}")
+
+
 @app.command("board:list")
-def list_tasks():
+def list_tasks(  # pylint: disable=too-many-arguments,too-many-locals
+    *,
+    page: Optional[int] = typer.Option(None, min=1, help="1 based page to list."),
+    page_size: int = typer.Option(50, min=1, help="Number of tasks per page."),
+    limit: Optional[int] = typer.Option(
+        None, min=0, help="Maximum number of tasks to list."
+    ),
+    status: Optional[TaskStatus] = typer.Option(
+        None, help="List only the tasks with this status."
+    ),
+    since: Optional[str] = typer.Option(
+        None, help="List only the tasks created from this ISO 8601 date."
+    ),
+    until: Optional[str] = typer.Option(
+        None, help="List only the tasks created before this ISO 8601 date."
+    ),
+    order: str = typer.Option(
+        "id", help='Field to sort by, id or created_at, such as "created_at desc".'
+    ),
+    archived: bool = typer.Option(
+        False, "--archived", help="List the archived tasks instead."
+    ),
+    list_format: ListFormat = typer.Option(
+        ListFormat.text,
+        "--format",
+        help="Output format, json, ndjson and csv being meant for other programs.",
+    ),
+):
     """
     Lists all tasks in the current active board.
     """
-    storage_data = read_from_json()
-    if not storage_data:
+    summary = _read_summary()
+    if not summary:
         typer.echo("There are no created boards yet!")
         typer.Abort()
     else:
-        board = Board.from_dict(storage_data)
-        typer.echo(board.list_tasks)
+        start = (page - 1) * page_size if page else 0
+        stop = start + page_size if page else None
+        if limit is not None:
+            stop = start + limit if stop is None else min(stop, start + limit)
+        if archived:
+            try:
+                dict_tasks = _iter_archived(status, since, until, order)
+            except ValueError as excinfo:
+                typer.echo(str(excinfo))
+                raise typer.Exit(code=1) from excinfo
+            dict_tasks = islice(dict_tasks, start, stop)
+        elif (
+            status is None
+            and since is None
+            and until is None
+            and order == "id"
+            and _stored_in_id_order()
+        ):
+            dict_tasks = _iter_stored_tasks(start, stop)
+        else:
+            try:
+                dict_tasks = _query_stored_tasks(
+                    status.value if status else None,
+                    _parse_date(since),
+                    _parse_date(until),
+                    order,
+                    start=start,
+                    stop=stop,
+                )
+            except ValueError as excinfo:
+                typer.echo(str(excinfo))
+                raise typer.Exit(code=1) from excinfo
+        # Stored tasks are streamed, so they are read while rendered.
+        with phase("render") as record:
+            if list_format != ListFormat.text:
+                from whattodo.listing import write_listing
+
+                upgraded = map(upgrade_task_dict, counted(dict_tasks, record))
+                output = typer.get_text_stream("stdout")
+                write_listing(summary[0], upgraded, output, list_format.value)
+                return
+            tasks = (Task.from_dict(task) for task in counted(dict_tasks, record))
+            for row in Board.render(summary[0], tasks):
+                typer.echo(row, nl=False)
+            typer.echo()
+
+
+def _iter_archived(
+    status: Optional[TaskStatus],
+    since: Optional[str],
+    until: Optional[str],
+    order: str,
+) -> Iterator[TaskDict]:
+    """
+    Streams the archived tasks of the active board, which are all done
+    and kept in the order they were archived.
+
+    @raises ValueError: When the dates or order are invalid.
+    """
+    if _uses_sqlite():
+        raise ValueError("Only the json storage archives tasks!")
+    if order != "id":
+        raise ValueError("Archived tasks are listed in the order they were archived")
+    since_date, until_date = _parse_date(since), _parse_date(until)
+    if status == TaskStatus.not_done:
+        return iter([])
+    from whattodo.archive import iter_archived_tasks
+
+    return iter_archived_tasks(
+        since=None if since_date is None else to_epoch_microseconds(since_date),
+        until=None if until_date is None else to_epoch_microseconds(until_date),
+        path=_board_file(),
+    )
+
+
+@app.command("board:archive")
+def archive_board(
+    days: int = typer.Option(
+        30, min=0, help="Archive the done tasks created more than DAYS days ago."
+    ),
+):
+    """
+    Moves the old done tasks of the active board into compressed
+    archive segments, so the other commands no longer load them.
+    """
+    if _uses_sqlite():
+        typer.echo("Only the json storage archives tasks!")
+        raise typer.Exit(code=1)
+    from whattodo.archive import write_segment
+
+    before = datetime.now() - timedelta(days=days)
+    archived = _forward("archive", before.isoformat())
+    if archived is NO_DAEMON:
+        with locked(path=_board_file()):
+            board, revision = _read_board()
+            if board is None:
+                archived = None
+            else:
+                dict_tasks = board.archive_done(before=before)
+                # Written before the removals, a crash in between
+                # duplicates the archived tasks rather than losing them.
+                write_segment(dict_tasks, path=_board_file())
+                append_records(
+                    board.pop_changes(), expected_revision=revision, path=_board_file()
+                )
+                archived = len(dict_tasks)
+    if archived is None:
+        typer.echo("There are no created boards yet!")
+        raise typer.Exit(code=1)
+    if archived:
+        _forward("flush")
+        compact_journal(_board_file())
+    typer.echo(f"Archived {archived} done tasks")
 
 
 @app.command("board:count")
@@ -44,13 +687,13 @@ def count_tasks():
     """
     Counts all tasks in the current active board.
     """
-    storage_data = read_from_json()
-    if not storage_data:
+    summary = _read_summary()
+    if not summary:
         typer.echo("There are no created boards yet!")
         typer.Abort()
     else:
-        board = Board.from_dict(storage_data)
-        typer.echo(f"The board '{board.name}' currently have {board.count_tasks} tasks")
+        name, count = summary
+        typer.echo(f"The board '{name}' currently have {count} tasks")
 
 
 @app.command("board:clean")
@@ -58,19 +701,18 @@ def clean_board():
     """
     Removes all tasks in the current active board.
     """
-    storage_data = read_from_json()
-    if not storage_data or not storage_data.get("tasks"):
+    summary = _read_summary()
+    if not summary or not summary[1]:
         typer.echo("There are no created boards yet!")
         typer.Abort()
     else:
+        name, _ = summary
         typer.confirm(
-            f"Are you sure you want to remove all tasks from the Board {storage_data['name']}?",
+            f"Are you sure you want to remove all tasks from the Board {name}?",
             abort=True,
         )
-        board = Board.from_dict(storage_data)
-        board.clean_tasks()
-        store_to_json(board.to_dict())
-        typer.echo(f"The board '{board.name}' was cleaned!")
+        _persist({"op": "clean"})
+        typer.echo(f"The board '{name}' was cleaned!")
 
 
 @app.command("task:add")
@@ -78,64 +720,502 @@ def add_task(description: str):
     """
     Creates a new task with a DESCRIPTION to an active board.
     """
-    storage_data = read_from_json()
-    if not storage_data:
+    if not _has_board():
         typer.echo("There are no created boards yet!")
         typer.Abort()
     else:
         if state["verbose"]:
             typer.echo("About to add a new task to board")
-        board = Board.from_dict(storage_data)
         typer.echo(f"Creating a task with description {description} to board")
-        task = Task(description=description)
-        board.add(task)
-        store_to_json(board.to_dict())
+        record: JournalRecord = {"op": "add", "task": Task(description).to_dict()}
+        _persist(record)
+        typer.echo(f"The task {record['task']['id']} was added!")
         if state["verbose"]:
             typer.echo("Just created the task {description}")
 
 
 @app.command("task:update")
-def update_task(status: str, index: int):
+def update_task(
+    status: str,
+    task_ids: List[str],
+    position: bool = typer.Option(
+        False, "--position", help="Take TASK_IDS as the tasks 0 based indexes."
+    ),
+):
     """
-    Updates task with to the given STATUS.
+    Updates the tasks with TASK_IDS, or ranges of them such as 9-120,
+    to the given STATUS.
     """
-    storage_data = read_from_json()
+    if not _is_single_id(task_ids):
+        typer.echo(f"Updating the tasks {' '.join(task_ids)} to status {status}")
+        flags = ["--position"] if position else []
+        _apply_to_many(["task:update", *flags, status, *task_ids])
+        return
+    try:
+        parse_status(status)
+    except ValueError as excinfo:
+        typer.echo(str(excinfo))
+        raise typer.Exit(code=1) from excinfo
+    typer.echo(f"Updating the task to status {status}")
+    _change_task(
+        int(task_ids[0]),
+        position,
+        lambda task: {
+            "op": "update",
+            "id": task.id,  # type: ignore[typeddict-item]
+            "status": parse_status(status),
+            "previous": task.to_dict()["status"],
+        },
+    )
+
+
+@app.command("task:remove")
+def remove_task(
+    task_ids: Optional[List[str]] = typer.Argument(None),
+    position: bool = typer.Option(
+        False, "--position", help="Take TASK_IDS as the tasks 0 based indexes."
+    ),
+    done: bool = typer.Option(False, "--done", help="Remove every done task."),
+):
+    """
+    Removes the tasks with TASK_IDS, or ranges of them such as 9-120,
+    or every done task.
+    """
+    selectors = list(task_ids or [])
+    if done == bool(selectors):
+        typer.echo("Give either the ids of the tasks to remove or --done")
+        raise typer.Exit(code=1)
+    if done or not _is_single_id(selectors):
+        selection = "every done task" if done else f"the tasks {' '.join(selectors)}"
+        typer.confirm(f"Are you sure you want to remove {selection}?", abort=True)
+        if done:
+            _apply_to_many(["task:remove", "--done"])
+        else:
+            flags = ["--position"] if position else []
+            _apply_to_many(["task:remove", *flags, *selectors])
+        typer.echo(f"Removed {selection}!")
+        return
+    task_id = int(selectors[0])
+    # The task is checked before asking, and read again once confirmed.
+    if _retrieve_task(task_id, position)[0] is None:
+        typer.echo("There are no created boards yet!")
+        return
+    typer.confirm(f"Are you sure you want to remove the task {task_id}?", abort=True)
+    _change_task(
+        task_id,
+        position,
+        lambda task: {
+            "op": "remove",
+            "id": task.id,  # type: ignore[typeddict-item]
+            "status": task.to_dict()["status"],
+        },
+    )
+    typer.echo(f"The task {task_id} was removed!")
+
+
+@app.command("task:search")
+def search_board(
+    query: List[str],
+    limit: int = typer.Option(50, min=1, help="Maximum number of tasks to list."),
+):
+    """
+    Lists the tasks of the active board matching the QUERY words.
+    Words must all match unless separated by OR, and a word ending
+    with * matches any word it starts.
+    """
+    summary = _read_summary()
+    if not summary:
+        typer.echo("There are no created boards yet!")
+        raise typer.Exit(code=1)
+    _forward("flush")
+    try:
+        if _uses_sqlite():
+            from whattodo import sqlite_storage
+
+            tasks = sqlite_storage.search_tasks(" ".join(query), limit)
+        else:
+            tasks = search_tasks(" ".join(query), limit, path=_board_file())
+    except ValueError as excinfo:
+        typer.echo(str(excinfo))
+        raise typer.Exit(code=1) from excinfo
+    if not tasks:
+        typer.echo(f"No tasks match '{' '.join(query)}'")
+        return
+    for row in Board.render(summary[0], (Task.from_dict(task) for task in tasks)):
+        typer.echo(row, nl=False)
+    typer.echo()
+
+
+@app.command("board:migrate")
+def migrate_board():
+    """
+    Imports the board stored in the json file into the sqlite database.
+    """
+    if state["backend"] == StorageBackend.json:
+        _forward("flush")
+    storage_data = read_from_json(_board_file())
     if not storage_data:
         typer.echo("There are no created boards yet!")
         typer.Abort()
     else:
-        board = Board.from_dict(storage_data)
-        task = board.retrieve_task(index)
-        typer.echo(f"Updating the task to status {status}")
-        task.status = status
-        store_to_json(board.to_dict())
+        from whattodo import sqlite_storage
 
+        count = sqlite_storage.migrate_from_json(storage_data)
+        typer.echo(
+            f"The board '{storage_data['name']}' was migrated to sqlite with "
+            f"{count} tasks"
+        )
 
-@app.command("task:remove")
-def remove_task(index: int):
+
+@app.command("board:convert")
+def convert_board(
+    to: BoardFormat = typer.Option(..., help="Format to convert the board into."),
+    binary_file: str = typer.Option(
+        BINARY_FILE, help="Binary file to write or read the board."
+    ),
+):
     """
-    Removes a task based on it's 0 based index.
+    Converts the active json board into a binary file, for fast
+    counting and paging, or converts that file back into the board.
     """
-    storage_data = read_from_json()
-    if not storage_data:
+    if to == BoardFormat.binary:
+        _forward("flush")
+        if not has_stored_board(_board_file()):
+            typer.echo("There are no created boards yet!")
+            raise typer.Exit(code=1)
+        count = convert_from_json(_board_file(), binary_file)
+    else:
+        if _forward("summary") is not NO_DAEMON:
+            typer.echo("Stop the board daemon before converting into the json board")
+            raise typer.Exit(code=1)
+        if client.is_running():
+            # A daemon that didn't answer died and left its socket behind.
+            os.remove(client.SOCKET_FILE)
+        if not os.path.exists(binary_file):
+            typer.echo(f"There is no binary board at {binary_file}!")
+            raise typer.Exit(code=1)
+        try:
+            count = convert_to_json(binary_file, _board_file())
+        except ValueError as excinfo:
+            typer.echo(str(excinfo))
+            raise typer.Exit(code=1) from excinfo
+    typer.echo(f"Converted {count} tasks into the {to.value} board")
+
+
+@app.command("batch")
+def run_batch(
+    operations: typer.FileText = typer.Argument(
+        "-", help="File with one operation per line, defaults to stdin."
+    ),
+    checkpoint: int = typer.Option(
+        0, min=0, help="Persist every N operations, 0 persists only at the end."
+    ),
+):
+    """
+    Applies many task:add, task:update, task:remove and board:clean
+    operations to the active board with a single load and store.
+    """
+    summary = _forward("summary")
+    if summary is not NO_DAEMON:
+        if summary is None:
+            typer.echo("There are no created boards yet!")
+            raise typer.Exit(code=1)
+        _forward_batch(operations)
+        return
+    board, revision = _read_board()
+    if board is None:
         typer.echo("There are no created boards yet!")
-        typer.Abort()
+        raise typer.Exit(code=1)
+    applied = 0
+    unsaved: List[List[str]] = []
+    started = time.perf_counter()
+    try:
+        for line_number, line in enumerate(operations, start=1):
+            try:
+                arguments = parse_operation(line)
+                if arguments is None:
+                    continue
+                apply_operation(board, arguments)
+            except (ValueError, IndexError) as excinfo:
+                typer.echo(f"Operation on line {line_number} failed: {excinfo}")
+                raise typer.Exit(code=1) from excinfo
+            unsaved.append(arguments)
+            applied += 1
+            if checkpoint and applied % checkpoint == 0:
+                board, revision = _store_batch(board, revision, unsaved)
+                unsaved = []
+    finally:
+        try:
+            if not checkpoint or applied % checkpoint:
+                _store_batch(board, revision, unsaved)
+        finally:
+            _report_throughput(applied, started)
+
+
+def _forward_batch(operations: TextIO) -> None:
+    """
+    Sends the batch operations to the daemon in chunks, which
+    persists them on its own schedule.
+    """
+    applied = 0
+    started = time.perf_counter()
+    failure: Optional[str] = None
+    pending: List[Tuple[int, List[str]]] = []
+    for line_number, line in enumerate(operations, start=1):
+        try:
+            arguments = parse_operation(line)
+        except ValueError as excinfo:
+            failure = f"Operation on line {line_number} failed: {excinfo}"
+            break
+        if arguments is not None:
+            pending.append((line_number, arguments))
+        if len(pending) == BATCH_CHUNK_SIZE:
+            sent, failure = _send_operations(pending)
+            applied += sent
+            pending = []
+            if failure:
+                break
+    if pending:
+        sent, pending_failure = _send_operations(pending)
+        applied += sent
+        failure = pending_failure or failure
+    if failure:
+        typer.echo(failure)
+    _report_throughput(applied, started)
+    if failure:
+        raise typer.Exit(code=1)
+
+
+def _send_operations(pending: List[Tuple[int, List[str]]]) -> Tuple[int, Optional[str]]:
+    """
+    Applies operations on the daemon, returning how many succeeded
+    and the failure of the first one that didn't.
+    """
+    result = client.request("batch", *[arguments for _, arguments in pending])
+    if result["error"] is None:
+        return result["applied"], None
+    line_number = pending[result["applied"]][0]
+    return (
+        result["applied"],
+        f"Operation on line {line_number} failed: {result['error']}",
+    )
+
+
+def _report_throughput(
+    applied: int,
+    started: float,
+    *,
+    verb: str = "Applied",
+    noun: str = "operations",
+    err: bool = False,
+) -> None:
+    elapsed = time.perf_counter() - started
+    throughput = applied / elapsed if elapsed else 0.0
+    typer.echo(
+        f"{verb} {applied} {noun} in {elapsed:.3f}s ({throughput:.0f} {noun}/s)",
+        err=err,
+    )
+
+
+@app.command("import")
+def import_tasks(  # pylint: disable=too-many-locals
+    source: typer.FileText = typer.Argument(
+        "-", help="JSON lines or CSV file with the tasks, defaults to stdin."
+    ),
+    file_format: Optional[TransferFormat] = typer.Option(
+        None, "--format", help="Format of the file, guessed from its extension."
+    ),
+    on_conflict: ConflictPolicy = typer.Option(
+        ConflictPolicy.skip, help="What to do with tasks whose id is already taken."
+    ),
+    chunk_size: int = typer.Option(
+        IMPORT_CHUNK_SIZE,
+        min=0,
+        help="Commit every N tasks, 0 commits all of them or none at once.",
+    ),
+):
+    """
+    Adds the tasks of a JSON lines or CSV file to the active board,
+    reading the file as it goes and committing the tasks in chunks.
+    Tasks of a chunk that fails to import are left out.
+    """
+    from whattodo.transfer import TaskImport
+    from whattodo.transfer import guess_format
+    from whattodo.transfer import read_tasks
+
+    stored = _read_stored_ids()
+    if stored is None:
+        typer.echo("There are no created boards yet!")
+        raise typer.Exit(code=1)
+    statuses, next_id, revision = stored
+    task_import = TaskImport(statuses, next_id, on_conflict.value)
+    format_name = (
+        file_format.value if file_format else guess_format(getattr(source, "name", "-"))
+    )
+    committed = 0
+    pending: List[JournalRecord] = []
+    started = time.perf_counter()
+    try:
+        for dict_task in read_tasks(source, format_name):
+            pending.extend(task_import.records(dict_task))
+            if chunk_size and task_import.imported - committed >= chunk_size:
+                revision = _commit_import(pending, revision)
+                committed, pending = task_import.imported, []
+                _report_throughput(
+                    committed, started, verb="Imported", noun="tasks", err=True
+                )
+        revision = _commit_import(pending, revision)
+        committed = task_import.imported
+    except (ValueError, IndexError) as excinfo:
+        typer.echo(f"The import stopped: {excinfo}")
+        raise typer.Exit(code=1) from excinfo
+    except RevisionConflictError as excinfo:
+        typer.echo("The import stopped: the board was changed by another command")
+        raise typer.Exit(code=1) from excinfo
+    finally:
+        _report_throughput(committed, started, verb="Imported", noun="tasks")
+    if task_import.skipped:
+        typer.echo(f"Skipped {task_import.skipped} tasks whose id is already taken")
+
+
+def _read_stored_ids() -> (
+    Optional[Tuple[MutableMapping[int, bool], int, Optional[int]]]
+):
+    """
+    Retrieves the status of every stored task by id, the next free id
+    and the revision of the stored board, which only the json storage
+    keeps.
+    """
+    revision = None
+    data: Any = None
+    summary = _forward("summary")
+    if summary is not NO_DAEMON:
+        if summary is not None:
+            tasks = _forward("tasks", 0, None)
+            data = {"next_id": summary["next_id"], "tasks": tasks}
+    elif _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        data = sqlite_storage.read_from_sqlite()
     else:
-        typer.confirm(f"Are you sure you want to remove the task {index}?", abort=True)
-        board = Board.from_dict(storage_data)
-        board.remove_task(index)
-        typer.echo(f"The task {index} was removed!")
-        store_to_json(board.to_dict())
+        with locked(exclusive=False, path=_board_file()):
+            data = read_from_json(_board_file(), cache=False)
+            revision = read_revision(_board_file())
+    if not data:
+        return None
+    statuses = {task["id"]: task["status"] for task in data["tasks"]}
+    return statuses, data["next_id"], revision
+
+
+def _commit_import(records: List[JournalRecord], revision: Optional[int]) -> Any:
+    """
+    Persists a chunk of imported tasks with a single write, returning
+    the revision the board is on afterwards.
+
+    @raises RevisionConflictError: When the stored board isn't on
+    REVISION anymore.
+    """
+    if _forward("apply", *records) is not NO_DAEMON:
+        return revision
+    if _uses_sqlite():
+        from whattodo import sqlite_storage
+
+        sqlite_storage.apply_records(records)
+        return revision
+    return append_records(records, expected_revision=revision, path=_board_file())
+
+
+@app.command("export")
+def export_tasks(
+    destination: typer.FileTextWrite = typer.Argument(
+        "-", help="File to write the tasks to, defaults to stdout."
+    ),
+    file_format: Optional[TransferFormat] = typer.Option(
+        None, "--format", help="Format of the file, guessed from its extension."
+    ),
+):
+    """
+    Writes the tasks of the active board into a JSON lines or CSV
+    file, streaming them from the storage one at a time.
+    """
+    from whattodo.transfer import guess_format
+    from whattodo.transfer import write_tasks
+
+    if _read_summary() is None:
+        typer.echo("There are no created boards yet!", err=True)
+        raise typer.Exit(code=1)
+    format_name = (
+        file_format.value
+        if file_format
+        else guess_format(getattr(destination, "name", "-"))
+    )
+    started = time.perf_counter()
+    tasks = map(upgrade_task_dict, _iter_stored_tasks(0, None))
+    exported = write_tasks(tasks, destination, format_name)
+    _report_throughput(exported, started, verb="Exported", noun="tasks", err=True)
+
+
+@app.command("serve")
+def serve():
+    """
+    Keeps the active board in memory and answers the other
+    commands through a unix socket until interrupted.
+    """
+    if _uses_sqlite():
+        typer.echo("The daemon only serves the json storage!")
+        raise typer.Exit(code=1)
+    import asyncio
+
+    from whattodo.daemon import BoardDaemon
+
+    typer.echo(f"Serving the board on {client.SOCKET_FILE}")
+    with suppress(KeyboardInterrupt, asyncio.CancelledError):
+        asyncio.run(BoardDaemon().serve())
+
+
+def _report_timings(timings: ExitStack, phases: List[PhaseDict]) -> None:
+    timings.close()
+    for row in render(phases):
+        typer.echo(row, nl=False, err=True)
 
 
 @app.callback()
-def main(verbose: bool = False):
+def main(  # pylint: disable=too-many-arguments
+    ctx: typer.Context,
+    *,
+    verbose: bool = False,
+    backend: StorageBackend = typer.Option(
+        StorageBackend.json, envvar="WHATTODO_BACKEND", help="Storage engine to use."
+    ),
+    timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Print the wall and CPU time, bytes and tasks of every phase.",
+    ),
+    profile: Optional[str] = typer.Option(
+        None, help="Write a cProfile report of the command to this file."
+    ),
+    profile_memory: bool = typer.Option(
+        False, "--profile-memory", help="Profile memory with tracemalloc instead."
+    ),
+):
     """
     Manage Tasks in the awesome CLI app.
     """
     if verbose:
         typer.echo("Will write verbose output")
         state["verbose"] = True
+    state["backend"] = backend
+    state["board_file"] = None
+    if profile is not None:
+        ctx.call_on_close(start_profiler(profile, profile_memory))
+    if timings:
+        # Phases are reported once the command ends, along with the
+        # one timing the whole command.
+        stack = ExitStack()
+        phases = stack.enter_context(collect())
+        stack.enter_context(phase(ctx.invoked_subcommand or "whattodo"))
+        ctx.call_on_close(lambda: _report_timings(stack, phases))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+"""Client of the board daemon, light enough to load on every command."""
+
+import json
+import os
+
+from typing import Any
+
+SOCKET_FILE = "whattodo.sock"
+
+ERRORS = {"ValueError": ValueError, "IndexError": IndexError}
+
+
+def request(operation: str, *arguments: Any, path: str = SOCKET_FILE) -> Any:
+    """
+    Sends a request to a running daemon and returns its result.
+
+    @raises ConnectionError: When no daemon is listening.
+
+    @raises ValueError: When the daemon rejects the request.
+
+    @raises IdexError: When the given id or index doesn't have a task.
+    """
+    # Only commands talking to a daemon pay for the socket module.
+    import socket  # pylint: disable=import-outside-toplevel
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError) as excinfo:
+            raise ConnectionError("No daemon is running") from excinfo
+        payload = {"op": operation, "args": list(arguments)}
+        client.sendall(json.dumps(payload, ensure_ascii=False).encode() + b"\n")
+        with client.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("The daemon closed the connection")
+    response = json.loads(line)
+    if "error" in response:
+        raise ERRORS.get(response["error"], ValueError)(response["message"])
+    return response["result"]
+
+
+def is_running(path: str = SOCKET_FILE) -> bool:
+    """
+    Checks if a daemon socket exists, without connecting to it.
+    """
+    return os.path.exists(path)
@@ -0,0 +1,274 @@
+"""Resident board daemon serving the CLI over a unix socket."""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from whattodo.api.board import Board
+from whattodo.api.board import JournalRecord
+from whattodo.api.task import Task
+from whattodo.archive import write_segment
+from whattodo.batch import apply_operation
+from whattodo.batch import apply_record
+from whattodo.catalog import active_board_file
+from whattodo.catalog import register_board
+from whattodo.catalog import switch_board
+from whattodo.client import SOCKET_FILE
+from whattodo.file_storage import append_records
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import store_to_json
+
+# Changes arriving within this many seconds are persisted together.
+FLUSH_DELAY = 0.05
+
+LOGGER = logging.getLogger(__name__)
+
+
+class BoardDaemon:  # pylint: disable=too-many-instance-attributes
+    """
+    Keeps the active board in memory and answers requests made
+    of one json object per line, such as
+
+        {"op": "apply", "args": [{"op": "add", "task": {...}}]}
+        {"op": "batch", "args": [["task:add", "my first task"]]}
+        {"op": "summary", "args": []}
+        {"op": "tasks", "args": [0, 50]}
+        {"op": "query", "args": ["done", "2026-01-01T00:00:00", null, "id", 0, 50]}
+        {"op": "retrieve", "args": [3, false]}
+        {"op": "archive", "args": ["2026-01-01T00:00:00"]}
+
+    with one json object per line holding either a "result" or
+    an "error" and its "message". Requests on a missing board
+    have a null result.
+    """
+
+    def __init__(self, path: str = SOCKET_FILE):
+        self._path = path
+        self._board_file = active_board_file()
+        self._board = self._load_board()
+        self._dirty = False
+        # A board created by the daemon has no snapshot to journal on.
+        self._created = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Changes a failed write took from the board, written first
+        # on the next flush.
+        self._unwritten: List[JournalRecord] = []
+        # A single writer thread keeps snapshots on disk in order.
+        self._writer = ThreadPoolExecutor(max_workers=1)
+
+    async def serve(self, started: Optional[asyncio.Event] = None) -> None:
+        """
+        Serves requests until cancelled or terminated, persisting any
+        pending change on the way out.
+        """
+        with suppress(FileNotFoundError):
+            os.remove(self._path)
+        server = await asyncio.start_unix_server(self._handle, path=self._path)
+        loop = asyncio.get_running_loop()
+        # Signal handlers can only be set from the main thread.
+        handles_signals = threading.current_thread() is threading.main_thread()
+        if handles_signals:
+            serving = asyncio.current_task()
+            loop.add_signal_handler(signal.SIGTERM, serving.cancel)  # type: ignore[union-attr]
+        try:
+            async with server:
+                if started is not None:
+                    started.set()
+                await server.serve_forever()
+        finally:
+            if handles_signals:
+                loop.remove_signal_handler(signal.SIGTERM)
+            with suppress(FileNotFoundError):
+                os.remove(self._path)
+            await self.flush()
+            self._writer.shutdown()
+
+    async def flush(self) -> None:
+        """
+        Persists the board when it has unsaved changes, journaling
+        only the changes unless the board was just created. They are
+        serialized on the event loop and written by the writer thread.
+        Changes that fail to be written are kept for the next flush.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._dirty or self._board is None:
+            return
+        self._dirty = False
+        created = self._created
+        self._created = False
+        changes = self._unwritten + self._board.pop_changes()
+        self._unwritten = []
+        if created:
+            store = partial(store_to_json, self._board.to_dict(), path=self._board_file)
+        else:
+            store = partial(append_records, changes, path=self._board_file)
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._writer, store)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("The board changes couldn't be written, keeping them")
+            self._created = created
+            if not created:
+                self._unwritten = changes
+            self._dirty = True
+
+    def execute(  # pylint: disable=too-many-return-statements
+        self, operation: str, arguments: List[Any]
+    ) -> Any:
+        """
+        Runs a single request against the resident board.
+
+        @raises ValueError: When the request is unknown or malformed.
+
+        @raises IdexError: When the given id or index doesn't have a task.
+        """
+        if operation == "add_board":
+            self._board_file = register_board(arguments[0])
+            self._board = Board(name=arguments[0])
+            self._created = True
+            self._mark_dirty()
+            return None
+        if operation == "switch_board":
+            self._board_file = switch_board(arguments[0])
+            self._board = self._load_board()
+            return None
+        if self._board is None:
+            return None
+        if operation == "summary":
+            return {
+                "name": self._board.name,
+                "count": self._board.count_tasks,
+                "next_id": self._board.next_id,
+            }
+        if operation == "tasks":
+            start, stop = arguments
+            tasks = islice(self._board.tasks, start, stop)
+            return [task.to_dict() for task in tasks]
+        if operation == "query":
+            return self._query(self._board, arguments)
+        if operation == "archive":
+            return self._archive(self._board, *arguments)
+        if operation == "retrieve":
+            task_id, by_position = arguments
+            if by_position:
+                return self._board.retrieve_task(task_id).to_dict()
+            return self._board.retrieve_task_by_id(task_id).to_dict()
+        if operation == "apply":
+            return self._apply_records(self._board, arguments)
+        if operation == "batch":
+            return self._apply_operations(self._board, arguments)
+        raise ValueError(f"Unknown request {operation}")
+
+    @staticmethod
+    def _query(board: Board, arguments: List[Any]) -> List[Dict[str, Any]]:
+        status, since, until, order, start, stop = arguments
+        matches = board.query(
+            status=status,
+            since=None if since is None else datetime.fromisoformat(since),
+            until=None if until is None else datetime.fromisoformat(until),
+            order=order,
+        )
+        return [dict(task.to_dict()) for task in islice(matches, start, stop)]
+
+    def _archive(self, board: Board, before: Optional[str]) -> int:
+        archived = board.archive_done(
+            before=None if before is None else datetime.fromisoformat(before)
+        )
+        # Archived tasks are written before their removal is persisted,
+        # so a crash in between duplicates them rather than losing them.
+        write_segment(archived, path=self._board_file)
+        if archived:
+            self._mark_dirty()
+        return len(archived)
+
+    def _apply_records(
+        self, board: Board, records: List[JournalRecord]
+    ) -> List[Optional[int]]:
+        """
+        Applies journal records, returning the ids given to the tasks
+        they add.
+        """
+        added: List[Optional[int]] = []
+        try:
+            for record in records:
+                if record["op"] == "add":
+                    task = Task.from_dict(record["task"])
+                    board.add(task)
+                    added.append(task.id)
+                else:
+                    apply_record(board, record)
+        finally:
+            self._mark_dirty()
+        return added
+
+    def _apply_operations(
+        self, board: Board, operations: List[List[str]]
+    ) -> Dict[str, Any]:
+        applied = 0
+        try:
+            for arguments in operations:
+                apply_operation(board, arguments)
+                applied += 1
+        except (ValueError, IndexError) as excinfo:
+            return {"applied": applied, "error": str(excinfo)}
+        finally:
+            if applied:
+                self._mark_dirty()
+        return {"applied": applied, "error": None}
+
+    def _load_board(self) -> Optional[Board]:
+        # The daemon keeps the board, so caching it would only go stale.
+        storage_data = read_from_json(self._board_file, cache=False)
+        return Board.from_dict(storage_data) if storage_data else None
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                FLUSH_DELAY, lambda: asyncio.ensure_future(self.flush())
+            )
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(await self._respond(line) + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, line: bytes) -> bytes:
+        response: Dict[str, Any]
+        try:
+            payload = json.loads(line)
+            # Pending changes belong to the board being left, if any.
+            if payload["op"] in ("flush", "add_board", "switch_board"):
+                await self.flush()
+            if payload["op"] == "flush":
+                response = {"result": None}
+            else:
+                response = {"result": self.execute(payload["op"], payload["args"])}
+        except (ValueError, IndexError, KeyError, TypeError) as excinfo:
+            response = {
+                "error": type(excinfo).__name__,
+                "message": str(excinfo.args[0]) if excinfo.args else "",
+            }
+        return json.dumps(response, ensure_ascii=False).encode()
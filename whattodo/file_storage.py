@@ -1,25 +1,1431 @@
 """Main module to handle data persistance using a json file."""
 
+# pylint: disable=too-many-lines
+
+from __future__ import annotations
+
 import json
+import marshal
+import os
+import re
+import threading
 
+from contextlib import ExitStack
+from contextlib import contextmanager
 from contextlib import suppress
+from functools import partial
+from itertools import chain
+from itertools import islice
 from json.decoder import JSONDecodeError
+from typing import IO
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TypedDict
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+from whattodo.timings import phase
+
+# Reading a header must stay cheap for the CLI fast path, so the
+# board api, sqlite and hashing modules are imported by the functions
+# using them instead.
+# pylint: disable=import-outside-toplevel
+if TYPE_CHECKING:  # pragma: no cover
+    from whattodo.api.board import BoardDict
+    from whattodo.api.board import JournalRecord
+    from whattodo.api.task import TaskDict
+
+# Every board snapshot has its journal, header, lock and search
+# index files named after it, such as the ones of the default board.
+DATA_FILE = "whattodo_data.json"
+JOURNAL_FILE = "whattodo_data.journal"
+HEADER_FILE = "whattodo_data.meta.json"
+LOCK_FILE = "whattodo_data.lock"
+INDEX_FILE = "whattodo_data.index.db"
+CACHE_FILE = "whattodo_data.cache"
+
+# Parsed boards are cached with marshal, keyed by the identity and
+# content hash of the snapshot and journal they were read from.
+CACHE_VERSION = 2
+
+# The journal is folded back into the snapshot once it grows past
+# JOURNAL_MAX_BYTES, or past JOURNAL_RATIO of the snapshot size as
+# long as it holds at least JOURNAL_MIN_BYTES.
+JOURNAL_MAX_BYTES = 4 * 1024 * 1024
+JOURNAL_MIN_BYTES = 64 * 1024
+JOURNAL_RATIO = 0.5
+
+# Snapshots of boards over SEGMENT_SIZE tasks are split in segments of
+# at most that many tasks, stored on a directory named after the board
+# and listed by a manifest kept on the snapshot path. Segments are
+# replaced rather than rewritten, so compacting the journal only writes
+# the segments holding changed tasks along with the manifest.
+SEGMENT_SIZE = 10_000
+
+HeaderDict = TypedDict(
+    "HeaderDict",
+    {
+        "version": int,
+        "revision": int,
+        "name": str,
+        "count": int,
+        "next_id": int,
+        "ordered": bool,
+        "statuses": Dict[str, int],
+        "snapshot": List[int],
+        "journal": List[int],
+    },
+)
+
+SegmentDict = TypedDict(
+    "SegmentDict",
+    {"file": str, "count": int, "done": int, "min_id": int, "max_id": int},
+)
+
+
+_lock_state = threading.local()
+
+_TEMPLATE_ENCODER = json.JSONEncoder(ensure_ascii=False)
+_TASK_KEYS = ["id", "description", "status", "created_at", "utc_offset"]
+
+
+class RevisionConflictError(Exception):
+    """
+    Raised when the stored board changed since it was read.
+    """
+
+
+@contextmanager
+def locked(exclusive: bool = True, path: str = DATA_FILE) -> Iterator[None]:
+    """
+    Holds an advisory lock over the files of the board stored on
+    PATH, shared between readers and exclusive for writers. Nested
+    calls reuse the lock already held by the thread, so only the
+    outermost mode counts.
+
+        >>> with locked():
+        ...     data = read_from_json()
+        ...     store_to_json(data)
+    """
+    lock_path = _sibling_file(path, ".lock")
+    held = _lock_state.__dict__.setdefault("held", set())
+    if fcntl is None or lock_path in held:
+        yield
+        return
+    with open(lock_path, "a", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        held.add(lock_path)
+        try:
+            yield
+        finally:
+            held.discard(lock_path)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
 
-from whattodo.api.board import BoardDict
+@contextmanager
+def atomic_open(path: str, binary: bool = False) -> Iterator[IO[Any]]:
+    """
+    Opens a temporary file next to PATH that replaces it once
+    fully written and flushed to disk, in text mode unless BINARY.
+    The file keeps the permissions of the one it replaces, or gets
+    the ones open would give it under the umask.
+    """
+    import stat
+    import tempfile
 
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(
+        "wb" if binary else "w",
+        encoding=None if binary else "utf-8",
+        dir=directory,
+        suffix=".tmp",
+        delete=False,
+    ) as temp_file:
+        try:
+            yield temp_file
+            try:
+                mode = stat.S_IMODE(os.stat(path).st_mode)
+            except FileNotFoundError:
+                mode = 0o666 & ~_current_umask()
+            os.chmod(temp_file.name, mode)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        except BaseException:
+            temp_file.close()
+            os.remove(temp_file.name)
+            raise
+    os.replace(temp_file.name, path)
 
-def store_to_json(data: BoardDict) -> None:
+
+def store_to_json(
+    data: BoardDict, expected_revision: Optional[int] = None, path: str = DATA_FILE
+) -> int:
     """
-    Wrapper used to write data into json format.
+    Wrapper used to write data into json format, returning the
+    revision stored.
+
+    The snapshot is written to a temporary file that replaces the
+    previous one, so readers never see a partial board. A full
+    snapshot supersedes the journal and the search index, so they
+    are discarded.
+
+    @raises RevisionConflictError: When EXPECTED_REVISION is given
+    and the stored board is on another revision.
     """
-    with open("whattodo_data.json", "w+", encoding="utf-8") as json_file:
-        json.dump(data, json_file, ensure_ascii=False, indent=4)
+    with locked(path=path):
+        revision = read_revision(path)
+        _check_revision(revision, expected_revision)
+        _write_snapshot(data, revision + 1, path)
+        _remove_index(path)
+    return revision + 1
 
 
-def read_from_json():
+def read_from_json(path: str = DATA_FILE, cache: bool = True):
     """
     Wrapper used to read data into json format.
+
+    The journal is replayed on top of the stored snapshot. Boards
+    read to be changed are read with CACHE False, which doesn't store
+    them on the cache their change is about to make stale.
     """
-    with suppress(FileNotFoundError, JSONDecodeError):
-        with open("whattodo_data.json", "r") as json_file:
+    return _read_with_revision(path, cache)[0]
+
+
+def read_revision(path: str = DATA_FILE) -> int:
+    """
+    Retrieves the revision of the stored board, which grows with
+    every snapshot and journaled operation. A missing board is on
+    revision 0.
+    """
+    header = read_header(path)
+    return header["revision"] if header else 0
+
+
+def iter_tasks_from_json(
+    start: int = 0, stop: Optional[int] = None, path: str = DATA_FILE
+) -> Iterator[TaskDict]:
+    """
+    Streams the stored tasks between the 0 based START and STOP
+    indexes, parsing the snapshot only as far as needed. Tasks of
+    snapshots older than format version 3 get ids like when read,
+    and only the segments holding those tasks are read from a
+    segmented snapshot.
+
+    Pending journal operations by id are applied over the snapshot
+    as it is streamed. Segments whose tasks all come before START once
+    the journal is applied are skipped, other snapshots are parsed from
+    their first task up to STOP while the journal isn't compacted.
+    Journals with
+    records by index or tasks still lacking an id have the whole board
+    read instead.
+    """
+    with ExitStack() as files:
+        with locked(exclusive=False, path=path):
+            tasks: Optional[Iterator[TaskDict]] = None
+            if os.path.exists(_sibling_file(path, ".journal")):
+                overlay = _JournalOverlay(read_journal(path))
+                if overlay.applicable:
+                    snapshot, skipped = _open_live_tasks(files, start, path, overlay)
+                    tasks = islice(
+                        overlay.apply(snapshot),
+                        start - skipped,
+                        None if stop is None else stop - skipped,
+                    )
+                else:
+                    data = read_from_json(path)
+                    tasks = islice(data["tasks"] if data else [], start, stop)
+            else:
+                tasks = _open_tasks(files, start, stop, path)
+        # Snapshots and segments are replaced rather than rewritten, so
+        # the opened files keep holding the same board once the lock is
+        # released.
+        with suppress(JSONDecodeError):
+            yield from tasks
+
+
+def segments_directory(path: str = DATA_FILE) -> str:
+    """
+    Retrieves the directory holding the segments of the board
+    stored on PATH, which only exists for segmented snapshots.
+    """
+    return _sibling_file(path, ".segments")
+
+
+def read_lazily_from_json(path: str = DATA_FILE):
+    """
+    Reads the board like read_from_json, except that the tasks of a
+    segmented snapshot without pending journal operations are left
+    as SegmentedTasks, which only read a segment once one of its
+    tasks is accessed.
+
+        >>> board = Board.from_dict(read_lazily_from_json(), lazy=True)
+        >>> board.list_tasks[-1]
+
+    Accessing a segment replaced since the board was read raises a
+    RevisionConflictError.
+    """
+    from whattodo.api.segmented import SegmentedTasks
+
+    with locked(exclusive=False, path=path):
+        manifest = None
+        if not os.path.exists(_sibling_file(path, ".journal")):
+            manifest = read_manifest(path)
+        if manifest is None:
+            return read_from_json(path)
+    segments = [
+        (segment["count"], partial(_read_segment, segment["file"], path))
+        for segment in manifest["segments"]
+    ]
+    return {
+        "version": manifest["version"],
+        "name": manifest["name"],
+        "next_id": manifest["next_id"],
+        "tasks": SegmentedTasks(segments),
+    }
+
+
+def retrieve_task_from_json(index: int, path: str = DATA_FILE) -> Optional[TaskDict]:
+    """
+    Retrieves a task given it's 0 based index, streaming the tasks
+    only up to it, or None when no board is stored.
+
+    @raises ValueError: When no tasks are present on the board.
+
+    @raises IdexError: When the given index doesn't have a task.
+    """
+    with locked(exclusive=False, path=path):
+        header = read_header(path)
+        if header is None:
+            return None
+        if not header["count"]:
+            raise ValueError("No tasks on this board!")
+        position = index + header["count"] if index < 0 else index
+        dict_task = None
+        if 0 <= position < header["count"]:
+            dict_task = next(iter_tasks_from_json(position, position + 1, path), None)
+    if dict_task is None:
+        raise IndexError(f"No tasks found at the index {index}")
+    return dict_task
+
+
+def retrieve_task_by_id_from_json(
+    task_id: int, path: str = DATA_FILE
+) -> Optional[TaskDict]:
+    """
+    Retrieves a task given it's id, or None when no board is stored.
+    Only the journal and the snapshot segments whose id range holds
+    the id are read, so the cost doesn't grow with the board.
+
+    @raises ValueError: When no tasks are present on the board.
+
+    @raises IdexError: When no task has the given id.
+    """
+    with locked(exclusive=False, path=path), ExitStack() as files:
+        header = read_header(path)
+        if header is None:
+            return None
+        if not header["count"]:
+            raise ValueError("No tasks on this board!")
+        dict_task = None
+        if task_id < header["next_id"]:
+            overlay = _JournalOverlay(read_journal(path))
+            if overlay.applicable:
+                tasks = overlay.apply(_open_tasks(files, 0, None, path, task_id))
+            else:
+                tasks = iter(read_from_json(path, cache=False)["tasks"])
+            dict_task = next((task for task in tasks if task["id"] == task_id), None)
+    if dict_task is None:
+        raise IndexError(f"No tasks found with the id {task_id}")
+    return dict_task
+
+
+def has_stored_board(path: str = DATA_FILE) -> bool:
+    """
+    Checks if a board snapshot exists without reading it.
+    """
+    return os.path.exists(path)
+
+
+def append_to_journal(record: JournalRecord, path: str = DATA_FILE) -> None:
+    """
+    Appends a single operation to the journal, compacting it
+    into a snapshot once a size threshold is reached or when
+    the snapshot is on an older format version.
+
+        >>> append_to_journal({"op": "add", "task": task.to_dict()})
+        >>> append_to_journal({"op": "update", "id": 1, "status": True})
+        >>> append_to_journal({"op": "remove", "id": 1})
+        >>> append_to_journal({"op": "clean"})
+    """
+    append_records([record], path=path)
+
+
+def append_records(
+    records: List[JournalRecord],
+    expected_revision: Optional[int] = None,
+    path: str = DATA_FILE,
+) -> int:
+    """
+    Appends many operations to the journal with a single write,
+    returning the revision stored. Saving a board this way costs
+    as much as its changes, whatever its size. Added tasks without
+    an id are given the next free one, set on their record.
+
+        >>> append_records(board.pop_changes())
+
+    @raises RevisionConflictError: When EXPECTED_REVISION is given
+    and the stored board is on another revision.
+    """
+    with locked(path=path):
+        header = read_header(path)
+        revision = header["revision"] if header else 0
+        _check_revision(revision, expected_revision)
+        if not records:
+            return revision
+        if header is not None:
+            _assign_added_ids(records, header["next_id"])
+        with phase("journal.append") as phase_record:
+            lines = [
+                json.dumps(record, ensure_ascii=False) + "\n" for record in records
+            ]
+            payload = "".join(lines).encode()
+            with open(_sibling_file(path, ".journal"), "ab") as journal:
+                journal.write(payload)
+            phase_record["bytes_written"] = len(payload)
+        if header is not None:
+            updated = [_apply_record_to_header(header, record) for record in records]
+            if all(updated):
+                _write_header(header, path)
+        _update_index(records, revision, revision + len(records), path)
+        from whattodo.api.board import FORMAT_VERSION
+
+        outdated = header is not None and header["version"] < FORMAT_VERSION
+        if outdated or _journal_needs_compaction(path):
+            compact_journal(path)
+            return read_revision(path)
+    return revision + len(records)
+
+
+def replay_journal(data: BoardDict, path: str = DATA_FILE) -> BoardDict:
+    """
+    Applies every journaled operation to the given board data.
+
+    A truncated trailing record, left by an interrupted append,
+    is ignored.
+    """
+    _replay_journal(data, path)
+    return data
+
+
+def compact_journal(path: str = DATA_FILE) -> None:
+    """
+    Folds the journal into a fresh snapshot, upgrading it
+    to the current format version. Only the segments holding
+    changed tasks are rewritten on segmented snapshots.
+    """
+    from whattodo.api.board import FORMAT_VERSION
+    from whattodo.api.board import Board
+
+    with locked(path=path):
+        manifest = read_manifest(path)
+        if (
+            manifest is not None
+            and manifest["version"] == FORMAT_VERSION
+            and _compact_segments(manifest, path)
+        ):
+            return
+        data, revision = _read_with_revision(path, cache=False)
+        if data:
+            _write_snapshot(Board.from_dict(data).to_dict(), revision + 1, path)
+            _update_index([], revision, revision + 1, path)
+
+
+def search_tasks(
+    query: str, limit: Optional[int] = None, path: str = DATA_FILE
+) -> List[TaskDict]:
+    """
+    Retrieves up to LIMIT tasks whose descriptions match the query,
+    in the order they were added. Terms separated by spaces must all
+    match, OR separates alternatives and a trailing * matches the
+    term as a prefix.
+
+    The inverted index lives on a sqlite database next to the board,
+    built on the first search and kept up to date by every append.
+
+        >>> search_tasks("buy milk OR egg*", limit=10)
+
+    @raises ValueError: When the query has no terms.
+    """
+    from whattodo import sqlite_storage
+    from whattodo.search import parse_query
+
+    parse_query(query)
+    index_path = _sibling_file(path, ".index.db")
+    with locked(path=path):
+        revision = read_revision(path)
+        if not revision:
+            return []
+        if not os.path.exists(index_path) or (
+            sqlite_storage.read_revision(index_path) != revision
+        ):
+            data, revision = _read_with_revision(path)
+            if not data:
+                return []
+            sqlite_storage.store_to_sqlite(data, revision, path=index_path)
+        return sqlite_storage.search_tasks(query, limit, path=index_path)
+
+
+def read_header(path: str = DATA_FILE) -> Optional[HeaderDict]:
+    """
+    Retrieves the board name, task count and per status counts
+    without touching the task payload. A header that doesn't
+    match the payload size and modification time is rebuilt.
+
+        >>> read_header()
+        ... {"name": "Personal", "count": 2, "statuses": {"done": 1, "not done": 1}, ...}
+    """
+    with locked(exclusive=False, path=path):
+        header = _read_valid_header(path)
+        if header is None:
+            data, revision = _read_with_revision(path)
+            if not data:
+                return None
+            header = _build_header(data, revision)
+            _write_header(header, path)
+    return header
+
+
+def read_manifest(path: str = DATA_FILE) -> Optional[Dict[str, Any]]:
+    """
+    Reads the manifest stored on PATH, or None when the snapshot
+    is missing or holds its tasks itself.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as json_file:
+            if _JsonStream(json_file).find_array(("tasks", "segments")) != "segments":
+                return None
+            json_file.seek(0)
             return json.load(json_file)
+    except (FileNotFoundError, JSONDecodeError):
+        return None
+
+
+def read_journal(path: str = DATA_FILE) -> Iterator[JournalRecord]:
+    """
+    Yields the journaled operations, up to a truncated trailing
+    record left by an interrupted append.
+    """
+    with suppress(FileNotFoundError):
+        journal_path = _sibling_file(path, ".journal")
+        with open(journal_path, "r", encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    yield json.loads(line)
+                except JSONDecodeError:
+                    return
+
+
+def _encode_board(data: Dict[str, Any]) -> Iterator[str]:
+    """
+    Encodes board data exactly like json.dump with an indent of 4,
+    filling a template for every format version 3 task instead of
+    going through the much slower pure Python indenting encoder.
+    """
+    encode = _TEMPLATE_ENCODER.encode
+    yield "{"
+    for position, (key, value) in enumerate(data.items()):
+        yield f'{"," if position else ""}\n    {encode(key)}: '
+        if key != "tasks" or not value:
+            yield json.dumps(value, ensure_ascii=False, indent=4).replace(
+                "\n", "\n    "
+            )
+            continue
+        yield "["
+        for task_position, task in enumerate(value):
+            yield ",\n        " if task_position else "\n        "
+            if list(task) == _TASK_KEYS and isinstance(task["id"], int):
+                yield (
+                    f'{{\n            "id": {task["id"]},'
+                    f'\n            "description": {encode(task["description"])},'
+                    f'\n            "status": {"true" if task["status"] else "false"},'
+                    f'\n            "created_at": {task["created_at"]},'
+                    f'\n            "utc_offset": {task["utc_offset"]}\n        }}'
+                )
+            else:
+                yield json.dumps(task, ensure_ascii=False, indent=4).replace(
+                    "\n", "\n        "
+                )
+        yield "\n    ]"
+    yield "\n}" if data else "}"
+
+
+def _write_snapshot(data: BoardDict, revision: int, path: str) -> None:
+    from whattodo.api.board import FORMAT_VERSION
+
+    tasks = data["tasks"]
+    segments: List[SegmentDict] = []
+    with phase("snapshot.write") as record:
+        if len(tasks) > SEGMENT_SIZE and data.get("version") == FORMAT_VERSION:
+            for number, start in enumerate(range(0, len(tasks), SEGMENT_SIZE)):
+                segments.append(
+                    _write_segment(
+                        tasks[start : start + SEGMENT_SIZE],
+                        f"segment-{revision:08d}-{number:06d}.json",
+                        path,
+                    )
+                )
+            _write_manifest(dict(data, revision=revision), segments, path)
+        else:
+            with atomic_open(path) as json_file:
+                json_file.writelines(_encode_board(dict(data, revision=revision)))
+        _prune_segments(segments, path)
+        record["bytes_written"] = os.path.getsize(path) + _segments_size(segments, path)
+        record["tasks"] = len(tasks)
+    _remove_journal_and_cache(path)
+    _write_header(_build_header(data, revision), path)
+
+
+def _write_segment(tasks: List[TaskDict], name: str, path: str) -> SegmentDict:
+    directory = segments_directory(path)
+    os.makedirs(directory, exist_ok=True)
+    with atomic_open(os.path.join(directory, name)) as segment_file:
+        segment_file.write(json.dumps(tasks, ensure_ascii=False))
+    ids = [task["id"] for task in tasks if task["id"] is not None]
+    return {
+        "file": name,
+        "count": len(tasks),
+        "done": sum(1 for task in tasks if task["status"]),
+        "min_id": min(ids),
+        "max_id": max(ids),
+    }
+
+
+def _write_manifest(
+    data: Dict[str, Any], segments: List[SegmentDict], path: str
+) -> None:
+    manifest = {
+        "version": data["version"],
+        "name": data["name"],
+        "next_id": data["next_id"],
+        "revision": data["revision"],
+        "segments": segments,
+    }
+    with atomic_open(path) as json_file:
+        json_file.write(json.dumps(manifest, ensure_ascii=False, indent=4))
+
+
+def _prune_segments(segments: List[SegmentDict], path: str) -> None:
+    """
+    Removes the segment files the manifest no longer lists, along
+    with the segments directory once the snapshot isn't segmented.
+    """
+    directory = segments_directory(path)
+    kept = {segment["file"] for segment in segments}
+    with suppress(FileNotFoundError):
+        for name in os.listdir(directory):
+            if name not in kept:
+                os.remove(os.path.join(directory, name))
+        if not kept:
+            os.rmdir(directory)
+
+
+def _segments_size(segments: List[SegmentDict], path: str) -> int:
+    directory = segments_directory(path)
+    return sum(
+        os.path.getsize(os.path.join(directory, segment["file"]))
+        for segment in segments
+    )
+
+
+def _remove_journal_and_cache(path: str) -> None:
+    for stale_path in (_sibling_file(path, ".journal"), _sibling_file(path, ".cache")):
+        with suppress(FileNotFoundError):
+            os.remove(stale_path)
+
+
+def _read_segment(name: str, path: str) -> List[TaskDict]:
+    """
+    Reads the tasks of the segment NAME.
+
+    @raises RevisionConflictError: When the segment was replaced
+    since the manifest listing it was read.
+    """
+    with locked(exclusive=False, path=path):
+        try:
+            with open(os.path.join(segments_directory(path), name), "rb") as segment:
+                return json.loads(segment.read())
+        except FileNotFoundError as error:
+            raise RevisionConflictError(
+                f"The segment {name} was replaced, read the board again"
+            ) from error
+
+
+def _read_segments(manifest: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """
+    Assembles the board data listed by a manifest from its segments.
+    """
+    directory = segments_directory(path)
+    tasks: List[TaskDict] = []
+    with phase("segments.read") as record:
+        for segment in manifest["segments"]:
+            with open(os.path.join(directory, segment["file"]), "rb") as segment_file:
+                payload = segment_file.read()
+            record["bytes_read"] += len(payload)
+            tasks.extend(json.loads(payload))
+        record["tasks"] = len(tasks)
+    return {
+        "version": manifest["version"],
+        "name": manifest["name"],
+        "next_id": manifest["next_id"],
+        "tasks": tasks,
+        "revision": manifest["revision"],
+    }
+
+
+def _open_tasks(
+    files: ExitStack,
+    start: int,
+    stop: Optional[int],
+    path: str,
+    task_id: Optional[int] = None,
+) -> Iterator[TaskDict]:
+    """
+    Opens the snapshot, and the segments holding the tasks between
+    START and STOP on segmented ones, into FILES, returning an iterator
+    decoding those tasks from the opened files. Given a TASK_ID, only
+    the segments whose id range holds it are opened.
+    """
+    try:
+        json_file = files.enter_context(
+            open(path, "r", encoding="utf-8")  # pylint: disable=consider-using-with
+        )
+        stream = _JsonStream(json_file)
+        key = stream.find_array(("tasks", "segments"))
+        if key == "tasks":
+            return islice(_with_ids(stream.iter_items()), start, stop)
+        segments: List[SegmentDict] = list(stream.iter_items()) if key else []
+    except (FileNotFoundError, JSONDecodeError):
+        return iter([])
+    if task_id is not None:
+        segments = [
+            segment
+            for segment in segments
+            if segment["min_id"] <= task_id <= segment["max_id"]
+        ]
+    return _open_segments(files, segments, start, stop, path)
+
+
+def _open_live_tasks(
+    files: ExitStack, start: int, path: str, overlay: "_JournalOverlay"
+) -> Tuple[Iterator[TaskDict], int]:
+    """
+    Opens the snapshot tasks from the segment holding the task at
+    START once the OVERLAY is applied, returning them along with the
+    number of tasks left before them. Segments are only skipped when
+    their id ranges don't overlap, so their removed tasks are known.
+    """
+    manifest = read_manifest(path)
+    segments: List[SegmentDict] = manifest["segments"] if manifest else []
+    if not segments or any(
+        previous["max_id"] >= segment["min_id"]
+        for previous, segment in zip(segments, segments[1:])
+    ):
+        return _open_tasks(files, 0, None, path), 0
+    skipped = first = 0
+    while first < len(segments):
+        live = overlay.live_count(segments[first])
+        if skipped + live > start:
+            break
+        skipped += live
+        first += 1
+    return _open_segments(files, segments[first:], 0, None, path), skipped
+
+
+def _open_segments(
+    files: ExitStack,
+    segments: List[SegmentDict],
+    start: int,
+    stop: Optional[int],
+    path: str,
+) -> Iterator[TaskDict]:
+    directory = segments_directory(path)
+    opened: List[IO[bytes]] = []
+    first = offset = 0
+    for segment in segments:
+        last = first + segment["count"]
+        if last > start and (stop is None or first < stop) and segment["count"]:
+            if not opened:
+                offset = first
+            segment_path = os.path.join(directory, segment["file"])
+            opened.append(
+                files.enter_context(
+                    open(segment_path, "rb")  # pylint: disable=consider-using-with
+                )
+            )
+        first = last
+    tasks = chain.from_iterable(
+        json.loads(segment_file.read()) for segment_file in opened
+    )
+    return islice(tasks, start - offset, None if stop is None else stop - offset)
+
+
+def _compact_segments(manifest: Dict[str, Any], path: str) -> bool:
+    """
+    Folds the journal into a segmented snapshot, rewriting only the
+    segments holding changed tasks along with the manifest. Returns
+    False, writing nothing, when the journal has records by index or
+    the board fits a single snapshot again.
+    """
+    records = list(read_journal(path))
+    previous = _read_valid_header(path)
+    replay = _SegmentReplay(manifest, path)
+    if not all(replay.apply(record) for record in records):
+        return False
+    if replay.count <= SEGMENT_SIZE:
+        return False
+    revision = manifest["revision"] + len(records) + 1
+    with phase("segments.compact") as record:
+        segments = replay.write(revision)
+        _write_manifest(
+            dict(manifest, next_id=replay.next_id, revision=revision), segments, path
+        )
+        _prune_segments(segments, path)
+        record["bytes_written"] = os.path.getsize(path)
+        record["tasks"] = replay.count
+    _remove_journal_and_cache(path)
+    done = sum(segment["done"] for segment in segments)
+    header: HeaderDict = {
+        "version": manifest["version"],
+        "revision": revision,
+        "name": manifest["name"],
+        "count": replay.count,
+        "next_id": replay.next_id,
+        # Compactions keep the task order, unknown without a header.
+        "ordered": previous["ordered"] if previous else False,
+        "statuses": {"done": done, "not done": replay.count - done},
+        "snapshot": [],
+        "journal": [],
+    }
+    _write_header(header, path)
+    _update_index([], revision - 1, revision, path)
+    return True
+
+
+def _update_index(
+    records: List[JournalRecord], revision: int, new_revision: int, path: str
+) -> None:
+    """
+    Applies the records to the search index when it is on REVISION.
+    An index left behind, or one the records fail on, is rebuilt by
+    the next search instead.
+    """
+    index_path = _sibling_file(path, ".index.db")
+    if not os.path.exists(index_path):
+        return
+    from whattodo import sqlite_storage
+
+    with suppress(ValueError, IndexError):
+        if sqlite_storage.read_revision(index_path) == revision:
+            sqlite_storage.apply_records(
+                records, revision=new_revision, path=index_path
+            )
+
+
+def _remove_index(path: str) -> None:
+    index_path = _sibling_file(path, ".index.db")
+    for index_file in (index_path, index_path + "-wal", index_path + "-shm"):
+        with suppress(FileNotFoundError):
+            os.remove(index_file)
+
+
+def _check_revision(revision: int, expected_revision: Optional[int]) -> None:
+    if expected_revision is not None and expected_revision != revision:
+        raise RevisionConflictError(
+            f"The board is on revision {revision}, not {expected_revision}"
+        )
+
+
+def _sibling_file(path: str, extension: str) -> str:
+    return os.path.splitext(path)[0] + extension
+
+
+def _read_with_revision(
+    path: str, cache: bool = True
+) -> Tuple[Optional[BoardDict], int]:
+    """
+    Reads the snapshot and replays the journal on top of it,
+    counting every journaled operation as a revision.
+
+    The result is cached next to the snapshot, when CACHE is True,
+    and loaded instead while neither the snapshot nor the journal
+    change.
+    """
+    with locked(exclusive=False, path=path):
+        if not os.path.exists(path):
+            return None, 0
+        key = _cache_key(path)
+        cached = _read_cache(key, path)
+        if cached is not None:
+            return cached
+        try:
+            with phase("snapshot.read") as record:
+                with open(path, "rb") as json_file:
+                    payload = json_file.read()
+                record["bytes_read"] = len(payload)
+            with phase("json.decode") as record:
+                data = json.loads(payload)
+                record["tasks"] = len(data.get("tasks") or [])
+        except (FileNotFoundError, JSONDecodeError):
+            return None, 0
+        if "segments" in data:
+            data = _read_segments(data, path)
+        revision = data.pop("revision", 0)
+        with phase("journal.replay") as record:
+            revision += _replay_journal(data, path)
+            record["tasks"] = len(data.get("tasks") or [])
+        if cache:
+            _write_cache(key, data, revision, path)
+        return data, revision
+
+
+def _cache_key(path: str) -> Tuple[Any, ...]:
+    """
+    Identifies the snapshot and journal by their inode, size,
+    modification time and content hash.
+    """
+    import hashlib
+
+    from whattodo.api.board import FORMAT_VERSION
+
+    key: List[Any] = [CACHE_VERSION, FORMAT_VERSION]
+    for file_path in (path, _sibling_file(path, ".journal")):
+        try:
+            with open(file_path, "rb") as stored_file:
+                stat = os.fstat(stored_file.fileno())
+                digest = hashlib.blake2b(digest_size=16)
+                for chunk in iter(partial(stored_file.read, 1024 * 1024), b""):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            key.append(None)
+            continue
+        key.append((stat.st_ino, stat.st_size, stat.st_mtime_ns, digest.digest()))
+    return tuple(key)
+
+
+def _read_cache(key: Tuple[Any, ...], path: str) -> Optional[Tuple[BoardDict, int]]:
+    """
+    Loads the cached board when the key written ahead of it matches,
+    reading only that key from a stale cache.
+    """
+    try:
+        with phase("cache.read") as record:
+            with open(_sibling_file(path, ".cache"), "rb") as cache_file:
+                if marshal.load(cache_file) != key:
+                    record["bytes_read"] = cache_file.tell()
+                    return None
+                data, revision = marshal.load(cache_file)
+                record["bytes_read"] = cache_file.tell()
+            record["tasks"] = len(data.get("tasks") or []) if data else 0
+    except (FileNotFoundError, EOFError, ValueError, TypeError):
+        return None
+    return data, revision
+
+
+def _write_cache(
+    key: Tuple[Any, ...], data: BoardDict, revision: int, path: str
+) -> None:
+    with phase("cache.write") as record:
+        cache_path = _sibling_file(path, ".cache")
+        with atomic_open(cache_path, binary=True) as cache_file:
+            marshal.dump(key, cache_file)  # type: ignore[arg-type]
+            marshal.dump((data, revision), cache_file)  # type: ignore[arg-type]
+        record["bytes_written"] = os.path.getsize(cache_path)
+
+
+def _replay_journal(data: BoardDict, path: str) -> int:
+    if not data:
+        return 0
+    from whattodo.api.board import assign_task_ids
+
+    assign_task_ids(data)
+    replay = _JournalReplay(data)
+    for record in read_journal(path):
+        replay.apply(record)
+    replay.compact()
+    return replay.replayed
+
+
+def _with_ids(tasks: Iterator[TaskDict]) -> Iterator[TaskDict]:
+    for position, task in enumerate(tasks, 1):
+        if task.get("id") is None:
+            task["id"] = position
+        yield task
+
+
+def _build_header(data: BoardDict, revision: int) -> HeaderDict:
+    done = sum(1 for task in data["tasks"] if task["status"])
+    ids = [task.get("id") for task in data["tasks"]]
+    # Tasks without an id get the next ones once read, see assign_task_ids.
+    next_id = max(
+        data.get("next_id", 1), max((task_id or 0 for task_id in ids), default=0) + 1
+    ) + sum(1 for task_id in ids if task_id is None)
+    return {
+        "version": data.get("version", 1),
+        "revision": revision,
+        "name": data["name"],
+        "count": len(data["tasks"]),
+        "next_id": next_id,
+        "ordered": _in_id_order(ids),
+        "statuses": {"done": done, "not done": len(data["tasks"]) - done},
+        "snapshot": [],
+        "journal": [],
+    }
+
+
+def _current_umask() -> int:
+    # The umask can only be read by setting it, so it is set back
+    # right away.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def _payload_identity(path: str) -> List[int]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return []
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _write_header(header: HeaderDict, path: str) -> None:
+    header["snapshot"] = _payload_identity(path)
+    header["journal"] = _payload_identity(_sibling_file(path, ".journal"))
+    # A torn header is rebuilt from the payload like a stale one,
+    # so headers are rewritten in place rather than replaced.
+    with open(_sibling_file(path, ".meta.json"), "w", encoding="utf-8") as header_file:
+        header_file.write(json.dumps(header, ensure_ascii=False))
+
+
+def _read_valid_header(path: str) -> Optional[HeaderDict]:
+    try:
+        header_path = _sibling_file(path, ".meta.json")
+        with open(header_path, "r", encoding="utf-8") as header_file:
+            header = json.load(header_file)
+    except (FileNotFoundError, JSONDecodeError):
+        return None
+    if (
+        "revision" not in header
+        or "next_id" not in header
+        or "ordered" not in header
+        or header.get("snapshot") != _payload_identity(path)
+        or header.get("journal") != _payload_identity(_sibling_file(path, ".journal"))
+    ):
+        return None
+    return header
+
+
+def _apply_record_to_header(header: HeaderDict, record: JournalRecord) -> bool:
+    """
+    Updates the header counts with a journaled operation.
+    Returns False when the record lacks the statuses needed.
+    """
+    header["revision"] += 1
+    statuses = header["statuses"]
+    operation = record["op"]
+    if operation == "add":
+        header["count"] += 1
+        task_id = record["task"]["id"] or 0
+        # Tasks with a lower id than earlier ones break the id order.
+        header["ordered"] = header["ordered"] and task_id >= header["next_id"]
+        header["next_id"] = max(header["next_id"], task_id + 1)
+        statuses[_status_name(record["task"]["status"])] += 1
+    elif operation == "update" and "previous" in record:
+        statuses[_status_name(record["previous"])] -= 1
+        statuses[_status_name(record["status"])] += 1
+    elif operation == "remove" and "status" in record:
+        header["count"] -= 1
+        statuses[_status_name(record["status"])] -= 1
+    elif operation == "clean":
+        header["count"] = 0
+        header["ordered"] = True
+        header["statuses"] = {"done": 0, "not done": 0}
+    else:
+        return False
+    return True
+
+
+def _in_id_order(ids: List[Optional[int]]) -> bool:
+    """
+    Checks if tasks with these ids are stored sorted by id. Tasks
+    without an id get ids past every other once read.
+    """
+    known = [task_id for task_id in ids if task_id is not None]
+    if ids[: len(known)] != known:
+        return False
+    return all(previous < task_id for previous, task_id in zip(known, known[1:]))
+
+
+def _assign_added_ids(records: List[JournalRecord], next_id: int) -> None:
+    for record in records:
+        if record["op"] == "add":
+            task_id = record["task"].get("id")
+            if task_id is None:
+                task_id = record["task"]["id"] = next_id
+            next_id = max(next_id, task_id + 1)
+
+
+def _status_name(status: bool) -> str:
+    return "done" if status else "not done"
+
+
+def _journal_needs_compaction(path: str) -> bool:
+    journal_size = os.stat(_sibling_file(path, ".journal")).st_size
+    if journal_size >= JOURNAL_MAX_BYTES:
+        return True
+    try:
+        snapshot_size = os.stat(path).st_size
+    except FileNotFoundError:
+        return False
+    return journal_size >= JOURNAL_MIN_BYTES and (
+        journal_size >= snapshot_size * JOURNAL_RATIO
+    )
+
+
+class _JournalReplay:
+    """
+    Applies journal records to board data. Removed tasks are left
+    as None until compacted, so replaying a removal costs O(1).
+    Records on tasks another writer removed first are skipped.
+    """
+
+    def __init__(self, data: BoardDict):
+        self.replayed = 0
+        self._data = data
+        self._tasks: List[Any] = data["tasks"]
+        self._positions: Optional[Dict[int, int]] = None
+
+    def apply(self, record: JournalRecord) -> None:
+        """
+        Applies a single record, by task id or, for journals written
+        before format version 3, by 0 based index.
+        """
+        self.replayed += 1
+        operation = record["op"]
+        if operation == "add":
+            self._add(record["task"])
+        elif operation == "clean":
+            self._tasks = self._data["tasks"] = []
+            self._positions = None
+        elif "id" in record:
+            position = self._find(record["id"])
+            if position is None:
+                return
+            if operation == "update":
+                self._tasks[position]["status"] = record["status"]
+            elif operation == "remove":
+                self._tasks[position] = None
+                del self._positions[record["id"]]  # type: ignore[union-attr]
+        else:
+            self.compact()
+            if operation == "update":
+                self._tasks[record["index"]]["status"] = record["status"]
+            elif operation == "remove":
+                self._tasks.pop(record["index"])
+
+    def compact(self) -> None:
+        """
+        Drops the removed tasks.
+        """
+        if self._positions is not None and len(self._positions) < len(self._tasks):
+            self._tasks = [task for task in self._tasks if task is not None]
+            self._data["tasks"] = self._tasks
+        self._positions = None
+
+    def _add(self, task: TaskDict) -> None:
+        task_id = task.get("id")
+        if task_id is None:
+            task_id = task["id"] = self._data["next_id"]
+        self._data["next_id"] = max(self._data["next_id"], task_id + 1)
+        if self._positions is not None:
+            self._positions[task_id] = len(self._tasks)
+        self._tasks.append(task)
+
+    def _find(self, task_id: int) -> Optional[int]:
+        if self._positions is None:
+            self._positions = {
+                task["id"]: position
+                for position, task in enumerate(self._tasks)
+                if task is not None
+            }
+        return self._positions.get(task_id)
+
+
+class _JournalOverlay:
+    """
+    Folds journal records by id into the tasks they remove, the
+    statuses they update and the tasks they add, which are then
+    applied to the snapshot tasks while they are streamed, keeping
+    their order like a replay would.
+    """
+
+    def __init__(self, records: Iterator[JournalRecord]):
+        self.applicable = True
+        self._cleaned = False
+        self._removed: Set[int] = set()
+        self._updated: Dict[int, bool] = {}
+        self._added: Dict[int, TaskDict] = {}
+        for record in records:
+            if not self._fold(record):
+                self.applicable = False
+                break
+
+    def apply(self, tasks: Iterator[TaskDict]) -> Iterator[TaskDict]:
+        """
+        Yields the snapshot TASKS with the journal applied.
+        """
+        removed, updated = self._removed, self._updated
+        # A clean drops every snapshot task, which are left unread.
+        for task in () if self._cleaned else tasks:
+            if task["id"] in removed:
+                continue
+            if task["id"] in updated:
+                task = {**task, "status": updated[task["id"]]}
+            yield task
+        yield from self._added.values()
+
+    def live_count(self, segment: SegmentDict) -> int:
+        """
+        Counts the tasks of a snapshot segment left once the journal
+        is applied.
+        """
+        if self._cleaned:
+            return 0
+        removed = sum(
+            1
+            for task_id in self._removed
+            if segment["min_id"] <= task_id <= segment["max_id"]
+        )
+        return segment["count"] - removed
+
+    def _fold(self, record: JournalRecord) -> bool:
+        operation = record["op"]
+        if operation == "add":
+            task_id = record["task"].get("id")
+            if task_id is None or task_id in self._added:
+                return False
+            self._added[task_id] = record["task"]
+        elif operation in ("update", "remove") and "id" in record:
+            task_id = record["id"]
+            if task_id in self._added and operation == "update":
+                self._added[task_id] = {
+                    **self._added[task_id],
+                    "status": record["status"],
+                }
+            elif task_id in self._added:
+                del self._added[task_id]
+            elif task_id in self._removed:
+                # Records on removed tasks are skipped by the replay.
+                return True
+            elif operation == "update":
+                self._updated[task_id] = record["status"]
+            else:
+                self._removed.add(task_id)
+                self._updated.pop(task_id, None)
+        elif operation == "clean":
+            self._cleaned = True
+            self._removed.clear()
+            self._updated.clear()
+            self._added.clear()
+        else:
+            return False
+        return True
+
+
+class _SegmentReplay:
+    """
+    Applies journal records to a segmented snapshot, loading only
+    the segments that may hold the tasks they change. New tasks are
+    added to the last segment until it holds SEGMENT_SIZE tasks.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], path: str):
+        self.next_id: int = manifest["next_id"]
+        self._path = path
+        self._segments: List[SegmentDict] = list(manifest["segments"])
+        # Tasks of the loaded segments by id, in their stored order.
+        self._loaded: Dict[int, Dict[Optional[int], TaskDict]] = {}
+        self._changed: Set[int] = set()
+
+    @property
+    def count(self) -> int:
+        """
+        Counts the tasks left on the board.
+        """
+        return sum(self._size(number) for number in range(len(self._segments)))
+
+    def apply(self, record: JournalRecord) -> bool:
+        """
+        Applies a single record by task id. Returns False for records
+        by index, written before format version 3, which need the
+        whole board.
+        """
+        operation = record["op"]
+        if operation == "add":
+            self._add(record["task"])
+        elif operation == "clean":
+            self._segments, self._loaded, self._changed = [], {}, set()
+        elif "id" not in record:
+            return False
+        else:
+            number = self._find(record["id"])
+            if number is None:
+                return True
+            self._changed.add(number)
+            if operation == "update":
+                self._loaded[number][record["id"]]["status"] = record["status"]
+            elif operation == "remove":
+                del self._loaded[number][record["id"]]
+        return True
+
+    def write(self, revision: int) -> List[SegmentDict]:
+        """
+        Writes the changed segments, dropping emptied ones, returning
+        the summaries of every segment left.
+        """
+        segments = []
+        for number, segment in enumerate(self._segments):
+            if number not in self._changed:
+                segments.append(segment)
+            elif self._loaded[number]:
+                name = f"segment-{revision:08d}-{number:06d}.json"
+                tasks = list(self._loaded[number].values())
+                segments.append(_write_segment(tasks, name, self._path))
+        return segments
+
+    def _add(self, task: TaskDict) -> None:
+        task_id = task.get("id")
+        if task_id is None:
+            task_id = task["id"] = self.next_id
+        self.next_id = max(self.next_id, task_id + 1)
+        if not self._segments or self._size(len(self._segments) - 1) >= SEGMENT_SIZE:
+            self._segments.append(
+                {"file": "", "count": 0, "done": 0, "min_id": 0, "max_id": 0}
+            )
+            self._loaded[len(self._segments) - 1] = {}
+        number = len(self._segments) - 1
+        self._load(number)[task_id] = task
+        self._changed.add(number)
+
+    def _find(self, task_id: int) -> Optional[int]:
+        for number, segment in enumerate(self._segments):
+            if number in self._loaded:
+                if task_id in self._loaded[number]:
+                    return number
+            elif segment["min_id"] <= task_id <= segment["max_id"]:
+                if task_id in self._load(number):
+                    return number
+        return None
+
+    def _load(self, number: int) -> Dict[Optional[int], TaskDict]:
+        if number not in self._loaded:
+            tasks = _read_segment(self._segments[number]["file"], self._path)
+            self._loaded[number] = {task["id"]: task for task in tasks}
+        return self._loaded[number]
+
+    def _size(self, number: int) -> int:
+        if number in self._loaded:
+            return len(self._loaded[number])
+        return self._segments[number]["count"]
+
+
+class _JsonStream:  # pylint: disable=too-few-public-methods
+    """
+    Incremental reader for a json object holding an array, which
+    decodes one array item at a time from a file.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, json_file: IO[str]):
+        self._file = json_file
+        self._buffer = ""
+        self._position = 0
+        self._exhausted = False
+        self._decoder = json.JSONDecoder()
+
+    def find_array(self, keys: Tuple[str, ...]) -> Optional[str]:
+        """
+        Moves to the array stored on the top level object under the
+        first of KEYS found, returning that key, or None when the
+        object has none of them.
+        """
+        self._expect("{")
+        while self._peek() not in ("}", ""):
+            name = self._decode()
+            self._expect(":")
+            if name in keys:
+                return name
+            self._decode()
+            if self._peek() == ",":
+                self._position += 1
+        return None
+
+    def iter_items(self) -> Iterator[Any]:
+        """
+        Yields the items of the array found by find_array.
+        """
+        self._expect("[")
+        while self._peek() not in ("]", ""):
+            yield self._decode()
+            if self._peek() == ",":
+                self._position += 1
+
+    def _fill(self) -> bool:
+        if self._exhausted:
+            return False
+        chunk = self._file.read(self.CHUNK_SIZE)
+        if not chunk:
+            self._exhausted = True
+            return False
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            whitespace = self.WHITESPACE.match(self._buffer, self._position)
+            if whitespace:
+                self._position = whitespace.end()
+            if self._position < len(self._buffer) or not self._fill():
+                return self._buffer[self._position : self._position + 1]
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise JSONDecodeError(f"Expecting '{char}'", self._buffer, self._position)
+        self._position += 1
+
+    def _decode(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A value touching the end of the buffer may be a
+            # truncated number, so it is decoded again with more data.
+            if end < len(self._buffer) or not self._fill():
+                self._position = end
+                return value
@@ -0,0 +1,103 @@
+"""Machine readable and tabular renderings of board listings."""
+
+import json
+
+from itertools import chain
+from itertools import islice
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import TextIO
+
+from whattodo.api.task import Task
+from whattodo.api.task import TaskDict
+from whattodo.transfer import write_tasks
+
+LIST_FORMATS = ("json", "ndjson", "csv", "table")
+
+# Rows read ahead to size the table columns. Later rows with wider
+# cells push the following columns right rather than being cut.
+TABLE_SAMPLE = 1000
+
+TABLE_HEADERS = ["ID", "DESCRIPTION", "STATUS", "CREATED AT"]
+
+
+def write_listing(
+    name: str, tasks: Iterable[TaskDict], output: TextIO, list_format: str
+) -> None:
+    """
+    Streams the tasks of a board into OUTPUT as a single JSON
+    document, JSON lines, CSV or a table, writing every task as soon
+    as it is read.
+
+        >>> write_listing("Personal", iter_tasks_from_json(), sys.stdout, "ndjson")
+        ... {"id": 1, "description": "my first task", "status": false, ...}
+
+    @raises ValueError: When the format is unknown.
+    """
+    if list_format == "json":
+        _write_json(name, tasks, output)
+    elif list_format == "ndjson":
+        write_tasks(tasks, output, "jsonl")
+    elif list_format == "csv":
+        write_tasks(tasks, output, "csv")
+    elif list_format == "table":
+        output.writelines(render_table(name, tasks))
+    else:
+        raise ValueError(f"Unknown format {list_format}, use {', '.join(LIST_FORMATS)}")
+
+
+def render_table(
+    name: str, tasks: Iterable[TaskDict], sample: int = TABLE_SAMPLE
+) -> Iterator[str]:
+    """
+    Renders the tasks as a table one row at a time, sizing its
+    columns with a single pass over the first SAMPLE tasks.
+
+        >>> "".join(render_table("Personal", tasks))
+        ... Personal
+        ... ID  DESCRIPTION    STATUS    CREATED AT
+        ... 1   my first task  not done  2020-12-25 00:00:00
+    """
+    tasks = iter(tasks)
+    head = [_to_cells(dict_task) for dict_task in islice(tasks, sample)]
+    yield f"{name}\n"
+    if not head:
+        yield "No tasks on this board!\n"
+        return
+    widths = [len(header) for header in TABLE_HEADERS]
+    for cells in head:
+        widths = [max(width, len(cell)) for width, cell in zip(widths, cells)]
+    rows = chain(head, (_to_cells(dict_task) for dict_task in tasks))
+    yield _format_row(TABLE_HEADERS, widths)
+    yield _format_row(["-" * width for width in widths], widths)
+    for cells in rows:
+        yield _format_row(cells, widths)
+
+
+def _write_json(name: str, tasks: Iterable[TaskDict], output: TextIO) -> None:
+    """
+    Writes a {"name": ..., "tasks": [...]} document one task at a
+    time, so its tasks never need to be held at once.
+    """
+    output.write(f'{{"name": {json.dumps(name, ensure_ascii=False)}, "tasks": [')
+    separator = "\n"
+    for dict_task in tasks:
+        output.write(separator + json.dumps(dict_task, ensure_ascii=False))
+        separator = ",\n"
+    output.write("\n]}\n")
+
+
+def _to_cells(dict_task: TaskDict) -> List[str]:
+    task = Task.from_dict(dict_task)
+    return [
+        str(dict_task["id"]),
+        task.description,
+        "done" if dict_task["status"] else "not done",
+        task.created_at,
+    ]
+
+
+def _format_row(cells: List[str], widths: List[int]) -> str:
+    padded = [cell.ljust(width) for cell, width in zip(cells[:-1], widths)]
+    return "  ".join([*padded, cells[-1]]) + "\n"
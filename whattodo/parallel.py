@@ -0,0 +1,87 @@
+"""Parallel decoding of large boards stored in segments."""
+
+import json
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from typing import Optional
+
+from whattodo.api.board import Board
+from whattodo.api.task_store import Columns
+from whattodo.api.task_store import TaskStore
+from whattodo.batch import apply_record
+from whattodo.file_storage import DATA_FILE
+from whattodo.file_storage import locked
+from whattodo.file_storage import read_from_json
+from whattodo.file_storage import read_journal
+from whattodo.file_storage import read_manifest
+from whattodo.file_storage import segments_directory
+from whattodo.timings import phase
+
+# Boards with fewer tasks are decoded serially, since starting the
+# worker processes costs more than decoding them on a single core.
+PARALLEL_THRESHOLD = 50_000
+
+
+def read_board_in_parallel(
+    path: str = DATA_FILE, workers: Optional[int] = None
+) -> Optional[Board]:
+    """
+    Reads the stored board into a columnar board, decoding every
+    segment on a pool of WORKERS processes, one per core by default.
+    Workers read their segments themselves and send back the columns
+    of a TaskStore as raw bytes, which are joined in order.
+
+    Boards under PARALLEL_THRESHOLD tasks, boards kept on a single
+    snapshot and single core machines are decoded serially instead.
+
+        >>> board = read_board_in_parallel()
+        >>> board.query(status="done")
+
+    Pending journal operations are applied once the segments are
+    joined, skipping the ones on tasks another writer removed.
+    """
+    workers = workers or os.cpu_count() or 1
+    with locked(exclusive=False, path=path):
+        manifest = read_manifest(path)
+        count = (
+            sum(segment["count"] for segment in manifest["segments"]) if manifest else 0
+        )
+        if manifest is None or count < PARALLEL_THRESHOLD or workers < 2:
+            data = read_from_json(path)
+            return Board.from_dict(data, columnar=True) if data else None
+        directory = segments_directory(path)
+        segment_paths = [
+            os.path.join(directory, segment["file"]) for segment in manifest["segments"]
+        ]
+        # Segments are replaced rather than rewritten, and compactions
+        # wait for the shared lock held here before pruning them.
+        with phase("segments.decode") as record:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(decode_segment, segment_paths))
+            record["tasks"] = count
+        records = list(read_journal(path))
+    board = Board.from_dict(
+        {
+            "name": manifest["name"],
+            "next_id": manifest["next_id"],
+            "tasks": TaskStore.from_columns(parts),
+        },
+        columnar=True,
+    )
+    for journal_record in records:
+        with suppress(ValueError, IndexError):
+            apply_record(board, journal_record)
+    board.pop_changes()
+    return board
+
+
+def decode_segment(segment_path: str) -> Columns:
+    """
+    Decodes the tasks of a segment file into the columns of a
+    TaskStore, run by the worker processes.
+    """
+    with open(segment_path, "rb") as segment_file:
+        dict_tasks = json.loads(segment_file.read())
+    return TaskStore.from_dicts(dict_tasks).to_columns()
@@ -0,0 +1,118 @@
+"""Inverted index of task descriptions kept on sqlite databases."""
+
+import re
+import sqlite3
+
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+# Every distinct word of a task description maps to its id, so the
+# tasks holding a word are found on the primary key without a scan.
+POSTINGS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    PRIMARY KEY (term, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_task_id ON postings (task_id);
+"""
+
+INSERT_POSTING = "INSERT OR IGNORE INTO postings (term, task_id) VALUES (?, ?)"
+
+WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits a text into its case folded words.
+
+        >>> tokenize("Buy MILK, eggs")
+        ... ["buy", "milk", "eggs"]
+    """
+    return WORD.findall(text.casefold())
+
+
+def parse_query(query: str) -> List[List[Tuple[str, bool]]]:
+    """
+    Parses a query into alternatives separated by OR, each made of
+    terms that must all match. Terms ending with * match as prefixes.
+
+        >>> parse_query("buy milk OR egg*")
+        ... [[("buy", False), ("milk", False)], [("egg", True)]]
+
+    @raises ValueError: When the query has no terms.
+    """
+    alternatives: List[List[Tuple[str, bool]]] = [[]]
+    for word in query.split():
+        if word == "OR":
+            alternatives.append([])
+            continue
+        if word == "AND":
+            continue
+        terms = tokenize(word)
+        alternatives[-1].extend((term, False) for term in terms)
+        if terms and word.endswith("*"):
+            alternatives[-1][-1] = (terms[-1], True)
+    alternatives = [terms for terms in alternatives if terms]
+    if not alternatives:
+        raise ValueError(f"The query '{query}' has no terms to search")
+    return alternatives
+
+
+def compile_query(query: str) -> Tuple[str, List[str]]:
+    """
+    Compiles a query into a select of the matching task ids along
+    with its parameters, reading only the postings of its terms.
+
+    @raises ValueError: When the query has no terms.
+    """
+    selects = []
+    parameters: List[str] = []
+    for terms in parse_query(query):
+        term_selects = []
+        for term, prefix in terms:
+            if prefix:
+                term_selects.append(
+                    "SELECT task_id FROM postings WHERE term >= ? AND term < ?"
+                )
+                parameters += [term, term[:-1] + chr(ord(term[-1]) + 1)]
+            else:
+                term_selects.append("SELECT task_id FROM postings WHERE term = ?")
+                parameters.append(term)
+        selects.append(f"SELECT task_id FROM ({' INTERSECT '.join(term_selects)})")
+    return " UNION ".join(selects), parameters
+
+
+def index_task(connection: sqlite3.Connection, task_id: int, description: str) -> None:
+    """
+    Adds the postings of a task description.
+    """
+    connection.executemany(
+        INSERT_POSTING, ((term, task_id) for term in set(tokenize(description)))
+    )
+
+
+def index_tasks(
+    connection: sqlite3.Connection, tasks: Iterable[Tuple[int, str]]
+) -> None:
+    """
+    Replaces every posting with the ones of the given task ids
+    and descriptions.
+    """
+    connection.execute("DELETE FROM postings")
+    connection.executemany(
+        INSERT_POSTING,
+        (
+            (term, task_id)
+            for task_id, description in tasks
+            for term in set(tokenize(description))
+        ),
+    )
+
+
+def unindex_task(connection: sqlite3.Connection, task_id: int) -> None:
+    """
+    Removes the postings of a task.
+    """
+    connection.execute("DELETE FROM postings WHERE task_id = ?", (task_id,))
@@ -0,0 +1,449 @@
+"""Optional module to handle data persistance using a sqlite database."""
+
+import os
+import sqlite3
+
+from contextlib import closing
+from contextlib import contextmanager
+from contextlib import suppress
+from datetime import datetime
+from typing import Iterator
+from typing import List
+from typing import NoReturn
+from typing import Optional
+from typing import Tuple
+
+from whattodo.api.board import FORMAT_VERSION
+from whattodo.api.board import BoardDict
+from whattodo.api.board import JournalRecord
+from whattodo.api.query import parse_order
+from whattodo.api.query import parse_status
+from whattodo.api.query import to_epoch_microseconds
+from whattodo.api.task import TaskDict
+from whattodo.api.task import upgrade_task_dict
+from whattodo.search import POSTINGS_SCHEMA
+from whattodo.search import compile_query
+from whattodo.search import index_task
+from whattodo.search import index_tasks
+from whattodo.search import unindex_task
+
+DATABASE_FILE = "whattodo_data.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS board (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    name TEXT NOT NULL,
+    revision INTEGER
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    description TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    utc_offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS tasks_created_at ON tasks (created_at);
+"""
+
+# Databases created before the board revision and the postings are
+# upgraded on connection, see _migrate.
+SCHEMA_VERSION = 1
+
+# Task ids are the row ids, which AUTOINCREMENT never gives again.
+# The 0 based positional addressing also kept by the Board maps to
+# the n-th row in primary key order, counted from the last row for
+# negative indexes.
+TASK_AT_INDEX = "SELECT {columns} FROM tasks ORDER BY id {direction} LIMIT 1 OFFSET ?"
+
+TASK_COLUMNS = "id, description, status, created_at, utc_offset"
+INSERT_TASK = f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?)"
+
+
+@contextmanager
+def connect(
+    path: str = DATABASE_FILE, create: bool = False
+) -> Iterator[sqlite3.Connection]:
+    """
+    Opens a connection to the database, upgrading the schema when
+    needed. Only writers pass CREATE, which creates the database in
+    WAL mode, so reading a missing database leaves no file behind.
+    Everything executed inside the context is committed as a single
+    transaction.
+    """
+    with closing(sqlite3.connect(path)) as connection:
+        if create:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA + POSTINGS_SCHEMA)
+        _migrate(connection)
+        with connection:
+            yield connection
+
+
+def has_database(path: str = DATABASE_FILE) -> bool:
+    """
+    Checks if the database was created, which readers do before
+    connecting to it.
+    """
+    return os.path.exists(path)
+
+
+def store_to_sqlite(
+    data: BoardDict, revision: Optional[int] = None, path: str = DATABASE_FILE
+) -> None:
+    """
+    Wrapper used to write a whole board into the database, along
+    with the revision of the board it copies, if any.
+    """
+    with connect(path, create=True) as connection:
+        connection.execute("DELETE FROM tasks")
+        connection.execute(
+            "INSERT OR REPLACE INTO board (id, name, revision) VALUES (0, ?, ?)",
+            (data["name"], revision),
+        )
+        connection.executemany(INSERT_TASK, (_to_row(task) for task in data["tasks"]))
+        if "next_id" in data:
+            _reserve_ids(connection, data["next_id"])
+        index_tasks(connection, _iter_descriptions(connection))
+
+
+def read_from_sqlite() -> Optional[BoardDict]:
+    """
+    Wrapper used to read a whole board from the database.
+    """
+    name = read_board_name()
+    if name is None:
+        return None
+    with connect() as connection:
+        rows = connection.execute(f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY id")
+        tasks = [_to_task_dict(row) for row in rows]
+        return {
+            "version": FORMAT_VERSION,
+            "name": name,
+            "next_id": _next_id(connection),
+            "tasks": tasks,
+        }
+
+
+def iter_tasks(start: int = 0, stop: Optional[int] = None) -> Iterator[TaskDict]:
+    """
+    Streams the stored tasks between the 0 based START and STOP indexes.
+    """
+    if not has_database():
+        return
+    limit = -1 if stop is None else max(stop - start, 0)
+    with connect() as connection:
+        rows = connection.execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY id LIMIT ? OFFSET ?",
+            (limit, start),
+        )
+        for row in rows:
+            yield _to_task_dict(row)
+
+
+def query_tasks(  # pylint: disable=too-many-arguments
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    order: str = "id",
+    *,
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> Iterator[TaskDict]:
+    """
+    Streams the tasks between the 0 based START and STOP indexes of
+    the ones with STATUS created from SINCE up to, but excluding,
+    UNTIL, sorted by ORDER, following Board.query.
+
+    @raises ValueError: When the status or order is invalid.
+    """
+    field, descending = parse_order(order)
+    conditions = []
+    parameters: List[int] = []
+    if status is not None:
+        conditions.append("status = ?")
+        parameters.append(parse_status(status))
+    if since is not None:
+        conditions.append("created_at >= ?")
+        parameters.append(to_epoch_microseconds(since))
+    if until is not None:
+        conditions.append("created_at < ?")
+        parameters.append(to_epoch_microseconds(until))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    direction = "DESC" if descending else "ASC"
+    limit = -1 if stop is None else max(stop - start, 0)
+    return _iter_rows(
+        f"SELECT {TASK_COLUMNS} FROM tasks {where} "
+        f"ORDER BY {field} {direction}, id {direction} LIMIT ? OFFSET ?",
+        (*parameters, limit, start),
+    )
+
+
+def read_board_name() -> Optional[str]:
+    """
+    Retrieves the stored board name, if any.
+    """
+    if not has_database():
+        return None
+    with connect() as connection:
+        row = connection.execute("SELECT name FROM board").fetchone()
+    return row[0] if row else None
+
+
+def read_revision(path: str = DATABASE_FILE) -> Optional[int]:
+    """
+    Retrieves the revision of the board the database copies,
+    which is None unless one was given when storing it.
+    """
+    if not has_database(path):
+        return None
+    with connect(path) as connection:
+        row = connection.execute("SELECT revision FROM board").fetchone()
+    return row[0] if row else None
+
+
+def count_tasks() -> int:
+    """
+    Counts the stored tasks.
+    """
+    if not has_database():
+        return 0
+    with connect() as connection:
+        return connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+
+def retrieve_task(index: int) -> TaskDict:
+    """
+    Retrieves a task given it's 0 based index, counting from the
+    last task when negative.
+
+    @raises ValueError: When no tasks are present on the board.
+
+    @raises IdexError: When the given index doesn't have a task.
+    """
+    _check_database()
+    with connect() as connection:
+        row = _task_at_index(connection, TASK_COLUMNS, index)
+        if row is None:
+            _raise_missing_task(connection, f"No tasks found at the index {index}")
+    return _to_task_dict(row)
+
+
+def retrieve_task_by_id(task_id: int) -> TaskDict:
+    """
+    Retrieves a task given it's id.
+
+    @raises ValueError: When no tasks are present on the board.
+
+    @raises IdexError: When no task has the given id.
+    """
+    _check_database()
+    with connect() as connection:
+        row = connection.execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            _raise_missing_task(connection, f"No tasks found with the id {task_id}")
+    return _to_task_dict(row)
+
+
+def apply_record(record: JournalRecord) -> None:
+    """
+    Applies a journal operation as a single statement.
+
+    @raises ValueError: When no tasks are present on the board.
+
+    @raises IdexError: When the given id or index doesn't have a task.
+    """
+    apply_records([record])
+
+
+def apply_records(
+    records: List[JournalRecord],
+    revision: Optional[int] = None,
+    path: str = DATABASE_FILE,
+) -> None:
+    """
+    Applies journal operations in order within a single transaction,
+    which is rolled back when any of them fails. The board copied
+    by the database moves to REVISION, when given. Added tasks
+    without an id get the one the database gives them set on their
+    record.
+
+    @raises ValueError: When no tasks are present on the board.
+
+    @raises IdexError: When the given id or index doesn't have a task.
+    """
+    with connect(path, create=True) as connection:
+        for record in records:
+            _execute_record(connection, record)
+        if revision is not None:
+            connection.execute("UPDATE board SET revision = ?", (revision,))
+
+
+def search_tasks(
+    query: str, limit: Optional[int] = None, path: str = DATABASE_FILE
+) -> List[TaskDict]:
+    """
+    Retrieves up to LIMIT tasks whose descriptions match the query,
+    in the order they were added. Only the postings of the query
+    terms and the matching tasks are read.
+
+        >>> search_tasks("buy milk OR egg*", limit=10)
+
+    @raises ValueError: When the query has no terms.
+    """
+    matches, parameters = compile_query(query)
+    if not has_database(path):
+        return []
+    with connect(path) as connection:
+        rows = connection.execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({matches}) "
+            "ORDER BY id LIMIT ?",
+            (*parameters, -1 if limit is None else limit),
+        )
+        return [_to_task_dict(row) for row in rows]
+
+
+def migrate_from_json(data: BoardDict) -> int:
+    """
+    Imports a board read from the json storage, replacing
+    whatever the database holds. Returns the number of
+    imported tasks.
+    """
+    store_to_sqlite(data)
+    return len(data["tasks"])
+
+
+def _execute_record(connection: sqlite3.Connection, record: JournalRecord) -> None:
+    operation = record["op"]
+    if operation == "add":
+        row = _to_row(record["task"])
+        cursor = connection.execute(INSERT_TASK, row)
+        index_task(connection, cursor.lastrowid, row[1])  # type: ignore[arg-type]
+        if record["task"].get("id") is None:
+            record["task"]["id"] = cursor.lastrowid  # type: ignore[typeddict-item]
+    elif operation == "update":
+        connection.execute(
+            "UPDATE tasks SET status = ? WHERE id = ?",
+            (record["status"], _find_task_id(connection, record)),
+        )
+    elif operation == "remove":
+        task_id = _find_task_id(connection, record)
+        connection.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        unindex_task(connection, task_id)
+    elif operation == "clean":
+        connection.execute("DELETE FROM tasks")
+        connection.execute("DELETE FROM postings")
+
+
+def _find_task_id(connection: sqlite3.Connection, record: JournalRecord) -> int:
+    row = None
+    if "id" in record:
+        row = connection.execute(
+            "SELECT id FROM tasks WHERE id = ?", (record["id"],)
+        ).fetchone()
+        message = f"No tasks found with the id {record['id']}"
+    else:
+        row = _task_at_index(connection, "id", record["index"])
+        message = f"No tasks found at the index {record['index']}"
+    if row is None:
+        _raise_missing_task(connection, message)
+    return row[0]
+
+
+def _task_at_index(
+    connection: sqlite3.Connection, columns: str, index: int
+) -> Optional[tuple]:
+    if index >= 0:
+        sql = TASK_AT_INDEX.format(columns=columns, direction="ASC")
+        return connection.execute(sql, (index,)).fetchone()
+    sql = TASK_AT_INDEX.format(columns=columns, direction="DESC")
+    return connection.execute(sql, (-index - 1,)).fetchone()
+
+
+def _check_database() -> None:
+    if not has_database():
+        raise ValueError("No tasks on this board!")
+
+
+def _migrate(connection: sqlite3.Connection) -> None:
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    # Databases created before the postings lack their tables.
+    connection.executescript(SCHEMA + POSTINGS_SCHEMA)
+    with connection:
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(board)")]
+        if "revision" not in columns:
+            connection.execute("ALTER TABLE board ADD COLUMN revision INTEGER")
+        index_tasks(connection, _iter_descriptions(connection))
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _iter_descriptions(connection: sqlite3.Connection) -> List[Tuple[int, str]]:
+    return connection.execute("SELECT id, description FROM tasks").fetchall()
+
+
+def _iter_rows(sql: str, parameters: tuple) -> Iterator[TaskDict]:
+    if not has_database():
+        return
+    with connect() as connection:
+        for row in connection.execute(sql, parameters):
+            yield _to_task_dict(row)
+
+
+def _next_id(connection: sqlite3.Connection) -> int:
+    maximum = connection.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()
+    sequence = None
+    # Databases created before task ids were stable have no sequence.
+    with suppress(sqlite3.OperationalError):
+        sequence = connection.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'tasks'"
+        ).fetchone()
+    return max(maximum[0], sequence[0] if sequence else 0) + 1
+
+
+def _reserve_ids(connection: sqlite3.Connection, next_id: int) -> None:
+    """
+    Keeps ids below NEXT_ID from being given again, even the ones
+    of tasks removed before the board was imported.
+    """
+    with suppress(sqlite3.OperationalError):
+        cursor = connection.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'tasks'",
+            (next_id - 1,),
+        )
+        if not cursor.rowcount:
+            connection.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', ?)",
+                (next_id - 1,),
+            )
+
+
+def _to_row(dict_task) -> tuple:
+    dict_task = upgrade_task_dict(dict_task)
+    return (
+        dict_task.get("id"),
+        dict_task["description"],
+        dict_task["status"],
+        dict_task["created_at"],
+        dict_task["utc_offset"],
+    )
+
+
+def _to_task_dict(row) -> TaskDict:
+    task_id, description, status, created_at, utc_offset = row
+    return {
+        "id": task_id,
+        "description": description,
+        "status": bool(status),
+        "created_at": created_at,
+        "utc_offset": utc_offset,
+    }
+
+
+def _raise_missing_task(connection: sqlite3.Connection, message: str) -> NoReturn:
+    if connection.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is None:
+        raise ValueError("No tasks on this board!")
+    raise IndexError(message)
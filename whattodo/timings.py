@@ -0,0 +1,190 @@
+"""Timings of the storage, model and rendering phases of a command."""
+
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import TypedDict
+from typing import TypeVar
+
+T = TypeVar("T")
+
+PhaseDict = TypedDict(
+    "PhaseDict",
+    {
+        "name": str,
+        "depth": int,
+        "started": float,
+        "wall": float,
+        "cpu": float,
+        "bytes_read": int,
+        "bytes_written": int,
+        "tasks": int,
+    },
+)
+
+PhaseHook = Callable[[PhaseDict], None]
+
+# Number of phases cProfile and tracemalloc reports are cut at.
+PROFILE_LINES = 50
+
+_hooks: List[PhaseHook] = []
+
+_phase_state = threading.local()
+
+
+def add_hook(hook: PhaseHook) -> None:
+    """
+    Calls HOOK with every phase once it ends, such as to export
+    them as metrics. Phases are only timed while a hook is added.
+
+        >>> add_hook(lambda phase: metrics.observe(phase["name"], phase["wall"]))
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: PhaseHook) -> None:
+    """
+    Stops calling HOOK with the phases.
+
+    @raises ValueError: When HOOK was not added.
+    """
+    _hooks.remove(hook)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[PhaseDict]:
+    """
+    Times the enclosed code as the phase NAME, yielding its record
+    so the bytes and tasks it handles can be counted. Phases started
+    by the enclosed code are one level deeper.
+
+        >>> with phase("store_to_json") as record:
+        ...     record["tasks"] = len(data["tasks"])
+    """
+    depth = getattr(_phase_state, "depth", 0)
+    record: PhaseDict = {
+        "name": name,
+        "depth": depth,
+        "started": 0.0,
+        "wall": 0.0,
+        "cpu": 0.0,
+        "bytes_read": 0,
+        "bytes_written": 0,
+        "tasks": 0,
+    }
+    if not _hooks:
+        yield record
+        return
+    _phase_state.depth = depth + 1
+    record["started"] = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield record
+    finally:
+        record["wall"] = time.perf_counter() - record["started"]
+        record["cpu"] = time.process_time() - cpu
+        _phase_state.depth = depth
+        for hook in list(_hooks):
+            hook(record)
+
+
+def counted(tasks: Iterable[T], record: PhaseDict) -> Iterator[T]:
+    """
+    Yields the tasks, counting them on the phase RECORD, for phases
+    consuming tasks as they are produced.
+    """
+    for task in tasks:
+        record["tasks"] += 1
+        yield task
+
+
+@contextmanager
+def collect() -> Iterator[List[PhaseDict]]:
+    """
+    Collects the phases ending within the block, in the order
+    they end.
+
+        >>> with collect() as phases:
+        ...     read_from_json()
+        >>> [(phase["name"], phase["wall"]) for phase in phases]
+        ... [("snapshot.read", 0.0012), ("json.decode", 0.0031), ...]
+    """
+    phases: List[PhaseDict] = []
+    hook = phases.append
+    add_hook(hook)
+    try:
+        yield phases
+    finally:
+        remove_hook(hook)
+
+
+def render(phases: List[PhaseDict]) -> Iterator[str]:
+    """
+    Renders the phases as a table in the order they started, with
+    nested phases indented under the ones holding them.
+    """
+    yield (
+        f"{'phase':<32} {'wall ms':>10} {'cpu ms':>10} "
+        f"{'read':>12} {'written':>12} {'tasks':>9}\n"
+    )
+    for record in sorted(phases, key=lambda record: record["started"]):
+        name = "  " * record["depth"] + record["name"]
+        wall, cpu = record["wall"] * 1000, record["cpu"] * 1000
+        yield (
+            f"{name:<32} {wall:>10.2f} {cpu:>10.2f} {record['bytes_read']:>12} "
+            f"{record['bytes_written']:>12} {record['tasks']:>9}\n"
+        )
+
+
+def start_profiler(path: str, memory: bool = False) -> Callable[[], None]:
+    """
+    Starts profiling with cProfile or, for MEMORY, with tracemalloc,
+    returning a function that stops it and writes the report to PATH.
+
+        >>> stop = start_profiler("whattodo.prof")
+        >>> read_from_json()
+        >>> stop()
+    """
+    if memory:
+        return _start_memory_profiler(path)
+    return _start_cpu_profiler(path)
+
+
+# Profilers are only imported by the commands profiled.
+# pylint: disable=import-outside-toplevel
+def _start_cpu_profiler(path: str) -> Callable[[], None]:
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def stop() -> None:
+        profiler.disable()
+        with open(path, "w", encoding="utf-8") as report:
+            stats = pstats.Stats(profiler, stream=report)
+            stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+
+    return stop
+
+
+def _start_memory_profiler(path: str) -> Callable[[], None]:
+    import tracemalloc
+
+    tracemalloc.start()
+
+    def stop() -> None:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(path, "w", encoding="utf-8") as report:
+            report.write(f"Peak traced memory: {peak} bytes\n")
+            for statistic in snapshot.statistics("lineno")[:PROFILE_LINES]:
+                report.write(f"{statistic}\n")
+
+    return stop
@@ -0,0 +1,189 @@
+"""Streaming import and export of tasks as JSON lines and CSV."""
+
+import csv
+import json
+
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import MutableMapping
+from typing import TextIO
+
+from whattodo.api.board import JournalRecord
+from whattodo.api.task import Task
+from whattodo.api.task import TaskDict
+
+FORMATS = ("jsonl", "csv")
+
+# Columns of exported CSV files. Imported ones only need a description.
+CSV_FIELDS = ["id", "description", "status", "created_at", "utc_offset"]
+
+# What to do with imported tasks whose id a stored or imported task
+# already has: leave them out, remove the task holding the id before
+# adding them, give them a new id or stop the import.
+CONFLICT_POLICIES = ("skip", "replace", "new-id", "fail")
+
+# Ends the records of a file, which may hold null values.
+_END = object()
+
+_TRUE_STATUSES = ("true", "1", "done", "yes")
+_FALSE_STATUSES = ("false", "0", "not done", "no", "")
+
+
+def guess_format(file_name: str) -> str:
+    """
+    Guesses the format of a file from its extension, JSON lines
+    unless it is a .csv file.
+    """
+    return "csv" if file_name.lower().endswith(".csv") else "jsonl"
+
+
+def read_tasks(lines: Iterable[str], file_format: str) -> Iterator[TaskDict]:
+    """
+    Streams the tasks of a JSON lines or CSV file one record at a time,
+    converted through Task.from_dict and Task.to_dict. Records need a
+    description, while a missing status means not done and a missing
+    creation date the time of the import.
+
+        >>> with open("tickets.csv", newline="", encoding="utf-8") as tickets:
+        ...     [task["description"] for task in read_tasks(tickets, "csv")]
+        ... ["my first ticket", "my second ticket"]
+
+    @raises ValueError: When the format is unknown or a record is invalid.
+    """
+    if file_format == "jsonl":
+        records: Iterator[Any] = (json.loads(line) for line in lines if line.strip())
+    elif file_format == "csv":
+        records = csv.DictReader(lines)
+    else:
+        raise ValueError(f"Unknown format {file_format}, use jsonl or csv")
+    number = 0
+    while True:
+        number += 1
+        try:
+            record: Any = next(records, _END)
+            if record is _END:
+                return
+            dict_task = _to_task_dict(record)
+        except (ValueError, KeyError, TypeError, AttributeError, csv.Error) as excinfo:
+            raise ValueError(f"Invalid record {number}: {excinfo}") from excinfo
+        yield dict_task
+
+
+def write_tasks(tasks: Iterable[TaskDict], output: TextIO, file_format: str) -> int:
+    """
+    Streams the tasks into a JSON lines or CSV file, returning how
+    many were written.
+
+    @raises ValueError: When the format is unknown.
+    """
+    written = 0
+    if file_format == "jsonl":
+        for task in tasks:
+            output.write(json.dumps(task, ensure_ascii=False) + "\n")
+            written += 1
+    elif file_format == "csv":
+        writer = csv.DictWriter(output, CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for task in tasks:
+            writer.writerow(dict(task, status="true" if task["status"] else "false"))
+            written += 1
+    else:
+        raise ValueError(f"Unknown format {file_format}, use jsonl or csv")
+    return written
+
+
+class TaskImport:  # pylint: disable=too-few-public-methods
+    """
+    Turns imported tasks into the journal records adding them to a
+    board, given the statuses of its tasks by id and its next free id.
+    Tasks without an id get the next free ones, like the board would.
+
+        >>> task_import = TaskImport({1: False}, next_id=2, on_conflict="new-id")
+        >>> task_import.records({"id": 1, "description": "my imported task", ...})
+        ... [{"op": "add", "task": {"id": 2, "description": "my imported task", ...}}]
+
+    @raises ValueError: When the conflict policy is unknown.
+    """
+
+    def __init__(
+        self, stored: MutableMapping[int, bool], next_id: int, on_conflict: str
+    ):
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(
+                f"Unknown conflict policy {on_conflict}, "
+                f"use {', '.join(CONFLICT_POLICIES)}"
+            )
+        self.imported = 0
+        self.skipped = 0
+        self._stored = stored
+        self._next_id = max(next_id, max(stored, default=0) + 1)
+        self._on_conflict = on_conflict
+
+    def records(self, dict_task: TaskDict) -> List[JournalRecord]:
+        """
+        Retrieves the records importing a task, none when it is skipped.
+
+        @raises ValueError: When the policy is fail and the id is taken.
+        """
+        task_id = dict_task["id"]
+        records: List[JournalRecord] = []
+        if task_id is not None and task_id in self._stored:
+            if self._on_conflict == "skip":
+                self.skipped += 1
+                return records
+            if self._on_conflict == "fail":
+                raise ValueError(f"The task id {task_id} is already taken")
+            if self._on_conflict == "replace":
+                status = self._stored[task_id]
+                records.append({"op": "remove", "id": task_id, "status": status})
+            else:
+                task_id = None
+        if task_id is None:
+            task_id = self._next_id
+        self._next_id = max(self._next_id, task_id + 1)
+        self._stored[task_id] = dict_task["status"]
+        imported_task: TaskDict = {**dict_task, "id": task_id}
+        records.append({"op": "add", "task": imported_task})
+        self.imported += 1
+        return records
+
+
+def _to_task_dict(record: Dict[str, Any]) -> TaskDict:
+    """
+    Converts an imported record, whose values are all strings when
+    read from CSV, into a task dict on the current format version.
+    """
+    task_id = record.get("id")
+    if isinstance(task_id, str):
+        task_id = int(task_id) if task_id.strip() else None
+    created_at = record.get("created_at")
+    if isinstance(created_at, str) and created_at.lstrip("-").isdigit():
+        created_at = int(created_at)
+    if created_at is None or created_at == "":
+        task = Task(record["description"])
+    else:
+        task = Task.from_dict(
+            {
+                "description": record["description"],
+                "status": False,
+                "created_at": created_at,
+                "utc_offset": int(record.get("utc_offset") or 0),
+            }
+        )
+    dict_task = task.to_dict()
+    dict_task["id"] = task_id
+    dict_task["status"] = _parse_status(record.get("status"))
+    return dict_task
+
+
+def _parse_status(status: Any) -> bool:
+    if isinstance(status, bool) or status is None:
+        return bool(status)
+    if str(status).strip().lower() in _TRUE_STATUSES:
+        return True
+    if str(status).strip().lower() in _FALSE_STATUSES:
+        return False
+    raise ValueError(f"Invalid status '{status}', use done or not done")